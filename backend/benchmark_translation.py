@@ -0,0 +1,81 @@
+"""
+Compare translation engine throughput (characters per second).
+
+Usage:
+    python benchmark_translation.py --source en --target es --engines stub argos google
+    python benchmark_translation.py --file transcript.txt --source en --target de --engines argos
+
+Translates the same text with each engine the way transcripts are translated
+(sentence segmentation, request packing, the shared translation pool and the
+engine's rate limit) but without the translation memory, so every run does the
+full work. Engines that can't translate the pair are skipped.
+"""
+import os
+import sys
+import time
+import argparse
+
+# Add the src directory to the python path (same module names as main.py)
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from translator.engines import TRANSLATION_ENGINES, get_engine_by_name
+from translator.executor import translate_all, TRANSLATION_CONCURRENCY
+from translator.segmenter import SegmentedText, pack_chunks, chunk_text
+
+SAMPLE_TEXT = (
+    "Welcome back to the course. Today we are going to look at how neural networks learn. "
+    "First, we will review gradient descent and why the learning rate matters so much. "
+    "Then we will see how backpropagation computes the gradient of every weight efficiently. "
+    "Finally, we will train a small model and compare a few optimizers on the same data. "
+)
+
+
+def benchmark_engine(engine, sentences, source_lang, target_lang):
+    """Translate all sentences once; returns (seconds, requests)"""
+    chunks = pack_chunks(sentences, engine.max_chars)
+    texts = [chunk_text(sentences[start:end]) for start, end in chunks]
+
+    started = time.perf_counter()
+    translate_all(
+        texts,
+        lambda text: engine.translate(text, source_lang, target_lang),
+        backend=engine.name,
+        rate_limited=engine.rate_limited
+    )
+    return time.perf_counter() - started, len(texts)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare translation engine throughput")
+    parser.add_argument("--engines", nargs="+", choices=list(TRANSLATION_ENGINES), default=["stub"])
+    parser.add_argument("--source", default="en", help="Source language (local engines need it)")
+    parser.add_argument("--target", default="es")
+    parser.add_argument("--file", help="Text to translate (default: a generated lecture-like sample)")
+    parser.add_argument("--chars", type=int, default=50000, help="Size of the generated sample")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = SAMPLE_TEXT * (args.chars // len(SAMPLE_TEXT) + 1)
+
+    sentences = SegmentedText(text).sentences
+    characters = sum(len(sentence) for sentence in sentences)
+    print(f"{characters} characters in {len(sentences)} sentences, {TRANSLATION_CONCURRENCY} concurrent requests")
+    print(f"{'engine':<10}{'requests':>10}{'seconds':>10}{'chars/s':>12}")
+
+    for name in args.engines:
+        engine = get_engine_by_name(name)
+        if not engine.is_available(args.source, args.target):
+            print(f"{name:<10}  not available for {args.source} -> {args.target}")
+            continue
+        try:
+            seconds, requests = benchmark_engine(engine, sentences, args.source, args.target)
+        except Exception as e:
+            print(f"{name:<10}  failed: {e}")
+            continue
+        print(f"{name:<10}{requests:>10}{seconds:>10.2f}{characters / seconds if seconds else float('inf'):>12.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
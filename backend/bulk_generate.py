@@ -0,0 +1,180 @@
+"""
+Bulk pre-generation of flashcards and quizzes through the batch API.
+
+Usage:
+    python bulk_generate.py --user alice@example.com --languages en es
+    python bulk_generate.py --user alice@example.com --videos 12 13 --kinds quiz --backend local
+
+Builds one batch for every (video, language, kind), waits for it to finish,
+and saves the results the same way as /flashcards/save and /quiz/save.
+Generations already in the generation cache are saved without a batch request.
+Transcripts are downloaded and results uploaded concurrently (STORAGE_IO_CONCURRENCY).
+"""
+import os
+import sys
+import time
+import argparse
+# Load environment variables via config module (supports .env and AWS SSM)
+import src.config
+
+# Add the src directory to the python path (same module names as main.py)
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from database import SessionLocal, User, Video, Transcript, init_db
+from tasks import (
+    NotFoundError, find_original_transcript, find_flashcard_transcript, find_quiz_transcript,
+    store_artifact_content, upsert_artifact_record, ARTIFACT_KINDS
+)
+from cache import prefetch_artifacts
+from storage import map_io
+from generator.flashcard_generator import FlashcardGenerator
+from generator.quiz_generator import QuizGenerator
+from generator.generation_cache import get_cached_generation, store_generation
+from generator.batch import get_batch_backend, batch_request_id
+
+BATCH_POLL_INTERVAL_SECONDS = int(os.getenv("BATCH_POLL_INTERVAL_SECONDS", "60"))
+
+GENERATION_KINDS = {
+    "flashcards": (FlashcardGenerator, find_flashcard_transcript),
+    "quiz": (QuizGenerator, find_quiz_transcript),
+}
+
+
+def collect_work(db, videos, languages, kinds):
+    """
+    One entry per (video, language, kind) that has a transcript:
+    (video, language, kind, generator, transcript_text, cached items or None).
+    """
+    # Download every transcript that can be used concurrently up front
+    transcripts = db.query(Transcript).filter(
+        Transcript.video_id.in_([video.id for video in videos]),
+        Transcript.language.in_(languages)
+    ).all()
+    transcripts += [find_original_transcript(db, video) for video in videos]
+    prefetch_artifacts([transcript for transcript in transcripts if transcript])
+
+    work = []
+    for video in videos:
+        for language in languages:
+            for kind in kinds:
+                generator_class, find_transcript = GENERATION_KINDS[kind]
+                try:
+                    transcript_text = find_transcript(db, video, language)
+                except NotFoundError as e:
+                    print(f"Skipping {kind} for video {video.id} ({language}): {e}")
+                    continue
+
+                generator = generator_class()
+                cached = get_cached_generation(kind, transcript_text, language, generator.generation_version, generator.model)
+                work.append((video, language, kind, generator, transcript_text, cached))
+    return work
+
+def run_batch(backend, work, poll_interval):
+    """Submit every uncached entry as one batch and return custom_id -> response text"""
+    requests = []
+    for video, language, kind, generator, transcript_text, cached in work:
+        if cached is not None:
+            continue
+        for part, params in enumerate(generator.batch_requests(transcript_text, language)):
+            requests.append((batch_request_id(kind, video.id, language, part), kind, params))
+
+    if not requests:
+        return {}
+
+    batch_id = backend.submit(requests)
+    print(f"Submitted batch {batch_id} with {len(requests)} requests ({backend.name})")
+
+    while True:
+        finished, counts = backend.status(batch_id)
+        if finished:
+            break
+        print(f"Batch {batch_id} in progress: {counts}")
+        time.sleep(poll_interval)
+
+    print(f"Batch {batch_id} finished: {counts}")
+    return backend.results(batch_id)
+
+def save_results(db, user, work, results):
+    """Store all generated sets concurrently, then point the DB rows at them one by one"""
+    ready = []
+    failed = 0
+    for video, language, kind, generator, transcript_text, cached in work:
+        try:
+            items = cached
+            if items is None:
+                # A long transcript was split into several requests: collect them in order
+                contents = []
+                part = 0
+                while batch_request_id(kind, video.id, language, part) in results:
+                    contents.append(results[batch_request_id(kind, video.id, language, part)])
+                    part += 1
+                if not contents or any(content is None for content in contents):
+                    raise RuntimeError("batch request did not succeed")
+
+                items = [item.dict() for item in generator.items_from_batch(contents)]
+                store_generation(kind, transcript_text, language, generator.generation_version, generator.model, items)
+            ready.append((video, language, kind, items, cached is not None))
+        except Exception as e:
+            print(f"Failed to save {kind} for video {video.id} ({language}): {e}")
+            failed += 1
+
+    def store(entry):
+        video, language, kind, items, _ = entry
+        try:
+            return store_artifact_content(user, video, kind, language, items)
+        except Exception as e:
+            return e
+
+    saved = 0
+    for (video, language, kind, _, from_cache), stored in zip(ready, map_io(store, ready)):
+        try:
+            if isinstance(stored, Exception):
+                raise stored
+            stored_path, codec, payload = stored
+            upsert_artifact_record(db, ARTIFACT_KINDS[kind][0], video, user, language, stored_path, payload=payload, codec=codec)
+            print(f"Saved {kind} for video {video.id} ({language}){' from cache' if from_cache else ''}: {stored_path or 'inline'}")
+            saved += 1
+        except Exception as e:
+            print(f"Failed to save {kind} for video {video.id} ({language}): {e}")
+            db.rollback()
+            failed += 1
+    return saved, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate flashcards and quizzes for many videos through the batch API")
+    parser.add_argument("--user", required=True, help="Email of the user owning the videos")
+    parser.add_argument("--videos", type=int, nargs="*", help="Video ids (default: all completed videos of the user)")
+    parser.add_argument("--languages", nargs="+", default=["en"])
+    parser.add_argument("--kinds", nargs="+", choices=list(GENERATION_KINDS), default=list(GENERATION_KINDS))
+    parser.add_argument("--backend", choices=["anthropic", "local"], default="anthropic",
+                        help="'local' answers with placeholder items without calling the API (offline testing)")
+    parser.add_argument("--poll-interval", type=int, default=BATCH_POLL_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == args.user).first()
+        if not user:
+            print(f"User not found: {args.user}")
+            return 1
+
+        query = db.query(Video).filter(Video.user_id == user.id)
+        if args.videos:
+            query = query.filter(Video.id.in_(args.videos))
+        else:
+            query = query.filter(Video.status == 'completed')
+        videos = query.order_by(Video.id).all()
+
+        work = collect_work(db, videos, args.languages, args.kinds)
+        print(f"{len(work)} generations for {len(videos)} videos ({sum(1 for w in work if w[5] is not None)} cached)")
+
+        results = run_batch(get_batch_backend(args.backend), work, args.poll_interval)
+        saved, failed = save_results(db, user, work, results)
+        print(f"Done: {saved} saved, {failed} failed")
+        return 1 if failed else 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
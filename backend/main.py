@@ -1,13 +1,15 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse, Response, RedirectResponse
 from pydantic import BaseModel
 import sys
 import os
 import json
 import datetime
 import asyncio
+import threading
 from typing import List, Optional
+from sqlalchemy import select, union_all, literal
 from sqlalchemy.orm import Session
 import boto3
 from botocore.exceptions import ClientError
@@ -19,11 +21,23 @@ import src.config
 # Add the src directory to the python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from downloader.video_downloader import VideoDownloader
-from translator.translator import Translator
-from generator.flashcard_generator import FlashcardGenerator
-from generator.quiz_generator import QuizGenerator
-from database import init_db, get_db, Video, User, Transcript, Flashcard, Quiz
+from tasks import (
+    NotFoundError, find_user_video, translate_transcript_for_video, translate_transcript_for_video_multi,
+    generate_flashcards_for_video, generate_quiz_for_video,
+    find_flashcard_transcript, find_quiz_transcript, stream_flashcards, stream_quiz, stream_translation_for_video,
+    ARTIFACT_KINDS, artifact_upload_key, promote_artifact_upload, save_artifact
+)
+from jobs import submit_job, cancel_job, cancel_video_jobs, job_to_dict, job_channel, JOB_HANDLERS, TERMINAL_JOB_STATUSES
+from generator.base import usage_stats
+from generator.llm_client import get_llm_client
+from generator.compression import compression_stats
+from translator.memory import translation_memory
+from translator.executor import TRANSLATION_MAX_TARGET_LANGUAGES
+from reaper import reap_pending_deletions, REAP_AFTER_DELETE
+from storage import run_io, storage_for, disk_cache_stats, BROWSER_CODECS
+from cache import artifact_cache, read_artifact, read_artifact_row, artifact_location, artifact_version, artifact_etag, etag_matches, invalidate_artifact
+from notifications import get_event_bus, video_channel, video_status_event, publish_video_status, format_sse, TERMINAL_STATUSES
+from database import init_db, get_db, SessionLocal, Video, User, Transcript, Flashcard, Quiz, Job, Tombstone, add_tombstone, prune_tombstones, add_pending_deletion, TOMBSTONE_RETENTION_DAYS
 
 # Initialize FastAPI with optional root_path (useful for Lambda behind API Gateway with custom paths)
 root_path = os.getenv("ROOT_PATH", "")
@@ -105,10 +119,16 @@ class TranslateRequest(BaseModel):
     target_language: str
     user_id: str = "anonymous"
 
+class TranslateBatchRequest(BaseModel):
+    video_id: int
+    target_languages: List[str]
+    user_id: str = "anonymous"
+
 class GenerateFlashcardsRequest(BaseModel):
     video_id: int
     language: str = "en"
     user_id: str
+    regenerate: bool = False  # Bypass the generation cache
 
 class SaveFlashcardsRequest(BaseModel):
     video_id: int
@@ -120,6 +140,7 @@ class GenerateQuizRequest(BaseModel):
     video_id: int
     language: str = "en"
     user_id: str
+    regenerate: bool = False  # Bypass the generation cache
 
 class SaveQuizRequest(BaseModel):
     video_id: int
@@ -130,87 +151,146 @@ class SaveQuizRequest(BaseModel):
 class UserLoginRequest(BaseModel):
     email: str
 
+class JobRequest(BaseModel):
+    job_type: str  # 'translate', 'flashcards', 'quiz'
+    user_id: str
+    video_id: int
+    params: dict = {}  # e.g. {"target_language": "es"}, {"target_languages": ["es", "fr"]} or {"language": "en", "regenerate": false}
+
+class ArtifactUploadRequest(BaseModel):
+    kind: str  # 'flashcards' or 'quiz'
+    video_id: int
+    user_id: str
+    language: str
+    s3_key: Optional[str] = None  # staging key from /artifacts/upload-url (confirm only)
+
 # ====================
 # Helper Functions
 # ====================
 
-from src.utils import upload_to_s3, delete_from_s3, read_file_content, send_to_sqs, USE_S3, S3_BUCKET_NAME, SQS_QUEUE_URL
+from utils import (
+    send_to_sqs,
+    generate_presigned_get_url, generate_presigned_put_url,
+    USE_S3, S3_BUCKET_NAME, SQS_QUEUE_URL, ARTIFACT_DELIVERY, PRESIGNED_URL_EXPIRES
+)
+
+def artifact_delivery_response(row, delivery, content_type):
+    """
+    Hand out a Transcript/Flashcard/Quiz row's S3 file as a presigned URL ('url')
+    or a redirect to one ('redirect').
+    Returns None when the artifact should be served inline through the API.
+    Rows written before codecs were recorded need a HEAD request, so call it off the event loop.
+    """
+    file_path = row.file_path
+    delivery = delivery or ARTIFACT_DELIVERY
+    if delivery == "presigned":
+        delivery = "url"
+    if delivery not in ("url", "redirect") or not USE_S3 or not file_path or not file_path.startswith("s3://"):
+        return None
+
+    # Objects compressed with a codec browsers can't decode (zstd) are served inline
+    codec = row.codec or storage_for(file_path).codec(file_path)
+    if codec and codec != 'identity' and codec not in BROWSER_CODECS:
+        return None
+
+    url = generate_presigned_get_url(file_path, content_type=content_type)
+    if delivery == "redirect":
+        return RedirectResponse(url, status_code=307)
+    return {"url": url, "expires_in": PRESIGNED_URL_EXPIRES}
 
 @app.post("/flashcards/save")
 async def save_flashcards(request: SaveFlashcardsRequest, db: Session = Depends(get_db)):
     try:
-        # 1. Save to File System
-        # Create directory structure: downloads/flashcards/{user_id}/{video_id}
-        # Save to temporary file
-        # In Lambda, we must use /tmp
-        base_dir = "/tmp/downloads"
-        flashcards_dir = os.path.join(base_dir, "flashcards", str(request.user_id), str(request.video_id))
-        os.makedirs(flashcards_dir, exist_ok=True)
-
-        # File path: flashcards_{language}.json
-        filename = f"flashcards_{request.language}.json"
-        file_path = os.path.join(flashcards_dir, filename)
-
-        # Save to JSON file
-        with open(file_path, "w", encoding='utf-8') as f:
-            json.dump(request.flashcards, f, indent=4, ensure_ascii=False)
-
-        # Upload to S3 if enabled
-        if USE_S3:
-            s3_key = f"flashcards/{request.user_id}/{request.video_id}/{filename}"
-            stored_path = upload_to_s3(file_path, s3_key)
-            # Optional: Delete local file after upload
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        else:
-            stored_path = file_path
-
-        # 2. Save to Database
+        user, video = find_user_video(db, request.user_id, request.video_id)
+
+        # Write the JSON file (S3 or local) and create or update the flashcard set
+        stored_path = await run_io(save_artifact, db, user, video, "flashcards", request.language, request.flashcards)
+
+        return {"message": "Flashcards saved successfully", "path": stored_path}
+
+    except NotFoundError as nf:
+        raise HTTPException(status_code=404, detail=str(nf))
+    except Exception as e:
+        print(f"Error saving flashcards: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/artifacts/upload-url")
+async def create_artifact_upload_url(request: ArtifactUploadRequest, db: Session = Depends(get_db)):
+    """
+    Presigned upload for large flashcard sets / quizzes.
+    The client PUTs the JSON straight to a staging key in S3 with the returned
+    URL and then calls /artifacts/confirm with that key, so the payload never
+    passes through the API and nothing users see changes until it is confirmed.
+    """
+    try:
+        if request.kind not in ARTIFACT_KINDS:
+            raise HTTPException(status_code=400, detail=f"Unknown artifact kind: {request.kind}")
+        if not USE_S3:
+            raise HTTPException(status_code=400, detail="Presigned uploads require S3 storage")
+
         # Find user
         user = db.query(User).filter(User.email == request.user_id).first()
         if not user:
-            # Should we create user? Or fail? 
-            # For consistency with other endpoints, let's fail if user not found, 
-            # but the frontend sends the email from AuthService.
             raise HTTPException(status_code=404, detail="User not found")
 
         # Find video
         video = db.query(Video).filter(Video.id == request.video_id, Video.user_id == user.id).first()
         if not video:
-             raise HTTPException(status_code=404, detail="Video not found")
-
-        # Check if flashcards already exist for this video/language
-        existing_flashcard = db.query(Flashcard).filter(
-            Flashcard.video_id == video.id,
-            Flashcard.language == request.language
-        ).first()
-
-        if existing_flashcard:
-            # Update existing
-            existing_flashcard.file_path = stored_path
-            existing_flashcard.created_at = datetime.datetime.utcnow() # Update timestamp
-            db.commit()
-            db.refresh(existing_flashcard)
-            print(f"Updated existing flashcards for video {video.id} lang {request.language}")
-        else:
-            # Create new
-            new_flashcard = Flashcard(
-                video_id=video.id,
-                user_id=user.id,
-                language=request.language,
-                file_path=stored_path
+            raise HTTPException(status_code=404, detail="Video not found")
+
+        s3_key = artifact_upload_key(request.kind, request.user_id, video.id)
+        return {
+            "upload_url": generate_presigned_put_url(s3_key, content_type="application/json"),
+            "method": "PUT",
+            "headers": {"Content-Type": "application/json"},
+            "s3_key": s3_key,
+            "expires_in": PRESIGNED_URL_EXPIRES
+        }
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        print(f"Error creating upload URL: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/artifacts/confirm")
+async def confirm_artifact_upload(request: ArtifactUploadRequest, db: Session = Depends(get_db)):
+    """Commit the DB row for an artifact uploaded through /artifacts/upload-url."""
+    try:
+        if request.kind not in ARTIFACT_KINDS:
+            raise HTTPException(status_code=400, detail=f"Unknown artifact kind: {request.kind}")
+        if not USE_S3:
+            raise HTTPException(status_code=400, detail="Presigned uploads require S3 storage")
+
+        # Find user
+        user = db.query(User).filter(User.email == request.user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        # Find video
+        video = db.query(Video).filter(Video.id == request.video_id, Video.user_id == user.id).first()
+        if not video:
+            raise HTTPException(status_code=404, detail="Video not found")
+
+        if not request.s3_key:
+            raise HTTPException(status_code=400, detail="s3_key of the upload is required")
+
+        # Checked with a HEAD request, then stored inline or copied to the live key within S3
+        try:
+            record, stored_path = await run_io(
+                promote_artifact_upload, db, user, video, request.kind, request.language, request.s3_key
             )
-            db.add(new_flashcard)
-            db.commit()
-            db.refresh(new_flashcard)
-            print(f"Created new flashcards for video {video.id} lang {request.language}")
+        except NotFoundError:
+            raise HTTPException(status_code=409, detail="Upload not found in storage; PUT the file before confirming")
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
 
-        return {"message": "Flashcards saved successfully", "path": stored_path}
+        return {"message": "Upload confirmed", "id": record.id, "path": stored_path}
 
     except HTTPException as he:
         raise he
     except Exception as e:
-        print(f"Error saving flashcards: {str(e)}")
+        print(f"Error confirming upload: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/users/login")
@@ -267,6 +347,7 @@ async def queue_video_analysis(request: VideoRequest, db: Session = Depends(get_
             "user_id": request.user_id
         }
         send_to_sqs(message)
+        publish_video_status(db_video.id, 'queued')
         
         return {
             "message": "Video queued for analysis",
@@ -303,6 +384,330 @@ async def list_videos(user_id: str = "anonymous", db: Session = Depends(get_db))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/dashboard")
+async def get_dashboard(user_id: str = "anonymous", db: Session = Depends(get_db)):
+    """
+    Get all videos for a user together with their transcripts, flashcards and quizzes.
+    Replaces the per-video fan-out to /transcripts, /flashcards and /quizzes with
+    a single request backed by one joined query.
+    """
+    try:
+        # Find user by email
+        user = db.query(User).filter(User.email == user_id).first()
+        if not user:
+            return {"videos": []}
+
+        # Collect every artifact of the user in one UNION ALL, then attach them to
+        # their videos with a single outer join
+        artifacts = union_all(
+            select(
+                literal("transcripts").label("kind"),
+                Transcript.id.label("artifact_id"),
+                Transcript.video_id.label("video_id"),
+                Transcript.language.label("language"),
+                Transcript.file_path.label("file_path"),
+                Transcript.created_at.label("artifact_created_at")
+            ).where(Transcript.user_id == user.id),
+            select(
+                literal("flashcards"),
+                Flashcard.id,
+                Flashcard.video_id,
+                Flashcard.language,
+                Flashcard.file_path,
+                Flashcard.created_at
+            ).where(Flashcard.user_id == user.id),
+            select(
+                literal("quizzes"),
+                Quiz.id,
+                Quiz.video_id,
+                Quiz.language,
+                Quiz.file_path,
+                Quiz.created_at
+            ).where(Quiz.user_id == user.id)
+        ).subquery()
+
+        rows = db.execute(
+            select(
+                Video.id,
+                Video.title,
+                Video.url,
+                Video.status,
+                Video.created_at,
+                artifacts.c.kind,
+                artifacts.c.artifact_id,
+                artifacts.c.language,
+                artifacts.c.file_path,
+                artifacts.c.artifact_created_at
+            )
+            .outerjoin(artifacts, artifacts.c.video_id == Video.id)
+            .where(Video.user_id == user.id)
+            .order_by(Video.created_at.desc(), Video.id, artifacts.c.artifact_created_at)
+        ).all()
+
+        videos = {}
+        for row in rows:
+            video = videos.get(row.id)
+            if video is None:
+                video = videos[row.id] = {
+                    "id": row.id,
+                    "title": row.title,
+                    "url": row.url,
+                    "status": row.status,
+                    "created_at": row.created_at,
+                    "transcript_languages": [],
+                    "transcripts": [],
+                    "flashcards": [],
+                    "quizzes": []
+                }
+
+            # Videos without any artifact come back once with NULL artifact columns
+            if row.kind is None:
+                continue
+
+            video[row.kind].append({
+                "id": row.artifact_id,
+                "language": row.language,
+                "file_path": row.file_path,
+                "created_at": row.artifact_created_at
+            })
+            if row.kind == "transcripts":
+                video["transcript_languages"].append(row.language)
+
+        for video in videos.values():
+            video["counts"] = {
+                "transcripts": len(video["transcripts"]),
+                "flashcards": len(video["flashcards"]),
+                "quizzes": len(video["quizzes"])
+            }
+
+        return {"videos": list(videos.values())}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Watermarks trail the clock by this much so rows committed while a sync request
+# runs (or stamped by a worker with a slightly slow clock) are not skipped
+SYNC_SAFETY_MARGIN_SECONDS = int(os.getenv("SYNC_SAFETY_MARGIN_SECONDS", "5"))
+
+@app.get("/sync")
+async def sync_changes(user_id: str = "anonymous", since: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Delta-sync for polling clients.
+    Returns only the videos, transcripts, flashcards and quizzes created or changed
+    after the `since` watermark, plus tombstones for rows deleted since then.
+    Without a watermark, or with one older than tombstone retention, a full snapshot
+    is returned and the client should replace its local state.
+    """
+    try:
+        now = datetime.datetime.utcnow()
+        watermark = now - datetime.timedelta(seconds=SYNC_SAFETY_MARGIN_SECONDS)
+
+        since_dt = None
+        if since:
+            try:
+                since_dt = datetime.datetime.fromisoformat(since)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid watermark: {since}")
+            if since_dt.tzinfo is not None:
+                since_dt = since_dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+        full = since_dt is None or since_dt < now - datetime.timedelta(days=TOMBSTONE_RETENTION_DAYS)
+        changes = {
+            "watermark": watermark.isoformat(),
+            "full": full,
+            "videos": [],
+            "transcripts": [],
+            "flashcards": [],
+            "quizzes": [],
+            "deleted": []
+        }
+
+        # Find user by email
+        user = db.query(User).filter(User.email == user_id).first()
+        if not user:
+            return changes
+
+        def changed_rows(model):
+            # Served by the (user_id, updated_at) index on every table
+            query = db.query(model).filter(model.user_id == user.id)
+            if not full:
+                query = query.filter(model.updated_at >= since_dt)
+            return query.all()
+
+        changes["videos"] = [
+            {
+                "id": v.id,
+                "title": v.title,
+                "url": v.url,
+                "status": v.status,
+                "created_at": v.created_at,
+                "updated_at": v.updated_at
+            }
+            for v in changed_rows(Video)
+        ]
+
+        for key, model in (("transcripts", Transcript), ("flashcards", Flashcard), ("quizzes", Quiz)):
+            changes[key] = [
+                {
+                    "id": row.id,
+                    "video_id": row.video_id,
+                    "language": row.language,
+                    "file_path": row.file_path,
+                    "created_at": row.created_at,
+                    "updated_at": row.updated_at
+                }
+                for row in changed_rows(model)
+            ]
+
+        if not full:
+            tombstones = db.query(Tombstone).filter(
+                Tombstone.user_id == user.id,
+                Tombstone.deleted_at >= since_dt
+            ).all()
+            changes["deleted"] = [
+                {
+                    "entity": t.entity,
+                    "id": t.entity_id,
+                    "video_id": t.video_id,
+                    "deleted_at": t.deleted_at
+                }
+                for t in tombstones
+            ]
+
+        return changes
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# SSE streams send a keep-alive comment when idle; clients reconnect once a
+# stream hits its maximum duration
+SSE_HEARTBEAT_SECONDS = 15
+SSE_MAX_STREAM_SECONDS = int(os.getenv("SSE_MAX_STREAM_SECONDS", "300"))
+
+def sse_response(subscription, current, is_terminal):
+    """
+    Stream `current` and then every event from `subscription` as Server-Sent Events,
+    until an event satisfies is_terminal or the stream hits its maximum duration.
+    """
+    async def event_stream():
+        try:
+            yield format_sse(current, "status")
+            if is_terminal(current):
+                return
+
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            while True:
+                remaining = SSE_MAX_STREAM_SECONDS - (loop.time() - started)
+                if remaining <= 0:
+                    return
+
+                # Woken by the bus when an event arrives; no polling
+                event = await subscription.get_async(min(SSE_HEARTBEAT_SECONDS, remaining))
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield format_sse(event, "status")
+                if is_terminal(event):
+                    return
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def generation_sse_response(items, item_event):
+    """
+    Stream generated items as Server-Sent Events: one `item_event` per item as
+    soon as it is ready, then `done` with the total (or `error`).
+    The blocking iterator is consumed on its own thread, which also closes it
+    (stopping the model stream) when the client disconnects.
+    """
+    async def event_stream():
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        stop = threading.Event()
+
+        def emit(kind, value):
+            try:
+                loop.call_soon_threadsafe(events.put_nowait, (kind, value))
+            except RuntimeError:
+                # Event loop already gone
+                stop.set()
+
+        def produce():
+            try:
+                count = 0
+                for item in items:
+                    count += 1
+                    emit(item_event, item)
+                    if stop.is_set():
+                        return
+                emit("done", {"count": count})
+            except Exception as e:
+                print(f"Streaming generation error: {e}")
+                emit("error", {"detail": str(e)})
+            finally:
+                items.close()
+
+        threading.Thread(target=produce, daemon=True).start()
+        try:
+            while True:
+                kind, value = await events.get()
+                yield format_sse(value, kind)
+                if kind in ("done", "error"):
+                    return
+        finally:
+            stop.set()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/videos/{video_id}/events")
+async def stream_video_events(video_id: int, user_id: str = "anonymous"):
+    """
+    Server-Sent Events stream of a video's processing status.
+    Sends the current state first, then every stage transition published by the
+    worker (queued, downloading, transcribing, uploading, completed/failed) until
+    the video reaches a terminal status.
+    """
+    # Not Depends(get_db): that session would stay checked out until the stream ends
+    db = SessionLocal()
+    try:
+        # Find user by email
+        user = db.query(User).filter(User.email == user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        # Subscribe before reading the current state so no transition is missed
+        bus = get_event_bus()
+        channel = video_channel(video_id)
+        subscription = await asyncio.to_thread(bus.subscribe, channel)
+
+        video = db.query(Video).filter(Video.id == video_id, Video.user_id == user.id).first()
+        if not video:
+            subscription.close()
+            raise HTTPException(status_code=404, detail="Video not found")
+
+        current = bus.last_event(channel)
+        if not current or (video.status in TERMINAL_STATUSES and current["status"] != video.status):
+            current = video_status_event(video.id, video.status)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        db.close()
+
+    return sse_response(subscription, current, lambda event: event["status"] in TERMINAL_STATUSES)
+
 @app.get("/videos/{video_id}/transcripts")
 async def get_video_transcripts(video_id: int, user_id: str = "anonymous", db: Session = Depends(get_db)):
     """Get all available transcripts for a specific video."""
@@ -336,6 +741,44 @@ async def get_video_transcripts(video_id: int, user_id: str = "anonymous", db: S
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/transcripts/{transcript_id}/content")
+async def get_transcript_content(transcript_id: int, user_id: str = "anonymous", delivery: Optional[str] = None, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Get the text of a transcript, with ETag support for conditional requests."""
+    try:
+        # Find user
+        user = db.query(User).filter(User.email == user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        # Find transcript
+        transcript = db.query(Transcript).filter(Transcript.id == transcript_id, Transcript.user_id == user.id).first()
+        if not transcript:
+            raise HTTPException(status_code=404, detail="Transcript not found")
+
+        # Unchanged since the client's copy: skip reading the file entirely
+        version = artifact_version(transcript)
+        etag = artifact_etag(transcript.file_path, version)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        # Presigned mode: the client fetches the bytes from S3 itself
+        presigned = await run_io(artifact_delivery_response, transcript, delivery, "text/plain; charset=utf-8")
+        if presigned is not None:
+            return presigned
+
+        content = await run_io(read_artifact, transcript.file_path, version)
+
+        return JSONResponse(
+            {"id": transcript.id, "language": transcript.language, "content": content},
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+        )
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        print(f"Error reading transcript content: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/videos/{video_id}/flashcards")
 async def get_video_flashcards(video_id: int, user_id: str = "anonymous", db: Session = Depends(get_db)):
     """Get all saved flashcards for a specific video."""
@@ -370,7 +813,7 @@ async def get_video_flashcards(video_id: int, user_id: str = "anonymous", db: Se
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/videos/{video_id}")
-async def delete_video(video_id: int, user_id: str = "anonymous", db: Session = Depends(get_db)):
+async def delete_video(video_id: int, background_tasks: BackgroundTasks, user_id: str = "anonymous", db: Session = Depends(get_db)):
     try:
         # Find user by email
         user = db.query(User).filter(User.email == user_id).first()
@@ -381,51 +824,33 @@ async def delete_video(video_id: int, user_id: str = "anonymous", db: Session =
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
         
-        # Delete from filesystem (pass user_id for user-specific paths)
-        # In Lambda, we must use /tmp as the base directory
-        downloader = VideoDownloader(output_dir="/tmp/downloads", user_id=user_id)
-        downloader.delete_video(None, video.title)  # Pass None for file_path since we don't store it
-        
-        # Delete associated files (flashcards, quizzes, transcripts)
-        # Note: downloader.delete_video might try to delete transcripts based on title, 
-        # but explicit deletion using stored paths is safer.
-        
+        # Stored files (flashcards, quizzes, transcripts) are removed by the reaper after the response
+        stored_paths = []
+        for row in list(video.flashcards) + list(video.quizzes) + list(video.transcripts):
+            invalidate_artifact(row.file_path)
+            add_pending_deletion(db, row.file_path)
+            if row.file_path:
+                stored_paths.append(row.file_path)
+
+        # Leave tombstones for delta-sync clients
+        add_tombstone(db, "video", video)
         for flashcard in video.flashcards:
-            if flashcard.file_path:
-                if flashcard.file_path.startswith("s3://"):
-                    delete_from_s3(flashcard.file_path)
-                elif os.path.exists(flashcard.file_path):
-                    try:
-                        os.remove(flashcard.file_path)
-                        print(f"Deleted flashcard file: {flashcard.file_path}")
-                    except Exception as e:
-                        print(f"Error deleting flashcard file {flashcard.file_path}: {e}")
-
+            add_tombstone(db, "flashcard", flashcard)
         for quiz in video.quizzes:
-            if quiz.file_path:
-                if quiz.file_path.startswith("s3://"):
-                    delete_from_s3(quiz.file_path)
-                elif os.path.exists(quiz.file_path):
-                    try:
-                        os.remove(quiz.file_path)
-                        print(f"Deleted quiz file: {quiz.file_path}")
-                    except Exception as e:
-                        print(f"Error deleting quiz file {quiz.file_path}: {e}")
-
+            add_tombstone(db, "quiz", quiz)
         for transcript in video.transcripts:
-            if transcript.file_path:
-                if transcript.file_path.startswith("s3://"):
-                    delete_from_s3(transcript.file_path)
-                elif os.path.exists(transcript.file_path):
-                    try:
-                        os.remove(transcript.file_path)
-                        print(f"Deleted transcript file: {transcript.file_path}")
-                    except Exception as e:
-                        print(f"Error deleting transcript file {transcript.file_path}: {e}")
+            add_tombstone(db, "transcript", transcript)
+        prune_tombstones(db, user.id)
+
+        # Stop pending work (e.g. speculative pre-generation) for this video
+        cancel_video_jobs(db, video.id)
 
         # Delete from database
         db.delete(video)
         db.commit()
+
+        if REAP_AFTER_DELETE and stored_paths:
+            background_tasks.add_task(reap_pending_deletions, paths=stored_paths)
         
         return {"message": "Video deleted successfully"}
     except HTTPException as he:
@@ -436,171 +861,82 @@ async def delete_video(video_id: int, user_id: str = "anonymous", db: Session =
 @app.post("/translate")
 async def translate_video(request: TranslateRequest, db: Session = Depends(get_db)):
     try:
-        # Find user by email
-        user = db.query(User).filter(User.email == request.user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Get video from DB
-        video = db.query(Video).filter(Video.id == request.video_id, Video.user_id == user.id).first()
-        if not video:
-            raise HTTPException(status_code=404, detail="Video not found")
-        
-        # Get original transcript from database (earliest transcript for this video)
-        original_transcript = db.query(Transcript).filter(
-            Transcript.video_id == video.id
-        ).order_by(Transcript.created_at).first()
-        
-        if not original_transcript:
-            raise HTTPException(status_code=404, detail="Original transcript not found in database")
-        
-        transcript_path = original_transcript.file_path
-        # Perform translation
-        # Handle S3 paths
-        if transcript_path.startswith("s3://"):
-            # Create a temporary local file
-            content = read_file_content(transcript_path)
-            
-            # Create temp directory in /tmp
-            temp_dir = "/tmp/downloads/temp"
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            filename = os.path.basename(transcript_path)
-            temp_input_path = os.path.join(temp_dir, filename)
-            
-            with open(temp_input_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-                
-            # Translate using local temp file
-            translator = Translator()
-            # This returns a local path in the same directory as input
-            temp_output_path = translator.translate_transcript(temp_input_path, request.target_language)
-            
-            # Upload result to S3
-            if USE_S3:
-                output_filename = os.path.basename(temp_output_path)
-                s3_key = f"transcripts/{user.email}/{output_filename}"
-                translated_path = upload_to_s3(temp_output_path, s3_key)
-                
-                # Cleanup temp files
-                if os.path.exists(temp_input_path):
-                    os.remove(temp_input_path)
-                if os.path.exists(temp_output_path):
-                    os.remove(temp_output_path)
-            else:
-                # Should not happen if input was S3, but just in case
-                translated_path = temp_output_path
-                
-        else:
-            # Local file path
-            if not os.path.exists(transcript_path):
-                raise HTTPException(status_code=404, detail=f"Transcript file not found at {transcript_path}")
-                
-            translator = Translator()
-            translated_path = translator.translate_transcript(transcript_path, request.target_language)
-            
-            # If S3 is enabled but input was local (legacy?), upload result
-            if USE_S3:
-                output_filename = os.path.basename(translated_path)
-                s3_key = f"transcripts/{user.email}/{output_filename}"
-                s3_path = upload_to_s3(translated_path, s3_key)
-                
-                # Cleanup local file
-                if os.path.exists(translated_path):
-                    os.remove(translated_path)
-                
-                translated_path = s3_path
-        
-        # Save translated transcript to database
-        # Check if translation already exists
-        existing_transcript = db.query(Transcript).filter(
-            Transcript.video_id == video.id,
-            Transcript.language == request.target_language
-        ).first()
-        
-        if not existing_transcript:
-            db_transcript = Transcript(
-                video_id=video.id,
-                user_id=user.id,
-                language=request.target_language,
-                file_path=translated_path
-            )
-            db.add(db_transcript)
-            db.commit()
-        else:
-            # Update existing path
-            existing_transcript.file_path = translated_path
-            db.commit()
-        
-        return {
-            "message": "Translation successful",
-            "original_transcript": transcript_path,
-            "translated_transcript": translated_path,
-            "language": request.target_language
-        }
-        
+        user, video = find_user_video(db, request.user_id, request.video_id)
+        return await run_io(translate_transcript_for_video, db, user, video, request.target_language)
+
+    except NotFoundError as nf:
+        raise HTTPException(status_code=404, detail=str(nf))
     except Exception as e:
         print(f"Translation error: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/translate/stream")
+async def stream_translate_video(request: TranslateRequest):
+    """
+    Streaming variant of /translate: Server-Sent Events with one `text` event per
+    translated piece of the transcript as soon as it is ready, then `done` once
+    the whole translation has been stored.
+    """
+    # Only needed to read the source: not Depends(get_db), whose session would
+    # stay checked out until the stream ends
+    db = SessionLocal()
+    try:
+        user, video = find_user_video(db, request.user_id, request.video_id)
+        pieces = await run_io(stream_translation_for_video, db, user, video, request.target_language)
+
+    except NotFoundError as nf:
+        raise HTTPException(status_code=404, detail=str(nf))
+    except Exception as e:
+        print(f"Translation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        db.close()
+
+    return generation_sse_response(pieces, "text")
+
 @app.post("/flashcards/generate")
 async def generate_flashcards(request: GenerateFlashcardsRequest, db: Session = Depends(get_db)):
     try:
-        # Find user by email
-        user = db.query(User).filter(User.email == request.user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Get video from DB
-        video = db.query(Video).filter(Video.id == request.video_id, Video.user_id == user.id).first()
-        if not video:
-            raise HTTPException(status_code=404, detail="Video not found")
-            
-        # Get transcript (prefer requested language, fallback to original)
-        transcript = db.query(Transcript).filter(
-            Transcript.video_id == video.id,
-            Transcript.language == request.language
-        ).first()
-        
-        if not transcript:
-            # Fallback to any transcript if specific language not found
-            # Ideally we should translate first, but for now let's just use what we have
-            # or maybe we should error out? The user flow implies they selected a language.
-            # Let's try to find the original one.
-             transcript = db.query(Transcript).filter(
-                Transcript.video_id == video.id
-            ).order_by(Transcript.created_at).first()
-             
-        if not transcript:
-             raise HTTPException(status_code=404, detail="No transcript found for this video")
+        user, video = find_user_video(db, request.user_id, request.video_id)
 
-        transcript_path = transcript.file_path
-        
-        # Read content using helper that handles S3 or local
-        try:
-            transcript_text = read_file_content(transcript_path)
-        except Exception as e:
-            raise HTTPException(status_code=404, detail=f"Could not read transcript file: {e}")
+        # Runs off the event loop so identical concurrent requests can coalesce
+        # onto one LLM call
+        return await asyncio.to_thread(generate_flashcards_for_video, db, video, request.language, request.regenerate)
 
-        # Generate flashcards
-        generator = FlashcardGenerator()
-        flashcards = generator.generate_flashcards(transcript_text, request.language)
-        
-        # Save to database (optional, but good for caching)
-        # For now, just return them
-        
-        return {"flashcards": [fc.dict() for fc in flashcards]}
+    except NotFoundError as nf:
+        raise HTTPException(status_code=404, detail=str(nf))
+    except Exception as e:
+        print(f"Flashcard generation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/flashcards/generate/stream")
+async def stream_generate_flashcards(request: GenerateFlashcardsRequest):
+    """
+    Streaming variant of /flashcards/generate: Server-Sent Events with one
+    `flashcard` event per card as soon as the model completes it, then `done`.
+    """
+    # Only needed to find the transcript: not Depends(get_db), whose session would
+    # stay checked out until the stream ends (the generation cache opens its own)
+    db = SessionLocal()
+    try:
+        user, video = find_user_video(db, request.user_id, request.video_id)
+        transcript_text = await run_io(find_flashcard_transcript, db, video, request.language)
+        items = stream_flashcards(transcript_text, request.language, request.regenerate)
 
-    except ValueError as ve:
-        raise HTTPException(status_code=500, detail=str(ve))
+    except NotFoundError as nf:
+        raise HTTPException(status_code=404, detail=str(nf))
     except Exception as e:
         print(f"Flashcard generation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        db.close()
+
+    return generation_sse_response(items, "flashcard")
 
 @app.get("/flashcards/{flashcard_id}/content")
-async def get_flashcard_content(flashcard_id: int, user_id: str = "anonymous", db: Session = Depends(get_db)):
+async def get_flashcard_content(flashcard_id: int, user_id: str = "anonymous", delivery: Optional[str] = None, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
     try:
         # Find user
         user = db.query(User).filter(User.email == user_id).first()
@@ -612,10 +948,21 @@ async def get_flashcard_content(flashcard_id: int, user_id: str = "anonymous", d
         if not flashcard:
             raise HTTPException(status_code=404, detail="Flashcard set not found")
 
-        # Read file content
-        content = json.loads(read_file_content(flashcard.file_path))
+        # Unchanged since the client's copy: skip reading the file entirely
+        version = artifact_version(flashcard)
+        etag = artifact_etag(artifact_location(flashcard), version)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        # Presigned mode: the client fetches the bytes from S3 itself
+        presigned = await run_io(artifact_delivery_response, flashcard, delivery, "application/json")
+        if presigned is not None:
+            return presigned
 
-        return {"flashcards": content}
+        # Read content (straight from the row when stored inline)
+        content = await run_io(read_artifact_row, flashcard)
+
+        return JSONResponse({"flashcards": content}, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
 
     except HTTPException as he:
         raise he
@@ -628,120 +975,54 @@ async def get_flashcard_content(flashcard_id: int, user_id: str = "anonymous", d
 @app.post("/quiz/generate")
 async def generate_quiz(request: GenerateQuizRequest, db: Session = Depends(get_db)):
     try:
-        # Find user
-        user = db.query(User).filter(User.email == request.user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Find video
-        video = db.query(Video).filter(Video.id == request.video_id, Video.user_id == user.id).first()
-        if not video:
-            raise HTTPException(status_code=404, detail="Video not found")
+        user, video = find_user_video(db, request.user_id, request.video_id)
 
-        # Get transcript for the specified language
-        transcript = db.query(Transcript).filter(
-            Transcript.video_id == request.video_id,
-            Transcript.language == request.language
-        ).first()
-
-        if not transcript:
-            raise HTTPException(status_code=404, detail=f"No transcript found for language: {request.language}")
+        # Runs off the event loop so identical concurrent requests can coalesce
+        # onto one LLM call
+        return await asyncio.to_thread(generate_quiz_for_video, db, video, request.language, request.regenerate)
 
-        # Read transcript content
-        try:
-            transcript_text = read_file_content(transcript.file_path)
-        except Exception as e:
-            raise HTTPException(status_code=404, detail=f"Could not read transcript file: {e}")
-
-        # Generate quiz using QuizGenerator
-        generator = QuizGenerator()
-        questions = generator.generate_quiz(transcript_text, request.language)
-
-        # Convert to dict format
-        quiz_data = [
-            {
-                "question": q.question,
-                "options": q.options,
-                "correct_answer": q.correct_answer
-            }
-            for q in questions
-        ]
+    except NotFoundError as nf:
+        raise HTTPException(status_code=404, detail=str(nf))
+    except Exception as e:
+        print(f"Quiz generation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return {"quiz": quiz_data}
+@app.post("/quiz/generate/stream")
+async def stream_generate_quiz(request: GenerateQuizRequest):
+    """
+    Streaming variant of /quiz/generate: Server-Sent Events with one `question`
+    event per quiz question as soon as the model completes it, then `done`.
+    """
+    # Only needed to find the transcript: not Depends(get_db), whose session would
+    # stay checked out until the stream ends (the generation cache opens its own)
+    db = SessionLocal()
+    try:
+        user, video = find_user_video(db, request.user_id, request.video_id)
+        transcript_text = await run_io(find_quiz_transcript, db, video, request.language)
+        items = stream_quiz(transcript_text, request.language, request.regenerate)
 
-    except HTTPException as he:
-        raise he
+    except NotFoundError as nf:
+        raise HTTPException(status_code=404, detail=str(nf))
     except Exception as e:
         print(f"Quiz generation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        db.close()
+
+    return generation_sse_response(items, "question")
 
 @app.post("/quiz/save")
 async def save_quiz(request: SaveQuizRequest, db: Session = Depends(get_db)):
     try:
-        # 1. Save to File System
-        # In Lambda, we must use /tmp
-        base_dir = "/tmp/downloads"
-        quiz_dir = os.path.join(base_dir, "quizzes", str(request.user_id), str(request.video_id))
-        os.makedirs(quiz_dir, exist_ok=True)
-
-        filename = f"quiz_{request.language}.json"
-        file_path = os.path.join(quiz_dir, filename)
-
-        # Save to JSON file
-        with open(file_path, "w", encoding='utf-8') as f:
-            json.dump(request.quiz, f, ensure_ascii=False, indent=2)
-
-        # Upload to S3 if enabled
-        if USE_S3:
-            s3_key = f"quizzes/{request.user_id}/{request.video_id}/{filename}"
-            stored_path = upload_to_s3(file_path, s3_key)
-            # Optional: Delete local file after upload
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        else:
-            stored_path = file_path
-
-        # 2. Save to Database
-        # Find user
-        user = db.query(User).filter(User.email == request.user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        user, video = find_user_video(db, request.user_id, request.video_id)
 
-        # Find video
-        video = db.query(Video).filter(Video.id == request.video_id, Video.user_id == user.id).first()
-        if not video:
-             raise HTTPException(status_code=404, detail="Video not found")
-
-        # Check if quiz already exists for this video/language
-        existing_quiz = db.query(Quiz).filter(
-            Quiz.video_id == video.id,
-            Quiz.language == request.language
-        ).first()
-
-        if existing_quiz:
-            # Update existing
-            existing_quiz.file_path = stored_path
-            existing_quiz.created_at = datetime.datetime.utcnow()
-            db.commit()
-            db.refresh(existing_quiz)
-            print(f"Updated existing quiz for video {video.id} lang {request.language}")
-        else:
-            # Create new
-            new_quiz = Quiz(
-                video_id=video.id,
-                user_id=user.id,
-                language=request.language,
-                file_path=stored_path
-            )
-            db.add(new_quiz)
-            db.commit()
-            db.refresh(new_quiz)
-            print(f"Created new quiz for video {video.id}")
+        # Write the JSON file (S3 or local) and create or update the quiz
+        stored_path = await run_io(save_artifact, db, user, video, "quiz", request.language, request.quiz)
 
         return {"message": "Quiz saved successfully", "file_path": stored_path}
 
-    except HTTPException as he:
-        raise he
+    except NotFoundError as nf:
+        raise HTTPException(status_code=404, detail=str(nf))
     except Exception as e:
         print(f"Error saving quiz: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -780,7 +1061,7 @@ async def get_video_quizzes(video_id: int, user_id: str = "anonymous", db: Sessi
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/quiz/{quiz_id}/content")
-async def get_quiz_content(quiz_id: int, user_id: str = "anonymous", db: Session = Depends(get_db)):
+async def get_quiz_content(quiz_id: int, user_id: str = "anonymous", delivery: Optional[str] = None, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
     try:
         # Find user
         user = db.query(User).filter(User.email == user_id).first()
@@ -792,10 +1073,21 @@ async def get_quiz_content(quiz_id: int, user_id: str = "anonymous", db: Session
         if not quiz:
             raise HTTPException(status_code=404, detail="Quiz not found")
 
-        # Read file content
-        content = json.loads(read_file_content(quiz.file_path))
+        # Unchanged since the client's copy: skip reading the file entirely
+        version = artifact_version(quiz)
+        etag = artifact_etag(artifact_location(quiz), version)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        # Presigned mode: the client fetches the bytes from S3 itself
+        presigned = await run_io(artifact_delivery_response, quiz, delivery, "application/json")
+        if presigned is not None:
+            return presigned
 
-        return {"quiz": content}
+        # Read content (straight from the row when stored inline)
+        content = await run_io(read_artifact_row, quiz)
+
+        return JSONResponse({"quiz": content}, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
 
     except HTTPException as he:
         raise he
@@ -805,7 +1097,7 @@ async def get_quiz_content(quiz_id: int, user_id: str = "anonymous", db: Session
 
 
 @app.delete("/flashcards/{flashcard_id}")
-async def delete_flashcard(flashcard_id: int, user_id: str = "anonymous", db: Session = Depends(get_db)):
+async def delete_flashcard(flashcard_id: int, background_tasks: BackgroundTasks, user_id: str = "anonymous", db: Session = Depends(get_db)):
     """Delete a saved flashcard set."""
     try:
         # Find user
@@ -818,17 +1110,17 @@ async def delete_flashcard(flashcard_id: int, user_id: str = "anonymous", db: Se
         if not flashcard:
             raise HTTPException(status_code=404, detail="Flashcard set not found")
 
-        # Delete file if exists
-        if flashcard.file_path:
-            if flashcard.file_path.startswith("s3://"):
-                delete_from_s3(flashcard.file_path)
-            elif os.path.exists(flashcard.file_path):
-                os.remove(flashcard.file_path)
-                print(f"Deleted flashcard file: {flashcard.file_path}")
+        # The stored file is removed by the reaper after the response
+        stored_path = flashcard.file_path
+        invalidate_artifact(stored_path)
+        add_pending_deletion(db, stored_path)
 
         # Delete from database
+        add_tombstone(db, "flashcard", flashcard)
         db.delete(flashcard)
         db.commit()
+        if REAP_AFTER_DELETE and stored_path:
+            background_tasks.add_task(reap_pending_deletions, paths=[stored_path])
         print(f"Deleted flashcard record with id: {flashcard_id}")
 
         return {"message": "Flashcard set deleted successfully"}
@@ -840,7 +1132,7 @@ async def delete_flashcard(flashcard_id: int, user_id: str = "anonymous", db: Se
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/quiz/{quiz_id}")
-async def delete_quiz(quiz_id: int, user_id: str = "anonymous", db: Session = Depends(get_db)):
+async def delete_quiz(quiz_id: int, background_tasks: BackgroundTasks, user_id: str = "anonymous", db: Session = Depends(get_db)):
     """Delete a saved quiz."""
     try:
         # Find user
@@ -853,17 +1145,17 @@ async def delete_quiz(quiz_id: int, user_id: str = "anonymous", db: Session = De
         if not quiz:
             raise HTTPException(status_code=404, detail="Quiz not found")
 
-        # Delete file if exists
-        if quiz.file_path:
-            if quiz.file_path.startswith("s3://"):
-                delete_from_s3(quiz.file_path)
-            elif os.path.exists(quiz.file_path):
-                os.remove(quiz.file_path)
-                print(f"Deleted quiz file: {quiz.file_path}")
+        # The stored file is removed by the reaper after the response
+        stored_path = quiz.file_path
+        invalidate_artifact(stored_path)
+        add_pending_deletion(db, stored_path)
 
         # Delete from database
+        add_tombstone(db, "quiz", quiz)
         db.delete(quiz)
         db.commit()
+        if REAP_AFTER_DELETE and stored_path:
+            background_tasks.add_task(reap_pending_deletions, paths=[stored_path])
         print(f"Deleted quiz record with id: {quiz_id}")
 
         return {"message": "Quiz deleted successfully"}
@@ -874,6 +1166,146 @@ async def delete_quiz(quiz_id: int, user_id: str = "anonymous", db: Session = De
         print(f"Error deleting quiz: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/translate/batch")
+async def translate_video_batch(request: TranslateBatchRequest, db: Session = Depends(get_db)):
+    """
+    Translate a video's transcript into several languages in one request.
+    The source is loaded and segmented once; languages are translated concurrently.
+    """
+    try:
+        if not request.target_languages:
+            raise HTTPException(status_code=400, detail="target_languages must not be empty")
+        if len(request.target_languages) > TRANSLATION_MAX_TARGET_LANGUAGES:
+            raise HTTPException(status_code=400, detail=f"At most {TRANSLATION_MAX_TARGET_LANGUAGES} target languages per request")
+
+        user, video = find_user_video(db, request.user_id, request.video_id)
+        return await run_io(translate_transcript_for_video_multi, db, user, video, request.target_languages)
+
+    except NotFoundError as nf:
+        raise HTTPException(status_code=404, detail=str(nf))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        print(f"Translation error: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ==================== JOB ENDPOINTS ====================
+
+@app.post("/jobs")
+async def create_job(request: JobRequest, db: Session = Depends(get_db)):
+    """
+    Submit translation or generation work to run outside the request.
+    Returns a job id right away; results come from GET /jobs/{id} or its event stream.
+    """
+    try:
+        if request.job_type not in JOB_HANDLERS:
+            raise HTTPException(status_code=400, detail=f"Unknown job type: {request.job_type}")
+        if request.job_type == "translate" and not (request.params.get("target_language") or request.params.get("target_languages")):
+            raise HTTPException(status_code=400, detail="params.target_language or params.target_languages is required")
+        if len(request.params.get("target_languages") or []) > TRANSLATION_MAX_TARGET_LANGUAGES:
+            raise HTTPException(status_code=400, detail=f"At most {TRANSLATION_MAX_TARGET_LANGUAGES} target languages per request")
+
+        user, video = find_user_video(db, request.user_id, request.video_id)
+        job = submit_job(db, user, request.job_type, request.params, video_id=video.id)
+
+        return {"job_id": job.id, "status": job.status}
+
+    except NotFoundError as nf:
+        raise HTTPException(status_code=404, detail=str(nf))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        print(f"Error submitting job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def find_user_job(db, job_id, user_id):
+    user = db.query(User).filter(User.email == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    job = db.query(Job).filter(Job.id == job_id, Job.user_id == user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, user_id: str = "anonymous", db: Session = Depends(get_db)):
+    """Poll a job's status and, once completed, its result."""
+    try:
+        return job_to_dict(find_user_job(db, job_id, user_id))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, user_id: str = "anonymous"):
+    """Server-Sent Events stream of a job's status, ending with its result or error."""
+    # Not Depends(get_db): that session would stay checked out until the stream ends
+    db = SessionLocal()
+    try:
+        # Subscribe before reading the current state so no transition is missed
+        subscription = await asyncio.to_thread(get_event_bus().subscribe, job_channel(job_id))
+        try:
+            current = json.loads(json.dumps(job_to_dict(find_user_job(db, job_id, user_id)), default=str))
+        except Exception:
+            subscription.close()
+            raise
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        db.close()
+
+    return sse_response(subscription, current, lambda event: event["status"] in TERMINAL_JOB_STATUSES)
+
+@app.delete("/jobs/{job_id}")
+async def delete_job(job_id: str, user_id: str = "anonymous", db: Session = Depends(get_db)):
+    """Cancel a job that has not started running yet."""
+    try:
+        job = find_user_job(db, job_id, user_id)
+        if not cancel_job(db, job):
+            raise HTTPException(status_code=409, detail=f"Job is already {job.status}")
+        return {"message": "Job cancelled"}
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics/translation")
+async def get_translation_metrics():
+    """Translation memory size and hit rate of this process"""
+    try:
+        return {"memory": await asyncio.to_thread(translation_memory.stats)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/metrics/storage")
+async def get_storage_metrics():
+    """Size and hit rate of this process's artifact content cache and S3 disk cache"""
+    return {"artifact_cache": artifact_cache.stats(), "disk_cache": disk_cache_stats()}
+
+@app.get("/metrics/llm")
+async def get_llm_metrics():
+    """
+    LLM metrics of this process: token usage and prompt-cache hits/misses per
+    generator, request, retry and rate-limit queueing stats of the shared client,
+    and transcript compression totals
+    """
+    try:
+        client_metrics = get_llm_client().metrics()
+    except ValueError:
+        # No API key configured
+        client_metrics = None
+    return {
+        "usage": usage_stats.snapshot(),
+        "client": client_metrics,
+        "compression": compression_stats.snapshot()
+    }
@@ -0,0 +1,86 @@
+"""
+Move existing small flashcard sets and quizzes from files into their DB rows.
+
+Usage:
+    python migrate_artifacts_inline.py --dry-run
+    python migrate_artifacts_inline.py --batch-size 200
+
+Every Flashcard/Quiz row still pointing at a file (S3 or local) is read, and
+if its compressed JSON fits ARTIFACT_INLINE_MAX_BYTES it is stored in the row;
+the old file is handed to the deletion reaper. Larger sets stay where they are.
+Safe to re-run: rows already stored inline are skipped.
+"""
+import os
+import sys
+import argparse
+# Load environment variables via config module (supports .env and AWS SSM)
+import src.config
+
+# Add the src directory to the python path (same module names as main.py)
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from database import SessionLocal, Flashcard, Quiz, add_pending_deletion, init_db
+from cache import read_artifact, artifact_version, invalidate_artifact, encode_inline_payload, ARTIFACT_INLINE_MAX_BYTES
+
+
+def migrate_model(db, model, batch_size, dry_run):
+    """Returns (moved, kept, failed) for one model"""
+    moved = kept = failed = 0
+    last_id = 0
+    while True:
+        rows = db.query(model).filter(
+            model.payload.is_(None),
+            model.file_path.isnot(None),
+            model.id > last_id
+        ).order_by(model.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        for row in rows:
+            last_id = row.id
+            try:
+                items = read_artifact(row.file_path, artifact_version(row), parse_json=True)
+            except Exception as e:
+                print(f"Could not read {model.__tablename__} {row.id} ({row.file_path}): {e}")
+                failed += 1
+                continue
+
+            payload = encode_inline_payload(items)
+            if len(payload) > ARTIFACT_INLINE_MAX_BYTES:
+                kept += 1
+                continue
+
+            moved += 1
+            if dry_run:
+                continue
+            invalidate_artifact(row.file_path)
+            add_pending_deletion(db, row.file_path)
+            # updated_at changes, so clients holding the old ETag refetch once
+            row.file_path = None
+            row.codec = None
+            row.payload = payload
+
+        if not dry_run:
+            db.commit()
+        print(f"{model.__tablename__}: {moved} moved inline, {kept} kept as files, {failed} failed so far")
+    return moved, kept, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Store small flashcard sets and quizzes inline in the database")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would move")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        failed = 0
+        for model in (Flashcard, Quiz):
+            _, _, model_failed = migrate_model(db, model, args.batch_size, args.dry_run)
+            failed += model_failed
+        return 1 if failed else 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
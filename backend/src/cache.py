@@ -0,0 +1,155 @@
+import os
+import json
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+
+from storage import read_text, map_io
+
+# Upper bound for the in-process artifact content cache (bytes of raw content)
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Flashcard sets / quizzes whose compressed JSON is at most this size are stored in
+# their DB row instead of a file (must stay below the 64 KB of a MySQL BLOB)
+ARTIFACT_INLINE_MAX_BYTES = min(int(os.getenv("ARTIFACT_INLINE_MAX_BYTES", "16384")), 65535)
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by the total size of its values.
+    Keys are tuples whose first element is the artifact path, so every cached
+    version of a path can be invalidated at once.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._keys_by_path = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, size):
+        # Values larger than the whole cache would just evict everything else
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size)
+            self._keys_by_path.setdefault(key[0], set()).add(key)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate(self, path):
+        """Drop every cached version of a path"""
+        with self._lock:
+            for key in list(self._keys_by_path.get(path, ())):
+                self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _remove(self, key):
+        _, size = self._entries.pop(key)
+        self._size -= size
+        keys = self._keys_by_path.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_path[key[0]]
+
+
+artifact_cache = LRUCache(ARTIFACT_CACHE_MAX_BYTES)
+
+def artifact_version(row):
+    """Version of a Transcript/Flashcard/Quiz row; changes whenever the row is updated"""
+    timestamp = row.updated_at or row.created_at
+    return timestamp.isoformat() if timestamp else ""
+
+def encode_inline_payload(items):
+    """Compact, zlib-compressed JSON for the payload column"""
+    return zlib.compress(json.dumps(items, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+def decode_inline_payload(payload):
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+def artifact_location(row):
+    """Where a Flashcard/Quiz row's content lives: its file path, or a db:// name when inline"""
+    return row.file_path or f"db://{row.__tablename__}/{row.id}"
+
+def read_artifact_row(row):
+    """Parsed JSON content of a Flashcard/Quiz row, from the row itself when stored inline"""
+    if row.payload is not None:
+        return decode_inline_payload(row.payload)
+    return read_artifact(row.file_path, artifact_version(row), parse_json=True)
+
+def artifact_etag(file_path, version):
+    """Strong ETag derived from the DB row, so it can be checked without reading the file"""
+    digest = hashlib.sha1(f"{file_path}|{version}".encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+def etag_matches(if_none_match, etag):
+    """Evaluate an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def read_artifact(file_path, version, parse_json=False):
+    """
+    Read artifact content (from whichever storage backend holds it) through the LRU cache.
+    Parsed JSON is cached as-is; callers must treat the returned value as read-only.
+    """
+    key = (file_path, version, parse_json)
+    cached = artifact_cache.get(key)
+    if cached is not None:
+        return cached
+
+    content = read_text(file_path)
+    value = json.loads(content) if parse_json else content
+    artifact_cache.set(key, value, len(content.encode("utf-8")))
+    return value
+
+def prefetch_artifacts(rows):
+    """
+    Download the content of many Transcript rows concurrently into the cache, so a
+    following sequential pass over them reads from memory. Failures are left for
+    that pass to report.
+    """
+    entries = list(dict.fromkeys((row.file_path, artifact_version(row)) for row in rows if row.file_path))
+
+    def fetch(entry):
+        try:
+            read_artifact(*entry)
+        except Exception as e:
+            print(f"Could not prefetch {entry[0]}: {e}")
+
+    map_io(fetch, entries)
+
+def invalidate_artifact(file_path):
+    """Forget cached content for a path after it is rewritten or deleted"""
+    if file_path:
+        artifact_cache.invalidate(file_path)
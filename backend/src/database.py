@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text, Index, LargeBinary
+from sqlalchemy.dialects import mysql
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 import datetime
@@ -23,12 +24,19 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Microsecond precision on MySQL: updated_at versions artifacts (ETags) and sync
+# watermarks, so two updates within the same second must still differ
+PreciseDateTime = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
+# TEXT is capped at 64 KB on MySQL; generated/cached payloads can be larger
+LongText = Text().with_variant(mysql.MEDIUMTEXT(), "mysql")
+
 class User(Base):
     __tablename__ = "users"
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(PreciseDateTime, default=datetime.datetime.utcnow)
     
     # Relationships
     videos = relationship("Video", back_populates="user", cascade="all, delete-orphan")
@@ -38,13 +46,15 @@ class User(Base):
 
 class Video(Base):
     __tablename__ = "videos"
+    __table_args__ = (Index("ix_videos_user_id_updated_at", "user_id", "updated_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     title = Column(String(255), nullable=False)
     url = Column(String(500), nullable=False)
     status = Column(String(20), default='processing')  # 'processing', 'completed', 'failed'
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(PreciseDateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(PreciseDateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="videos")
@@ -54,13 +64,16 @@ class Video(Base):
 
 class Transcript(Base):
     __tablename__ = "transcripts"
+    __table_args__ = (Index("ix_transcripts_user_id_updated_at", "user_id", "updated_at"),)
     
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(Integer, ForeignKey("videos.id"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     language = Column(String(10), default='en')  # ISO language code
     file_path = Column(String(500), nullable=False)  # S3 path or local path
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    codec = Column(String(16), nullable=True)  # compression of the stored file; NULL if not recorded
+    created_at = Column(PreciseDateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(PreciseDateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="transcripts")
@@ -68,13 +81,17 @@ class Transcript(Base):
 
 class Flashcard(Base):
     __tablename__ = "flashcards"
+    __table_args__ = (Index("ix_flashcards_user_id_updated_at", "user_id", "updated_at"),)
     
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(Integer, ForeignKey("videos.id"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     language = Column(String(10), default='en')
-    file_path = Column(String(500), nullable=False)  # S3 path or local path
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    file_path = Column(String(500), nullable=True)  # S3 path or local path; NULL when stored inline
+    codec = Column(String(16), nullable=True)  # compression of the stored file; NULL when inline or not recorded
+    payload = Column(LargeBinary, nullable=True)  # zlib-compressed JSON of small sets (see cache.py)
+    created_at = Column(PreciseDateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(PreciseDateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="flashcards")
@@ -82,18 +99,120 @@ class Flashcard(Base):
 
 class Quiz(Base):
     __tablename__ = "quizzes"
+    __table_args__ = (Index("ix_quizzes_user_id_updated_at", "user_id", "updated_at"),)
     
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(Integer, ForeignKey("videos.id"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     language = Column(String(10), default='en')
-    file_path = Column(String(500), nullable=False)  # S3 path or local path
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    file_path = Column(String(500), nullable=True)  # S3 path or local path; NULL when stored inline
+    codec = Column(String(16), nullable=True)  # compression of the stored file; NULL when inline or not recorded
+    payload = Column(LargeBinary, nullable=True)  # zlib-compressed JSON of small sets (see cache.py)
+    created_at = Column(PreciseDateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(PreciseDateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="quizzes")
     video = relationship("Video", back_populates="quizzes")
 
+class Tombstone(Base):
+    """Marker left behind when a row is deleted, so delta-sync clients can drop it"""
+    __tablename__ = "tombstones"
+    __table_args__ = (Index("ix_tombstones_user_id_deleted_at", "user_id", "deleted_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entity = Column(String(20), nullable=False)  # 'video', 'transcript', 'flashcard', 'quiz'
+    entity_id = Column(Integer, nullable=False)
+    video_id = Column(Integer, nullable=True)
+    deleted_at = Column(PreciseDateTime, default=datetime.datetime.utcnow)
+
+# Tombstones older than this are pruned; clients syncing from before it get a full snapshot
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+
+def add_tombstone(db, entity, row):
+    """Record the deletion of a Video/Transcript/Flashcard/Quiz row (caller commits)"""
+    db.add(Tombstone(
+        user_id=row.user_id,
+        entity=entity,
+        entity_id=row.id,
+        video_id=row.id if entity == "video" else row.video_id
+    ))
+
+def prune_tombstones(db, user_id):
+    """Drop tombstones that fell out of the retention window for a user"""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    db.query(Tombstone).filter(
+        Tombstone.user_id == user_id,
+        Tombstone.deleted_at < cutoff
+    ).delete(synchronize_session=False)
+
+class PendingDeletion(Base):
+    """Stored artifact (S3 object or local file) of a deleted row, waiting for the reaper"""
+    __tablename__ = "pending_deletions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_path = Column(String(1024), nullable=False)
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(PreciseDateTime, default=datetime.datetime.utcnow)
+    next_attempt_at = Column(PreciseDateTime, default=datetime.datetime.utcnow, index=True)
+
+def add_pending_deletion(db, file_path):
+    """Schedule a stored artifact for deletion by the reaper (caller commits)"""
+    if file_path:
+        db.add(PendingDeletion(file_path=file_path))
+
+class GenerationCache(Base):
+    """Generated flashcards/quizzes keyed by transcript hash, language, prompt version and model"""
+    __tablename__ = "generation_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)
+    kind = Column(String(20), nullable=False)  # 'flashcards', 'quiz'
+    language = Column(String(10), nullable=False)
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    status = Column(String(20), default='pending')  # 'pending', 'ready', 'regenerating' (old payload still served)
+    payload = Column(LongText, nullable=True)  # JSON list of generated items
+    created_at = Column(PreciseDateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(PreciseDateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class TranslationMemoryEntry(Base):
+    """Translated transcript segment, keyed by normalized source hash, languages and backend"""
+    __tablename__ = "translation_memory"
+
+    id = Column(Integer, primary_key=True, index=True)
+    segment_hash = Column(String(64), nullable=False)
+    source_language = Column(String(10), nullable=False)  # 'auto' when detected by the backend
+    target_language = Column(String(10), nullable=False)
+    backend = Column(String(30), nullable=False)
+    translation = Column(LongText, nullable=False)
+    hits = Column(Integer, default=0)
+    created_at = Column(PreciseDateTime, default=datetime.datetime.utcnow)
+    last_used_at = Column(PreciseDateTime, default=datetime.datetime.utcnow, index=True)  # eviction order
+
+    __table_args__ = (
+        Index("ux_translation_memory_key", "segment_hash", "source_language", "target_language", "backend", unique=True),
+    )
+
+class Job(Base):
+    """Long-running work (translation, generation) executed outside the request"""
+    __tablename__ = "jobs"
+
+    id = Column(String(36), primary_key=True)  # UUID
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    video_id = Column(Integer, nullable=True, index=True)
+    job_type = Column(String(30), nullable=False)  # 'translate', 'flashcards', 'quiz', 'pregenerate'
+    status = Column(String(20), default='queued')  # 'queued', 'running', 'completed', 'failed', 'cancelled'
+    params = Column(Text, nullable=True)  # JSON
+    result = Column(LongText, nullable=True)  # JSON
+    error = Column(Text, nullable=True)
+    created_at = Column(PreciseDateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(PreciseDateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    started_at = Column(PreciseDateTime, nullable=True)
+    finished_at = Column(PreciseDateTime, nullable=True)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -116,3 +235,53 @@ def init_db():
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
+
+    # Bring tables created by older versions up to date
+    migrate_schema()
+
+def _modify_mysql_column(conn, table, column, existing):
+    """Bring an existing MySQL column in line with the model: nullability and timestamp precision"""
+    from sqlalchemy import text
+
+    quote = engine.dialect.identifier_preparer.quote
+    column_type = column.type.compile(dialect=engine.dialect)
+    # Columns that became optional (e.g. file_path of inline artifacts)
+    became_nullable = column.nullable and not existing["nullable"]
+    # Timestamps created with second precision: versions and sync watermarks need microseconds
+    needs_precision = column_type == "DATETIME(6)" and getattr(existing["type"], "fsp", None) != 6
+    if not (became_nullable or needs_precision):
+        return
+
+    nullable = "NULL" if column.nullable or existing["nullable"] else "NOT NULL"
+    conn.execute(text(f"ALTER TABLE {quote(table.name)} MODIFY {quote(column.name)} {column_type} {nullable}"))
+    print(f"Changed column {table.name}.{column.name} to {column_type} {nullable}")
+
+def migrate_schema():
+    """Add columns and indexes that were introduced after a table was first created"""
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing_columns = {c["name"]: c for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    if engine.dialect.name == "mysql":
+                        _modify_mysql_column(conn, table, column, existing_columns[column.name])
+                    continue
+
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+                print(f"Added column {table.name}.{column.name}")
+
+                # Existing rows have not changed since they were created
+                if column.name == "updated_at" and "created_at" in existing_columns:
+                    conn.execute(text(f"UPDATE {quote(table.name)} SET updated_at = created_at"))
+
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn, checkfirst=False)
+                    print(f"Created index {index.name}")
@@ -0,0 +1,184 @@
+import os
+import json
+import threading
+from abc import ABC, abstractmethod
+
+from generator.llm_client import get_llm_client
+from generator.compression import compress_transcript, compression_enabled, TRANSCRIPT_COMPRESSION_RATIO
+from generator.map_reduce import map_reduce, needs_map_reduce, split_into_chunks, reduce_candidates, MAP_REDUCE_MAX_ITEMS
+
+# Instructions shared by every generator. Together with the transcript they form
+# the prompt prefix cached by the provider, so nothing task- or language-specific
+# may go here: it belongs in the per-task instructions sent as the user message.
+SHARED_SYSTEM_PROMPT = """You are an expert educational content creator. You turn video transcripts into study material such as flashcards and quiz questions that cover the key concepts and important details of the video.
+Always answer with a VALID JSON object and nothing else: no other text, explanations, or markdown formatting."""
+
+
+class UsageStats:
+    """Thread-safe token and prompt-cache counters for LLM calls, per generator kind"""
+
+    FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_kind = {}
+
+    def record(self, kind, usage):
+        values = {field: getattr(usage, field, None) or 0 for field in self.FIELDS}
+        if values["cache_read_input_tokens"]:
+            outcome = "cache_hits"
+        elif values["cache_creation_input_tokens"]:
+            outcome = "cache_misses"
+        else:
+            # Prefix below the provider's minimum cacheable length
+            outcome = "uncached"
+
+        with self._lock:
+            stats = self._by_kind.setdefault(kind, dict.fromkeys(self.FIELDS + ("calls", "cache_hits", "cache_misses", "uncached"), 0))
+            stats["calls"] += 1
+            stats[outcome] += 1
+            for field, value in values.items():
+                stats[field] += value
+
+        print(
+            f"LLM usage ({kind}): {outcome.replace('_', ' ')}, "
+            f"input={values['input_tokens']} cache_read={values['cache_read_input_tokens']} "
+            f"cache_write={values['cache_creation_input_tokens']} output={values['output_tokens']}"
+        )
+
+    def snapshot(self):
+        with self._lock:
+            return {kind: dict(stats) for kind, stats in self._by_kind.items()}
+
+
+usage_stats = UsageStats()
+
+
+class TranscriptGenerator(ABC):
+    """
+    Base class for generators that prompt the model with a transcript.
+
+    Every request is laid out as a cacheable prefix (shared instructions plus
+    the transcript, in the system prompt) followed by the task instructions,
+    so e.g. a quiz generated right after flashcards for the same video reads
+    the transcript from the provider's prompt cache.
+    """
+
+    # Used for usage stats; set by subclasses
+    kind = None
+
+    def __init__(self):
+        self.model = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-5-20250929")
+
+    @property
+    def llm(self):
+        # Shared by all generators: one connection pool and one set of rate limits
+        return get_llm_client()
+
+    @property
+    def generation_version(self):
+        """Prompt version plus anything else that changes the output, for the generation cache"""
+        if compression_enabled():
+            return f"{self.PROMPT_VERSION}+compressed-{TRANSCRIPT_COMPRESSION_RATIO}"
+        return self.PROMPT_VERSION
+
+    def _prepare_transcript(self, transcript_text):
+        """Optionally compress the transcript before it is sent to the model"""
+        if not compression_enabled():
+            return transcript_text
+
+        compressed, stats = compress_transcript(transcript_text)
+        print(
+            f"Transcript compressed for {self.kind}: {stats['original_tokens']} -> "
+            f"{stats['compressed_tokens']} tokens (ratio {stats['ratio']:.2f})"
+        )
+        return compressed
+
+    def _system(self, transcript_text):
+        return [
+            {"type": "text", "text": SHARED_SYSTEM_PROMPT},
+            {
+                "type": "text",
+                "text": f"Transcript:\n{transcript_text}",
+                "cache_control": {"type": "ephemeral"}
+            }
+        ]
+
+    def _request_params(self, transcript_text, instructions):
+        return {
+            "model": self.model,
+            "max_tokens": 4096,
+            "system": self._system(transcript_text),
+            "messages": [
+                {"role": "user", "content": instructions}
+            ]
+        }
+
+    def _complete(self, transcript_text, instructions):
+        """Run the task instructions against the transcript and return the text response"""
+        response = self.llm.create(**self._request_params(transcript_text, instructions))
+        usage_stats.record(self.kind, response.usage)
+        return response.content[0].text.strip()
+
+    def _stream_text(self, transcript_text, instructions):
+        """Like _complete, but yields the response text as it is generated"""
+        with self.llm.stream(**self._request_params(transcript_text, instructions)) as stream:
+            yield from stream.text_stream
+            usage_stats.record(self.kind, stream.get_final_message().usage)
+
+    @abstractmethod
+    def _build_instructions(self, language, part=None):
+        """Task instructions; part is (index, count) when prompting with one chunk of a long transcript"""
+
+    @abstractmethod
+    def _parse_items(self, content):
+        """Items (pydantic models) from the model's text response"""
+
+    @abstractmethod
+    def _item_key(self, item):
+        """Text used to detect duplicate items when merging chunk results"""
+
+    def _generate(self, transcript_text, language):
+        if needs_map_reduce(transcript_text):
+            return map_reduce(
+                transcript_text,
+                lambda chunk, part: self._generate_chunk(chunk, language, part),
+                self._item_key
+            )
+        return self._generate_chunk(transcript_text, language)
+
+    def _generate_chunk(self, transcript_text, language, part=None):
+        return self._parse_items(self._complete(transcript_text, self._build_instructions(language, part)))
+
+    def batch_requests(self, transcript_text, language):
+        """
+        Message params for the batch API: one request for the whole transcript,
+        or one per chunk when it needs map-reduce. Merge the responses with
+        items_from_batch.
+        """
+        transcript_text = self._prepare_transcript(transcript_text)
+        if not needs_map_reduce(transcript_text):
+            return [self._request_params(transcript_text, self._build_instructions(language))]
+
+        chunks = split_into_chunks(transcript_text)
+        return [
+            self._request_params(chunk, self._build_instructions(language, (index, len(chunks))))
+            for index, chunk in enumerate(chunks)
+        ]
+
+    def items_from_batch(self, contents):
+        """Items from the text responses to batch_requests, in request order"""
+        candidates = [self._parse_items(content) for content in contents]
+        if len(candidates) == 1:
+            return candidates[0]
+        return reduce_candidates(candidates, self._item_key, MAP_REDUCE_MAX_ITEMS)
+
+    @staticmethod
+    def _parse_json(content):
+        # Clean up potential markdown code blocks if the model includes them
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+
+        return json.loads(content)
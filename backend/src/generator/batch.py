@@ -0,0 +1,111 @@
+import re
+import json
+import uuid
+
+from generator.base import usage_stats
+from generator.llm_client import get_llm_client
+
+
+def batch_request_id(kind, video_id, language, part):
+    """custom_id of one batch request (letters, digits, '-' and '_' only)"""
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", f"{kind}-{video_id}-{language}-{part}")[:64]
+
+def batch_request_kind(custom_id):
+    return custom_id.split("-", 1)[0]
+
+
+class AnthropicBatchBackend:
+    """
+    Message Batches API: requests are processed asynchronously (usually well
+    within an hour, at most 24h) at batch pricing and outside the interactive
+    rate limits.
+    """
+
+    name = "anthropic"
+
+    def __init__(self):
+        self.client = get_llm_client().client
+
+    def submit(self, requests):
+        """requests: list of (custom_id, kind, params). Returns the batch id."""
+        batch = self.client.messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": params}
+            for custom_id, _, params in requests
+        ])
+        return batch.id
+
+    def status(self, batch_id):
+        """(finished, request counts)"""
+        batch = self.client.messages.batches.retrieve(batch_id)
+        return batch.processing_status == "ended", batch.request_counts.to_dict()
+
+    def results(self, batch_id):
+        """custom_id -> response text, or None for requests that did not succeed"""
+        results = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                message = entry.result.message
+                usage_stats.record(batch_request_kind(entry.custom_id), message.usage)
+                results[entry.custom_id] = message.content[0].text.strip()
+            else:
+                print(f"Batch request {entry.custom_id} {entry.result.type}: {getattr(entry.result, 'error', '')}")
+                results[entry.custom_id] = None
+        return results
+
+
+class LocalBatchBackend:
+    """
+    Offline stand-in for testing bulk generation without the API: answers every
+    request immediately with placeholder items built from transcript sentences,
+    in the same JSON format the model returns.
+    """
+
+    name = "local"
+    ITEMS_PER_REQUEST = 5
+
+    def __init__(self):
+        self._batches = {}
+
+    def submit(self, requests):
+        batch_id = f"local_{uuid.uuid4().hex}"
+        self._batches[batch_id] = {
+            custom_id: self._respond(kind, params)
+            for custom_id, kind, params in requests
+        }
+        return batch_id
+
+    def status(self, batch_id):
+        return True, {"succeeded": len(self._batches[batch_id])}
+
+    def results(self, batch_id):
+        return self._batches.pop(batch_id)
+
+    def _respond(self, kind, params):
+        transcript = params["system"][-1]["text"]
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", transcript) if len(s.split()) >= 4]
+        sentences = sentences[:self.ITEMS_PER_REQUEST]
+
+        if kind == "flashcards":
+            items = [{"front": f"Key point {i + 1}", "back": sentence} for i, sentence in enumerate(sentences)]
+            return json.dumps({"flashcards": items})
+
+        items = [
+            {
+                "question": f"Which statement appears in the video? ({i + 1})",
+                "options": [sentence, "None of these", "All of these", "Not mentioned"],
+                "correct_answer": 0
+            }
+            for i, sentence in enumerate(sentences)
+        ]
+        return json.dumps({"questions": items})
+
+
+BATCH_BACKENDS = {
+    "anthropic": AnthropicBatchBackend,
+    "local": LocalBatchBackend,
+}
+
+def get_batch_backend(name):
+    if name not in BATCH_BACKENDS:
+        raise ValueError(f"Unknown batch backend: {name}")
+    return BATCH_BACKENDS[name]()
@@ -0,0 +1,167 @@
+import os
+import re
+import math
+import threading
+from collections import Counter
+
+from generator.map_reduce import estimate_tokens
+
+# Fraction of the transcript (in estimated tokens) kept before generation;
+# 1 disables compression
+TRANSCRIPT_COMPRESSION_RATIO = float(os.getenv("TRANSCRIPT_COMPRESSION_RATIO", "1"))
+# Transcripts shorter than this are sent as-is
+TRANSCRIPT_COMPRESSION_MIN_TOKENS = int(os.getenv("TRANSCRIPT_COMPRESSION_MIN_TOKENS", "1500"))
+
+# Hesitations Whisper transcribes verbatim
+FILLER_PATTERN = re.compile(r"\b(?:u+m+|u+h+|e+r+m+|h+m+|mm+)\b[,.]?\s*", re.IGNORECASE)
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class CompressionStats:
+    """Totals over all compressed transcripts in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.transcripts = 0
+        self.original_tokens = 0
+        self.compressed_tokens = 0
+
+    def record(self, original_tokens, compressed_tokens):
+        with self._lock:
+            self.transcripts += 1
+            self.original_tokens += original_tokens
+            self.compressed_tokens += compressed_tokens
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "transcripts": self.transcripts,
+                "original_tokens": self.original_tokens,
+                "compressed_tokens": self.compressed_tokens,
+                "ratio": self.compressed_tokens / self.original_tokens if self.original_tokens else 1.0,
+            }
+
+
+compression_stats = CompressionStats()
+
+def compression_enabled():
+    return 0 < TRANSCRIPT_COMPRESSION_RATIO < 1
+
+def compress_transcript(text, ratio=TRANSCRIPT_COMPRESSION_RATIO, min_tokens=TRANSCRIPT_COMPRESSION_MIN_TOKENS):
+    """
+    Extractive compression: keep the most informative sentences, in their
+    original order, up to `ratio` of the transcript's estimated tokens.
+
+    Sentences are scored by TF-IDF cosine similarity to the whole transcript
+    (its centroid), so sentences about the recurring topics of the video win
+    over filler and chatter. Filler words and repeated sentences are dropped first.
+    Returns (compressed_text, stats).
+    """
+    original_tokens = estimate_tokens(text)
+    if original_tokens < min_tokens or not 0 < ratio < 1:
+        return text, _stats(original_tokens, original_tokens, None)
+
+    sentences = []
+    seen = set()
+    for raw in SENTENCE_PATTERN.split(text):
+        sentence = FILLER_PATTERN.sub("", raw).strip()
+        words = WORD_PATTERN.findall(sentence.lower())
+        if not words:
+            continue
+        # Exact repetitions (common in Whisper output on long pauses)
+        signature = tuple(words)
+        if signature in seen:
+            continue
+        seen.add(signature)
+        sentences.append((sentence, Counter(words)))
+
+    scores = _centroid_scores([counts for _, counts in sentences])
+
+    budget = int(original_tokens * ratio)
+    selected = []
+    used = 0
+    for index in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        cost = estimate_tokens(sentences[index][0])
+        if used + cost > budget:
+            continue
+        selected.append(index)
+        used += cost
+
+    compressed = " ".join(sentences[index][0] for index in sorted(selected))
+    compressed_tokens = estimate_tokens(compressed)
+    compression_stats.record(original_tokens, compressed_tokens)
+    return compressed, _stats(original_tokens, compressed_tokens, (len(selected), len(sentences)))
+
+def _numpy():
+    import numpy
+    return numpy
+
+def _centroid_scores(sentence_counts):
+    """
+    Cosine similarity of each sentence's TF-IDF vector to the sum of all of them.
+    The sentence-term matrix is kept sparse as (row, column, count) arrays, so
+    every step is one vectorized pass over its non-zero entries.
+    """
+    try:
+        np = _numpy()
+    except ImportError:
+        print("Warning: numpy not installed, scoring transcript sentences in pure Python")
+        return _centroid_scores_python(sentence_counts)
+
+    total = len(sentence_counts)
+    vocabulary = {}
+    rows = np.repeat(np.arange(total), [len(counts) for counts in sentence_counts])
+    columns = np.fromiter(
+        (vocabulary.setdefault(word, len(vocabulary)) for counts in sentence_counts for word in counts),
+        dtype=np.int64, count=len(rows)
+    )
+    values = np.fromiter(
+        (count for counts in sentence_counts for count in counts.values()),
+        dtype=np.float64, count=len(rows)
+    )
+    size = len(vocabulary)
+
+    # Each word appears at most once per sentence, so counting columns gives document frequencies
+    idf = np.log((1 + total) / (1 + np.bincount(columns, minlength=size))) + 1
+    weights = values * idf[columns]
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=total))
+    weights /= np.where(norms > 0, norms, 1.0)[rows]
+
+    centroid = np.bincount(columns, weights=weights, minlength=size)
+    centroid_norm = np.linalg.norm(centroid) or 1.0
+    return (np.bincount(rows, weights=weights * centroid[columns], minlength=total) / centroid_norm).tolist()
+
+def _centroid_scores_python(sentence_counts):
+    """_centroid_scores without numpy"""
+    document_frequency = Counter()
+    for counts in sentence_counts:
+        document_frequency.update(counts.keys())
+
+    total = len(sentence_counts)
+    idf = {word: math.log((1 + total) / (1 + df)) + 1 for word, df in document_frequency.items()}
+
+    vectors = []
+    centroid = Counter()
+    for counts in sentence_counts:
+        vector = {word: count * idf[word] for word, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        vector = {word: value / norm for word, value in vector.items()}
+        vectors.append(vector)
+        centroid.update(vector)
+
+    centroid_norm = math.sqrt(sum(value * value for value in centroid.values())) or 1.0
+    return [
+        sum(value * centroid[word] for word, value in vector.items()) / centroid_norm
+        for vector in vectors
+    ]
+
+def _stats(original_tokens, compressed_tokens, sentences):
+    stats = {
+        "original_tokens": original_tokens,
+        "compressed_tokens": compressed_tokens,
+        "ratio": compressed_tokens / original_tokens if original_tokens else 1.0,
+    }
+    if sentences:
+        stats["sentences_kept"], stats["sentences_total"] = sentences
+    return stats
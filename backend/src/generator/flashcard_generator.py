@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import List
-import os
-import json
-from anthropic import Anthropic
+from typing import Iterator, List
+
+from generator.base import TranscriptGenerator
+from generator.json_stream import JSONArrayStreamParser
+from generator.map_reduce import needs_map_reduce
 
 class FlashcardItem(BaseModel):
     front: str = Field(description="The question or concept on the front of the flashcard")
@@ -11,25 +12,23 @@ class FlashcardItem(BaseModel):
 class FlashcardList(BaseModel):
     flashcards: List[FlashcardItem] = Field(description="A list of flashcards generated from the text")
 
-class FlashcardGenerator:
-    def __init__(self):
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
-        
-        self.client = Anthropic(api_key=api_key)
-        # Using Claude 3 Sonnet (widely available)
-        self.model = "claude-sonnet-4-5-20250929"
+class FlashcardGenerator(TranscriptGenerator):
+    # Bump whenever the prompt changes so cached generations are not reused
+    PROMPT_VERSION = "3"
+    kind = "flashcards"
 
-    def generate_flashcards(self, transcript_text: str, language: str = "en") -> List[FlashcardItem]:
-        prompt = f"""
-        You are an expert educational content creator. Your task is to create effective flashcards from the provided video transcript.
+    def _build_instructions(self, language: str, part=None) -> str:
+        # Map step of a long transcript: the prompt only holds one chunk of it
+        part_note = ""
+        if part:
+            part_note = f"The transcript above is part {part[0] + 1} of {part[1]} of a longer video; only use what this part covers."
+
+        return f"""
+        Your task is to create effective flashcards from the video transcript above.
+        {part_note}
         
         Target Language: {language}
         
-        Transcript:
-        {transcript_text}
-        
         Generate 5-10 high-quality flashcards that cover the key concepts and important details from the transcript.
         The flashcards should be in the target language specified above.
         
@@ -37,30 +36,37 @@ class FlashcardGenerator:
         Do not include any other text, explanations, or markdown formatting. Just the JSON.
         """
 
+    def generate_flashcards(self, transcript_text: str, language: str = "en") -> List[FlashcardItem]:
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            
-            content = response.content[0].text.strip()
-            
-            # Clean up potential markdown code blocks if the model includes them
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            data = json.loads(content)
-            flashcards_data = data.get("flashcards", [])
-            
-            return [FlashcardItem(**item) for item in flashcards_data]
+            return self._generate(self._prepare_transcript(transcript_text), language)
             
         except Exception as e:
             print(f"Error generating flashcards: {e}")
             # Return empty list or re-raise depending on desired behavior. 
             # Re-raising to let the caller handle the error (which returns 500)
             raise e
+
+    def _parse_items(self, content: str) -> List[FlashcardItem]:
+        data = self._parse_json(content)
+        flashcards_data = data.get("flashcards", [])
+
+        return [FlashcardItem(**item) for item in flashcards_data]
+
+    def _item_key(self, item: FlashcardItem) -> str:
+        return item.front
+
+    def stream_flashcards(self, transcript_text: str, language: str = "en") -> Iterator[FlashcardItem]:
+        """
+        Same prompt as generate_flashcards, but consumes the model's token stream and
+        yields each flashcard as soon as its JSON object is complete.
+        Long transcripts go through map-reduce, so items arrive after the reduce step.
+        """
+        transcript_text = self._prepare_transcript(transcript_text)
+        if needs_map_reduce(transcript_text):
+            yield from self._generate(transcript_text, language)
+            return
+
+        parser = JSONArrayStreamParser("flashcards")
+        for text in self._stream_text(transcript_text, self._build_instructions(language)):
+            for item in parser.feed(text):
+                yield FlashcardItem(**item)
@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import hashlib
+import datetime
+import threading
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal, GenerationCache
+
+# A 'pending' entry older than this is assumed abandoned (crashed process) and taken over
+GENERATION_PENDING_TIMEOUT = int(os.getenv("GENERATION_PENDING_TIMEOUT", "180"))
+PENDING_POLL_INTERVAL = 1.0
+# Statuses whose payload can be served ('regenerating' keeps the previous result)
+READABLE_STATUSES = ('ready', 'regenerating')
+
+
+def generation_cache_key(kind, transcript_text, language, prompt_version, model):
+    """Cache key for one generation: (transcript content hash, language, prompt version, model)"""
+    content_hash = hashlib.sha256(transcript_text.encode("utf-8")).hexdigest()
+    raw = f"{kind}|{content_hash}|{language}|{prompt_version}|{model}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+def get_or_generate(kind, transcript_text, language, prompt_version, model, generate, regenerate=False):
+    """
+    Return (items, cached) for a flashcard/quiz generation.
+
+    Identical requests are coalesced twice over: within the process, followers
+    wait for the in-flight call; across processes, the first request claims a
+    'pending' row and the others poll it until it is 'ready'.
+    `generate()` must return a JSON-serializable list. `regenerate=True` skips
+    the cached result and replaces it; other callers keep getting the old
+    result until the new one is stored.
+    """
+    key = generation_cache_key(kind, transcript_text, language, prompt_version, model)
+    meta = {"kind": kind, "language": language, "model": model, "prompt_version": prompt_version}
+
+    flight_key = (key, regenerate)
+    with _flights_lock:
+        flight = _flights.get(flight_key)
+        leader = flight is None
+        if leader:
+            flight = _flights[flight_key] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        # Cached only if the leader itself got a cache hit
+        return flight.result
+
+    try:
+        flight.result = _get_or_generate_durable(key, meta, generate, regenerate)
+        return flight.result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[flight_key]
+        flight.done.set()
+
+def stream_or_generate(kind, transcript_text, language, prompt_version, model, stream, regenerate=False):
+    """
+    Streaming counterpart of get_or_generate: yields items one at a time.
+
+    A cached result is replayed immediately. Otherwise this request claims the
+    generation and yields items from `stream()` as they arrive, storing the full
+    list once the stream ends. If another request is already generating the same
+    thing, its result is awaited and then replayed.
+    """
+    key = generation_cache_key(kind, transcript_text, language, prompt_version, model)
+    meta = {"kind": kind, "language": language, "model": model, "prompt_version": prompt_version}
+
+    claimed, payload = _claim(key, meta, regenerate)
+    if payload is not None:
+        print(f"Generation cache hit: {kind} ({language})")
+        yield from json.loads(payload)
+        return
+
+    if not claimed:
+        items, _ = get_or_generate(kind, transcript_text, language, prompt_version, model, lambda: list(stream()), regenerate)
+        yield from items
+        return
+
+    print(f"Generation cache miss (streaming): {kind} ({language})")
+    items = []
+    try:
+        for item in stream():
+            items.append(item)
+            yield item
+    except BaseException:
+        # Includes GeneratorExit when the client goes away mid-stream
+        _release(key)
+        raise
+
+    _store(key, items)
+
+def get_cached_generation(kind, transcript_text, language, prompt_version, model):
+    """Cached items for a generation, or None"""
+    key = generation_cache_key(kind, transcript_text, language, prompt_version, model)
+    db = SessionLocal()
+    try:
+        entry = db.query(GenerationCache).filter(
+            GenerationCache.cache_key == key,
+            GenerationCache.status.in_(READABLE_STATUSES)
+        ).first()
+        return json.loads(entry.payload) if entry else None
+    finally:
+        db.close()
+
+def store_generation(kind, transcript_text, language, prompt_version, model, items):
+    """Store items generated outside get_or_generate (e.g. by a batch), replacing any entry"""
+    key = generation_cache_key(kind, transcript_text, language, prompt_version, model)
+    meta = {"kind": kind, "language": language, "model": model, "prompt_version": prompt_version}
+    db = SessionLocal()
+    try:
+        if not db.query(GenerationCache).filter(GenerationCache.cache_key == key).first():
+            db.add(GenerationCache(cache_key=key, status='pending', **meta))
+            db.commit()
+    except IntegrityError:
+        db.rollback()
+    finally:
+        db.close()
+    _store(key, items)
+
+def _get_or_generate_durable(key, meta, generate, regenerate):
+    deadline = time.monotonic() + GENERATION_PENDING_TIMEOUT
+    # A regeneration request that finds another one running waits for its new result
+    fresh_only = regenerate
+    while True:
+        claimed, payload = _claim(key, meta, regenerate, fresh_only)
+        if payload is not None:
+            print(f"Generation cache hit: {meta['kind']} ({meta['language']})")
+            return json.loads(payload), True
+        if claimed:
+            break
+        # Another process is generating the same thing: wait for its result
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Timed out waiting for in-flight {meta['kind']} generation")
+        time.sleep(PENDING_POLL_INTERVAL)
+        regenerate = False
+
+    print(f"Generation cache miss: {meta['kind']} ({meta['language']})")
+    try:
+        items = generate()
+    except Exception:
+        _release(key)
+        raise
+
+    _store(key, items)
+    return items, False
+
+def _claim(key, meta, regenerate, fresh_only=False):
+    """
+    Try to become the process that generates `key`.
+    Returns (claimed, payload); payload is set when a usable result already exists
+    (with fresh_only, not one that is being regenerated).
+    """
+    db = SessionLocal()
+    try:
+        entry = db.query(GenerationCache).filter(GenerationCache.cache_key == key).first()
+        if entry is None:
+            db.add(GenerationCache(cache_key=key, status='pending', **meta))
+            try:
+                db.commit()
+                return True, None
+            except IntegrityError:
+                # Lost the race to another process
+                db.rollback()
+                return False, None
+
+        if entry.status in READABLE_STATUSES and not regenerate and not (fresh_only and entry.status == 'regenerating'):
+            return False, entry.payload
+
+        stale_before = datetime.datetime.utcnow() - datetime.timedelta(seconds=GENERATION_PENDING_TIMEOUT)
+        if entry.status in ('pending', 'regenerating') and entry.updated_at and entry.updated_at > stale_before:
+            return False, None
+
+        # Regenerating, or the previous owner died: take over with a compare-and-set.
+        # An existing payload stays readable until the new one replaces it.
+        status = 'regenerating' if entry.payload is not None else 'pending'
+        taken = db.query(GenerationCache).filter(
+            GenerationCache.id == entry.id,
+            GenerationCache.updated_at == entry.updated_at
+        ).update({"status": status, "updated_at": datetime.datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return taken == 1, None
+    finally:
+        db.close()
+
+def _store(key, items):
+    db = SessionLocal()
+    try:
+        db.query(GenerationCache).filter(GenerationCache.cache_key == key).update(
+            {"status": 'ready', "payload": json.dumps(items, ensure_ascii=False), "updated_at": datetime.datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.commit()
+    except Exception as e:
+        # The result is still returned to the caller; it just isn't cached
+        print(f"Error storing generation result: {e}")
+    finally:
+        db.close()
+
+def _release(key):
+    """
+    Drop our claim after a failed generation so waiters can retry; a failed
+    regeneration goes back to serving the previous result
+    """
+    db = SessionLocal()
+    try:
+        db.query(GenerationCache).filter(
+            GenerationCache.cache_key == key,
+            GenerationCache.status == 'regenerating'
+        ).update({"status": 'ready', "updated_at": datetime.datetime.utcnow()}, synchronize_session=False)
+        db.query(GenerationCache).filter(
+            GenerationCache.cache_key == key,
+            GenerationCache.status == 'pending'
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        print(f"Error releasing generation claim: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,72 @@
+import re
+import json
+
+
+class JSONArrayStreamParser:
+    """
+    Incremental parser for model output of the form {"<key>": [ {...}, {...} ]}.
+
+    Feed it text chunks as they arrive; `feed` returns every array element whose
+    closing brace has been seen since the previous call. Anything before the
+    array (markdown fences, prose) and after it is ignored.
+    """
+
+    def __init__(self, array_key):
+        self._array_start = re.compile(r'"%s"\s*:\s*\[' % re.escape(array_key))
+        self._prefix = ""
+        self._in_array = False
+        self._done = False
+        self._item = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def done(self):
+        """True once the closing bracket of the array has been seen"""
+        return self._done
+
+    def feed(self, chunk):
+        if self._done or not chunk:
+            return []
+
+        if not self._in_array:
+            self._prefix += chunk
+            match = self._array_start.search(self._prefix)
+            if not match:
+                return []
+            self._in_array = True
+            chunk = self._prefix[match.end():]
+            self._prefix = ""
+
+        items = []
+        for char in chunk:
+            if self._depth == 0:
+                # Between elements: only an object start or the end of the array matter
+                if char == "{":
+                    self._item = [char]
+                    self._depth = 1
+                elif char == "]":
+                    self._done = True
+                    break
+                continue
+
+            self._item.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    items.append(json.loads("".join(self._item)))
+                    self._item = []
+
+        return items
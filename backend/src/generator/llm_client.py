@@ -0,0 +1,176 @@
+import os
+import time
+import random
+import threading
+from contextlib import contextmanager
+
+import httpx
+from anthropic import Anthropic, DefaultHttpxClient, APIStatusError, APIConnectionError
+
+from rate_limit import TokenBucket
+from generator.map_reduce import estimate_tokens
+
+# Budgets shared by every generation in this process (0 disables a limit).
+# The token budget counts estimated input tokens, the provider's usual binding limit.
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "50"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "400000"))
+
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "30"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+
+# 429 rate limited, 529 overloaded, and transient server errors
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504, 529)
+
+
+class LLMClient:
+    """
+    Process-wide Anthropic client: one HTTP connection pool reused by every
+    generator, request/token budgets enforced with token buckets, and retries
+    with jittered exponential backoff for rate-limit, overload and transient errors.
+    """
+
+    def __init__(self, api_key):
+        self.client = Anthropic(
+            api_key=api_key,
+            # Retries are handled here so they also go through the budgets
+            max_retries=0,
+            http_client=DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+            )
+        )
+        self.request_bucket = TokenBucket(LLM_REQUESTS_PER_MINUTE)
+        self.token_bucket = TokenBucket(LLM_TOKENS_PER_MINUTE)
+
+        self._lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "rate_limited": 0,
+            "overloaded": 0,
+            "queued_requests": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+            "backoff_seconds_total": 0.0,
+        }
+
+    def create(self, **kwargs):
+        """messages.create with budgets and retries"""
+        return self._call(kwargs, lambda: self.client.messages.create(**kwargs))
+
+    @contextmanager
+    def stream(self, **kwargs):
+        """
+        messages.stream with budgets and retries. Only opening the stream is
+        retried; an error after text has been yielded propagates to the caller.
+        """
+        def open_stream():
+            manager = self.client.messages.stream(**kwargs)
+            return manager, manager.__enter__()
+
+        manager, stream = self._call(kwargs, open_stream)
+        try:
+            yield stream
+        finally:
+            manager.__exit__(None, None, None)
+
+    def has_headroom(self, fraction):
+        """True while at least `fraction` of both per-minute budgets is unused"""
+        return all(
+            bucket.available() >= fraction * bucket.capacity
+            for bucket in (self.request_bucket, self.token_bucket)
+            if bucket.rate_per_minute > 0
+        )
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["queue_wait_seconds_avg"] = (
+            metrics["queue_wait_seconds_total"] / metrics["requests"] if metrics["requests"] else 0.0
+        )
+        metrics["requests_per_minute_limit"] = LLM_REQUESTS_PER_MINUTE
+        metrics["tokens_per_minute_limit"] = LLM_TOKENS_PER_MINUTE
+        return metrics
+
+    def _call(self, kwargs, send):
+        attempt = 0
+        while True:
+            self._wait_for_budget(kwargs)
+            try:
+                return send()
+            except (APIStatusError, APIConnectionError) as e:
+                status = getattr(e, "status_code", None)
+                retryable = isinstance(e, APIConnectionError) or status in RETRYABLE_STATUS_CODES
+                if not retryable or attempt >= LLM_MAX_RETRIES:
+                    self._count("failures")
+                    raise
+
+                delay = self._backoff(attempt, e)
+                self._count("retries")
+                if status == 429:
+                    self._count("rate_limited")
+                elif status == 529:
+                    self._count("overloaded")
+                self._count("backoff_seconds_total", delay)
+                print(f"LLM request failed ({status or type(e).__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def _wait_for_budget(self, kwargs):
+        tokens = estimate_tokens(_prompt_text(kwargs))
+        waited = self.request_bucket.acquire(1) + self.token_bucket.acquire(tokens)
+
+        with self._lock:
+            self._metrics["requests"] += 1
+            self._metrics["queue_wait_seconds_total"] += waited
+            if waited > 0:
+                self._metrics["queued_requests"] += 1
+                self._metrics["queue_wait_seconds_max"] = max(self._metrics["queue_wait_seconds_max"], waited)
+
+    def _backoff(self, attempt, error):
+        # Respect the server's hint when it gives one
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), LLM_BACKOFF_MAX_SECONDS)
+            except ValueError:
+                pass
+
+        # Full jitter: spread retries of concurrent callers out instead of retrying in lockstep
+        return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._metrics[name] += amount
+
+
+def _prompt_text(kwargs):
+    """Concatenated text of the system prompt and messages, for token estimates"""
+    parts = []
+    system = kwargs.get("system")
+    blocks = system if isinstance(system, list) else [{"text": system or ""}]
+    for message in kwargs.get("messages", []):
+        content = message["content"]
+        blocks = blocks + (content if isinstance(content, list) else [{"text": content}])
+    for block in blocks:
+        parts.append(block.get("text", ""))
+    return "".join(parts)
+
+
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+def get_llm_client():
+    """The shared LLMClient, created on first use"""
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                api_key = os.getenv("ANTHROPIC_API_KEY")
+                if not api_key:
+                    raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
+                _llm_client = LLMClient(api_key)
+    return _llm_client
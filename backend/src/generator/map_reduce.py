@@ -0,0 +1,115 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Rough token estimate; avoids depending on a tokenizer for budgeting
+CHARS_PER_TOKEN = 4
+
+# Transcripts estimated above this size are generated chunk by chunk
+MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("MAP_REDUCE_THRESHOLD_TOKENS", "24000"))
+MAP_REDUCE_CHUNK_TOKENS = int(os.getenv("MAP_REDUCE_CHUNK_TOKENS", "12000"))
+# Maximum number of chunks sent to the model at once
+MAP_REDUCE_CONCURRENCY = int(os.getenv("MAP_REDUCE_CONCURRENCY", "4"))
+# Size of the final set selected from all chunk candidates
+MAP_REDUCE_MAX_ITEMS = int(os.getenv("MAP_REDUCE_MAX_ITEMS", "20"))
+
+# Candidates whose key text shares at least this fraction of words are duplicates
+DUPLICATE_SIMILARITY = 0.75
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def needs_map_reduce(transcript_text):
+    return estimate_tokens(transcript_text) > MAP_REDUCE_THRESHOLD_TOKENS
+
+def split_into_chunks(text, max_tokens=MAP_REDUCE_CHUNK_TOKENS):
+    """
+    Split text into chunks of at most max_tokens (estimated), cutting between
+    paragraphs where possible, then between sentences, and only as a last
+    resort inside a sentence.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+
+    units = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            units.append(paragraph)
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            while len(sentence) > max_chars:
+                units.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                units.append(sentence)
+
+    chunks = []
+    current = []
+    size = 0
+    for unit in units:
+        if current and size + len(unit) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current = []
+            size = 0
+        current.append(unit)
+        size += len(unit) + 1
+    if current:
+        chunks.append("\n".join(current))
+
+    return chunks
+
+def map_reduce(transcript_text, generate_chunk, item_key, max_items=MAP_REDUCE_MAX_ITEMS):
+    """
+    Generate items for a long transcript.
+
+    Map: `generate_chunk(chunk_text, part)` runs for every chunk concurrently
+    (at most MAP_REDUCE_CONCURRENCY at a time), where part is (index, count).
+    Reduce: near-duplicate candidates (compared on `item_key(item)`) are
+    dropped and up to max_items are selected evenly across the chunks.
+    """
+    chunks = split_into_chunks(transcript_text)
+    print(f"Map-reduce generation over {len(chunks)} chunks")
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MAP_REDUCE_CONCURRENCY, len(chunks)))) as executor:
+        candidates = list(executor.map(
+            lambda indexed: generate_chunk(indexed[1], (indexed[0], len(chunks))),
+            enumerate(chunks)
+        ))
+
+    return reduce_candidates(candidates, item_key, max_items)
+
+def reduce_candidates(candidates_per_chunk, item_key, max_items):
+    """Deduplicate candidates and pick up to max_items, round-robin over chunks, in transcript order"""
+    seen = []
+    unique_per_chunk = []
+    for items in candidates_per_chunk:
+        unique = []
+        for item in items:
+            words = _words(item_key(item))
+            if any(_similarity(words, other) >= DUPLICATE_SIMILARITY for other in seen):
+                continue
+            seen.append(words)
+            unique.append(item)
+        unique_per_chunk.append(unique)
+
+    # Round-robin so every part of the video is represented before any part gets a second item
+    selected = []
+    longest = max((len(unique) for unique in unique_per_chunk), default=0)
+    for rank in range(longest):
+        for chunk_index, unique in enumerate(unique_per_chunk):
+            if rank < len(unique):
+                selected.append((chunk_index, rank, unique[rank]))
+
+    selected = sorted(selected[:max_items], key=lambda entry: (entry[0], entry[1]))
+    return [item for _, _, item in selected]
+
+def _words(text):
+    return set(re.findall(r"\w+", text.lower()))
+
+def _similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
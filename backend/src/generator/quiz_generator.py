@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import List
-import os
-import json
-from anthropic import Anthropic
+from typing import Iterator, List
+
+from generator.base import TranscriptGenerator
+from generator.json_stream import JSONArrayStreamParser
+from generator.map_reduce import needs_map_reduce
 
 class QuizQuestion(BaseModel):
     question: str = Field(description="The quiz question")
@@ -12,25 +13,23 @@ class QuizQuestion(BaseModel):
 class QuizList(BaseModel):
     questions: List[QuizQuestion] = Field(description="A list of quiz questions generated from the text")
 
-class QuizGenerator:
-    def __init__(self):
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
-        
-        self.client = Anthropic(api_key=api_key)
-        # Using Claude 3 Sonnet (widely available)
-        self.model = "claude-sonnet-4-5-20250929"
+class QuizGenerator(TranscriptGenerator):
+    # Bump whenever the prompt changes so cached generations are not reused
+    PROMPT_VERSION = "3"
+    kind = "quiz"
 
-    def generate_quiz(self, transcript_text: str, language: str = "en") -> List[QuizQuestion]:
-        prompt = f"""
-        You are an expert educational content creator. Your task is to create effective multiple-choice quiz questions from the provided video transcript.
+    def _build_instructions(self, language: str, part=None) -> str:
+        # Map step of a long transcript: the prompt only holds one chunk of it
+        part_note = ""
+        if part:
+            part_note = f"The transcript above is part {part[0] + 1} of {part[1]} of a longer video; only use what this part covers."
+
+        return f"""
+        Your task is to create effective multiple-choice quiz questions from the video transcript above.
+        {part_note}
         
         Target Language: {language}
         
-        Transcript:
-        {transcript_text}
-        
         Generate 5-10 high-quality multiple-choice questions that test understanding of the key concepts and important details from the transcript.
         The questions and answers should be in the target language specified above.
         Each question must have:
@@ -44,28 +43,35 @@ class QuizGenerator:
         Do not include any other text, explanations, or markdown formatting. Just the JSON.
         """
 
+    def generate_quiz(self, transcript_text: str, language: str = "en") -> List[QuizQuestion]:
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            
-            content = response.content[0].text.strip()
-            
-            # Clean up potential markdown code blocks if the model includes them
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            data = json.loads(content)
-            questions_data = data.get("questions", [])
-            
-            return [QuizQuestion(**item) for item in questions_data]
+            return self._generate(self._prepare_transcript(transcript_text), language)
             
         except Exception as e:
             print(f"Error generating quiz: {e}")
             raise e
+
+    def _parse_items(self, content: str) -> List[QuizQuestion]:
+        data = self._parse_json(content)
+        questions_data = data.get("questions", [])
+
+        return [QuizQuestion(**item) for item in questions_data]
+
+    def _item_key(self, item: QuizQuestion) -> str:
+        return item.question
+
+    def stream_quiz(self, transcript_text: str, language: str = "en") -> Iterator[QuizQuestion]:
+        """
+        Same prompt as generate_quiz, but consumes the model's token stream and
+        yields each question as soon as its JSON object is complete.
+        Long transcripts go through map-reduce, so items arrive after the reduce step.
+        """
+        transcript_text = self._prepare_transcript(transcript_text)
+        if needs_map_reduce(transcript_text):
+            yield from self._generate(transcript_text, language)
+            return
+
+        parser = JSONArrayStreamParser("questions")
+        for text in self._stream_text(transcript_text, self._build_instructions(language)):
+            for item in parser.feed(text):
+                yield QuizQuestion(**item)
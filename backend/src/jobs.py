@@ -0,0 +1,282 @@
+import os
+import json
+import uuid
+import datetime
+import time
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from database import SessionLocal, Job, User, Video
+from utils import send_to_sqs, SQS_QUEUE_URL
+from notifications import get_event_bus
+from tasks import (
+    NotFoundError, translate_transcript_for_video, translate_transcript_for_video_multi,
+    generate_flashcards_for_video, generate_quiz_for_video, find_original_transcript, read_transcript_text
+)
+from generator.llm_client import get_llm_client
+from generator.map_reduce import estimate_tokens
+
+# Jobs go to their own SQS queue when configured (falling back to the transcription
+# queue); 'local' runs them on a thread pool inside the current process instead,
+# which is meant for local development since Lambda freezes after the response
+SQS_JOBS_QUEUE_URL = os.getenv('SQS_JOBS_QUEUE_URL') or SQS_QUEUE_URL
+JOB_QUEUE_BACKEND = os.getenv('JOB_QUEUE_BACKEND', 'sqs' if SQS_JOBS_QUEUE_URL else 'local')
+
+TERMINAL_JOB_STATUSES = ('completed', 'failed', 'cancelled')
+
+# Speculative generation of flashcards and a quiz as soon as a transcript is ready,
+# so the user's first click is served from the generation cache
+PREGENERATE_STUDY_MATERIAL = os.getenv('PREGENERATE_STUDY_MATERIAL', 'false').lower() == 'true'
+PREGENERATE_MAX_PER_USER_PER_DAY = int(os.getenv('PREGENERATE_MAX_PER_USER_PER_DAY', '10'))
+PREGENERATE_MAX_TRANSCRIPT_TOKENS = int(os.getenv('PREGENERATE_MAX_TRANSCRIPT_TOKENS', '50000'))
+# Pre-generation only calls the model while this fraction of the per-minute LLM
+# budgets is unused, leaving the rest to interactive requests
+PREGENERATE_LLM_HEADROOM = float(os.getenv('PREGENERATE_LLM_HEADROOM', '0.5'))
+PREGENERATE_HEADROOM_WAIT_SECONDS = 5
+
+
+class JobCancelled(Exception):
+    """Raised by a handler that noticed its job was cancelled while running"""
+
+
+def _translate(db, job, user, video, params):
+    if params.get("target_languages"):
+        return translate_transcript_for_video_multi(db, user, video, params["target_languages"])
+    return translate_transcript_for_video(db, user, video, params["target_language"])
+
+def _flashcards(db, job, user, video, params):
+    return generate_flashcards_for_video(db, video, params.get("language", "en"), params.get("regenerate", False))
+
+def _quiz(db, job, user, video, params):
+    return generate_quiz_for_video(db, video, params.get("language", "en"), params.get("regenerate", False))
+
+def _pregenerate(db, job, user, video, params):
+    """
+    Generate flashcards and a quiz into the generation cache (drafts the user
+    can open and save later). Low priority: waits for spare LLM budget and
+    stops as soon as the job is cancelled, e.g. because the video was deleted.
+    """
+    language = params.get("language", "en")
+    result = {}
+    for kind, generate in (("flashcards", generate_flashcards_for_video), ("quiz", generate_quiz_for_video)):
+        while not get_llm_client().has_headroom(PREGENERATE_LLM_HEADROOM):
+            _raise_if_cancelled(db, job)
+            time.sleep(PREGENERATE_HEADROOM_WAIT_SECONDS)
+        _raise_if_cancelled(db, job)
+
+        generated = generate(db, video, language)
+        result[kind] = {"count": len(generated[kind]), "cached": generated["cached"]}
+
+    _raise_if_cancelled(db, job)
+    return result
+
+def _raise_if_cancelled(db, job):
+    db.refresh(job)
+    if job.status == 'cancelled':
+        raise JobCancelled()
+
+JOB_HANDLERS = {
+    "translate": _translate,
+    "flashcards": _flashcards,
+    "quiz": _quiz,
+    "pregenerate": _pregenerate,
+}
+
+# Maximum number of jobs of each type running at once in one process
+# (pre-generation defaults to one at a time)
+JOB_CONCURRENCY = {
+    job_type: int(os.getenv(f"JOB_CONCURRENCY_{job_type.upper()}", "1" if job_type == "pregenerate" else "2"))
+    for job_type in JOB_HANDLERS
+}
+_job_slots = {job_type: threading.BoundedSemaphore(limit) for job_type, limit in JOB_CONCURRENCY.items()}
+
+_local_executor = None
+_local_executor_lock = threading.Lock()
+
+
+def job_channel(job_id):
+    return f"job:{job_id}"
+
+def job_to_dict(job):
+    return {
+        "id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "video_id": job.video_id,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+def publish_job_status(job):
+    """Notify SSE subscribers; failures are logged and never affect the job"""
+    try:
+        get_event_bus().publish(job_channel(job.id), json.loads(json.dumps(job_to_dict(job), default=str)))
+    except Exception as e:
+        print(f"Warning: could not publish status for job {job.id}: {e}")
+
+def submit_job(db, user, job_type, params, video_id=None):
+    """Create a job record and hand it to the configured queue. Returns the Job."""
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    job = Job(
+        id=str(uuid.uuid4()),
+        user_id=user.id,
+        video_id=video_id,
+        job_type=job_type,
+        status='queued',
+        params=json.dumps(params)
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    dispatch_job(job)
+    publish_job_status(job)
+    return job
+
+def dispatch_job(job):
+    if JOB_QUEUE_BACKEND == 'sqs':
+        send_to_sqs({"job_id": job.id, "job_type": job.job_type}, queue_url=SQS_JOBS_QUEUE_URL)
+    else:
+        _get_local_executor().submit(run_job, job.id)
+
+def _get_local_executor():
+    global _local_executor
+    if _local_executor is None:
+        with _local_executor_lock:
+            if _local_executor is None:
+                _local_executor = ThreadPoolExecutor(
+                    max_workers=sum(JOB_CONCURRENCY.values()),
+                    thread_name_prefix="job"
+                )
+    return _local_executor
+
+def cancel_job(db, job):
+    """Cancel a job that has not started yet; running jobs finish normally"""
+    # Conditional, so a job claimed by run_job in the meantime is never marked cancelled
+    cancelled = db.query(Job).filter(Job.id == job.id, Job.status == 'queued').update(
+        {"status": 'cancelled', "finished_at": datetime.datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    db.refresh(job)
+    if not cancelled:
+        return False
+    publish_job_status(job)
+    return True
+
+def cancel_video_jobs(db, video_id):
+    """
+    Cancel every unfinished job of a video (before deleting it). Queued jobs
+    never start; running pre-generation stops at its next checkpoint.
+    """
+    jobs = db.query(Job).filter(
+        Job.video_id == video_id,
+        Job.status.in_(('queued', 'running'))
+    ).all()
+    for job in jobs:
+        if job.status == 'queued' or job.job_type == 'pregenerate':
+            job.status = 'cancelled'
+            job.finished_at = datetime.datetime.utcnow()
+    db.commit()
+    for job in jobs:
+        if job.status == 'cancelled':
+            publish_job_status(job)
+
+def submit_pregeneration(db, user, video, language):
+    """
+    Queue speculative flashcard/quiz generation for a freshly transcribed video,
+    if enabled and within budget. Returns the Job, or None when skipped.
+    """
+    if not PREGENERATE_STUDY_MATERIAL:
+        return None
+
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+    recent = db.query(Job).filter(
+        Job.user_id == user.id,
+        Job.job_type == 'pregenerate',
+        Job.created_at >= since
+    ).count()
+    if recent >= PREGENERATE_MAX_PER_USER_PER_DAY:
+        print(f"Skipping pre-generation for video {video.id}: daily budget of user {user.id} used up")
+        return None
+
+    transcript = find_original_transcript(db, video)
+    if not transcript:
+        return None
+    try:
+        tokens = estimate_tokens(read_transcript_text(transcript))
+    except NotFoundError as e:
+        print(f"Skipping pre-generation for video {video.id}: {e}")
+        return None
+    if tokens > PREGENERATE_MAX_TRANSCRIPT_TOKENS:
+        print(f"Skipping pre-generation for video {video.id}: transcript too long ({tokens} tokens)")
+        return None
+
+    return submit_job(db, user, 'pregenerate', {"language": language}, video_id=video.id)
+
+def run_job(job_id):
+    """
+    Execute a queued job (called by the local executor or the worker).
+    Respects the per-type concurrency limit and records the outcome on the Job row.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            print(f"Job {job_id} not found")
+            return
+        # Redelivered or cancelled message: nothing to do
+        if job.status != 'queued':
+            print(f"Skipping job {job_id} with status {job.status}")
+            return
+
+        with _job_slots[job.job_type]:
+            # Claim the job in one conditional UPDATE: SQS delivers at least once and
+            # both the worker and the local executor run jobs, so only one run may win.
+            # Also covers a cancellation while waiting for the slot
+            claimed = db.query(Job).filter(Job.id == job_id, Job.status == 'queued').update(
+                {"status": 'running', "started_at": datetime.datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+            if not claimed:
+                print(f"Skipping job {job_id}: no longer queued")
+                return
+            db.refresh(job)
+            publish_job_status(job)
+
+            try:
+                user = db.query(User).filter(User.id == job.user_id).first()
+                video = db.query(Video).filter(Video.id == job.video_id, Video.user_id == job.user_id).first()
+                if not user or not video:
+                    raise LookupError("Video not found")
+
+                result = JOB_HANDLERS[job.job_type](db, job, user, video, json.loads(job.params or "{}"))
+
+                job.result = json.dumps(result, default=str, ensure_ascii=False)
+                job.status = 'completed'
+            except JobCancelled:
+                print(f"Job {job_id} ({job.job_type}) cancelled while running")
+                return
+            except Exception as e:
+                db.rollback()
+                db.refresh(job)
+                if job.status == 'cancelled':
+                    # Failed because of the cancellation (e.g. the video was deleted)
+                    return
+                print(f"Job {job_id} ({job.job_type}) failed: {e}")
+                traceback.print_exc()
+                job.status = 'failed'
+                job.error = str(e)
+
+            job.finished_at = datetime.datetime.utcnow()
+            db.commit()
+            publish_job_status(job)
+    finally:
+        db.close()
@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import queue
+import asyncio
+import threading
+
+# Notification backend: 'memory' (single process, e.g. local dev) or 'redis'
+# (API and worker in separate processes / hosts)
+REDIS_URL = os.getenv("REDIS_URL")
+NOTIFICATION_BACKEND = os.getenv("NOTIFICATION_BACKEND", "redis" if REDIS_URL else "memory")
+
+# Last event per channel is kept this long so late subscribers see the current stage
+LAST_EVENT_TTL_SECONDS = 3600
+# The Redis listener applies subscription changes between reads of at most this long
+REDIS_LISTEN_TIMEOUT_SECONDS = 0.1
+REDIS_SUBSCRIBE_TIMEOUT_SECONDS = 5
+
+# Video processing stages published by the API and the worker, with progress (%)
+VIDEO_STAGES = {
+    "queued": 0,
+    "downloading": 10,
+    "extracting_audio": 30,
+    "transcribing": 40,
+    "uploading": 80,
+    "completed": 100,
+    "failed": 100,
+}
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class Subscription:
+    """Events of one channel for one subscriber, fed by the bus from any thread"""
+
+    def __init__(self, bus, channel):
+        self._bus = bus
+        self.channel = channel
+        self.queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._waiter = None  # (event loop, asyncio.Event) of a reader awaiting get_async
+
+    def put(self, event):
+        self.queue.put(event)
+        with self._lock:
+            waiter = self._waiter
+        if waiter:
+            loop, wakeup = waiter
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # Event loop already gone
+                pass
+
+    def get(self, timeout=None):
+        """Return the next event, or None if nothing arrived within timeout (0 = don't wait)"""
+        try:
+            if not timeout:
+                return self.queue.get_nowait()
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def get_async(self, timeout):
+        """Await the next event (None after timeout) without blocking or polling the event loop"""
+        event = self.get()
+        if event is not None:
+            return event
+
+        wakeup = asyncio.Event()
+        with self._lock:
+            self._waiter = (asyncio.get_running_loop(), wakeup)
+        try:
+            # An event may have arrived before the waiter was registered
+            event = self.get()
+            if event is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                event = self.get()
+            return event
+        finally:
+            with self._lock:
+                self._waiter = None
+
+    def close(self):
+        self._bus._unsubscribe(self)
+
+
+class _LocalFanout:
+    """Subscriptions of this process, keyed by channel"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            first = channel not in self._subscribers
+            self._subscribers.setdefault(channel, set()).add(subscription)
+            if first:
+                self._channel_added(channel)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+                    self._channel_removed(subscription.channel)
+
+    def _dispatch(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def _channel_added(self, channel):
+        pass
+
+    def _channel_removed(self, channel):
+        pass
+
+
+class InMemoryEventBus(_LocalFanout):
+    """
+    Process-local pub/sub.
+    Only delivers events published from the same process, which covers local
+    development and work running inside the API process.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._last_events = {}
+
+    def publish(self, channel, event):
+        with self._lock:
+            self._last_events[channel] = (time.time(), event)
+        self._dispatch(channel, event)
+
+    def last_event(self, channel):
+        with self._lock:
+            entry = self._last_events.get(channel)
+        if entry and time.time() - entry[0] < LAST_EVENT_TTL_SECONDS:
+            return entry[1]
+        return None
+
+
+class RedisEventBus(_LocalFanout):
+    """
+    Pub/sub over Redis (or any Redis-protocol server), shared by the API and the worker.
+    Each process holds a single Redis subscription connection, owned by one
+    listener thread that fans events out to the local subscriptions, so open
+    streams don't each need a socket. redis-py's PubSub isn't thread-safe: all
+    of its I/O happens on the listener thread, which brings the connection's
+    channels in line with the local subscriptions whenever they change.
+    """
+
+    def __init__(self, url):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("NOTIFICATION_BACKEND=redis requires the 'redis' package")
+        self._redis = redis.Redis.from_url(url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._changed = threading.Event()
+        self._synced = threading.Condition()
+        self._listening = set()  # channels subscribed on the connection (listener thread only)
+        self._listener = None
+
+    def publish(self, channel, event):
+        payload = json.dumps(event)
+        self._redis.set(f"{channel}:last", payload, ex=LAST_EVENT_TTL_SECONDS)
+        self._redis.publish(channel, payload)
+
+    def last_event(self, channel):
+        payload = self._redis.get(f"{channel}:last")
+        return json.loads(payload) if payload else None
+
+    def subscribe(self, channel):
+        """
+        Subscribe and wait until the connection listens on the channel, so every
+        event published afterwards is delivered. Blocks: call it off the event loop.
+        """
+        subscription = super().subscribe(channel)
+        with self._synced:
+            if not self._synced.wait_for(lambda: channel in self._listening, REDIS_SUBSCRIBE_TIMEOUT_SECONDS):
+                print(f"Warning: Redis subscription to {channel} not confirmed yet")
+        return subscription
+
+    def _channel_added(self, channel):
+        self._changed.set()
+        if self._listener is None:
+            self._listener = threading.Thread(target=self._listen, name="redis-events", daemon=True)
+            self._listener.start()
+
+    def _channel_removed(self, channel):
+        self._changed.set()
+
+    def _sync_channels(self):
+        with self._lock:
+            wanted = set(self._subscribers)
+        added = wanted - self._listening
+        removed = self._listening - wanted
+        if added:
+            self._pubsub.subscribe(*added)
+        if removed:
+            self._pubsub.unsubscribe(*removed)
+        with self._synced:
+            self._listening = wanted
+            self._synced.notify_all()
+
+    def _listen(self):
+        while True:
+            if not self._listening:
+                # Nothing to read without subscriptions
+                self._changed.wait()
+            try:
+                if self._changed.is_set():
+                    self._changed.clear()
+                    self._sync_channels()
+                if not self._listening:
+                    continue
+                # Short timeout: channel changes are applied between reads
+                message = self._pubsub.get_message(timeout=REDIS_LISTEN_TIMEOUT_SECONDS)
+            except Exception as e:
+                # redis-py reconnects and resubscribes on the next call
+                print(f"Error reading Redis events: {e}")
+                self._changed.set()
+                time.sleep(1)
+                continue
+            if not message or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode("utf-8")
+            try:
+                self._dispatch(channel, json.loads(message["data"]))
+            except ValueError as e:
+                print(f"Ignoring malformed event on {channel}: {e}")
+
+
+_event_bus = None
+_event_bus_lock = threading.Lock()
+
+def get_event_bus():
+    """Return the process-wide event bus for the configured backend"""
+    global _event_bus
+    if _event_bus is None:
+        with _event_bus_lock:
+            if _event_bus is None:
+                if NOTIFICATION_BACKEND == "redis":
+                    _event_bus = RedisEventBus(REDIS_URL or "redis://localhost:6379/0")
+                else:
+                    _event_bus = InMemoryEventBus()
+    return _event_bus
+
+def video_channel(video_id):
+    return f"video:{video_id}"
+
+def video_status_event(video_id, status, stage=None, detail=None):
+    """Build a status event; stage defaults to the status itself"""
+    stage = stage or status
+    return {
+        "video_id": video_id,
+        "status": status,
+        "stage": stage,
+        "progress": VIDEO_STAGES.get(stage),
+        "detail": detail,
+        "timestamp": time.time(),
+    }
+
+def publish_video_status(video_id, status, stage=None, detail=None):
+    """
+    Publish a video status/stage transition.
+    Notification failures are logged and never interrupt processing.
+    """
+    try:
+        get_event_bus().publish(video_channel(video_id), video_status_event(video_id, status, stage, detail))
+    except Exception as e:
+        print(f"Warning: could not publish status for video {video_id}: {e}")
+
+def format_sse(data, event=None):
+    """Serialize one Server-Sent Events message"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data, default=str)}\n\n"
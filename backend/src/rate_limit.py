@@ -0,0 +1,49 @@
+import time
+import threading
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`, holding
+    at most `capacity` tokens (defaults to one minute's worth, i.e. the burst size).
+
+    Callers reserve tokens up front and then sleep until the reservation is
+    covered, so waiters are served in arrival order. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity or rate_per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """Take `amount` tokens and return how many seconds to wait before using them"""
+        if self.rate_per_minute <= 0:
+            return 0.0
+
+        # A request larger than the bucket could otherwise never be served
+        amount = min(amount, self.capacity)
+        rate = self.rate_per_minute / 60.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / rate)
+
+    def available(self):
+        """Tokens currently in the bucket (negative while reservations are outstanding)"""
+        if self.rate_per_minute <= 0:
+            return float("inf")
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return min(self.capacity, self._tokens + elapsed * self.rate_per_minute / 60.0)
+
+    def acquire(self, amount=1):
+        """Block until `amount` tokens are available; returns the seconds waited"""
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,99 @@
+# Background removal of stored artifacts whose rows were deleted
+import os
+import time
+import datetime
+
+from database import SessionLocal, PendingDeletion, Transcript, Flashcard, Quiz
+from storage import delete_paths
+
+REAPER_INTERVAL_SECONDS = int(os.getenv("REAPER_INTERVAL_SECONDS", "60"))
+# Also reap a delete request's own files in the API process once it has been answered.
+# Never under Lambda: Mangum waits for background tasks before returning the response
+REAP_AFTER_DELETE = (
+    os.getenv("REAP_AFTER_DELETE", "false").lower() == "true"
+    and not os.getenv("AWS_LAMBDA_FUNCTION_NAME")
+)
+# Pending deletions handled per pass (S3 keys are sent 1000 per DeleteObjects call)
+REAPER_BATCH_SIZE = int(os.getenv("REAPER_BATCH_SIZE", "5000"))
+# Failed deletions are retried with exponential backoff, then left for inspection
+REAPER_MAX_ATTEMPTS = int(os.getenv("REAPER_MAX_ATTEMPTS", "10"))
+REAPER_BACKOFF_BASE_SECONDS = 60
+REAPER_BACKOFF_MAX_SECONDS = 6 * 3600
+# Rows whose file_path may point at a stored artifact
+ARTIFACT_MODELS = (Transcript, Flashcard, Quiz)
+
+
+def referenced_paths(db, paths):
+    """The paths that a Transcript, Flashcard or Quiz row still points at"""
+    referenced = set()
+    for model in ARTIFACT_MODELS:
+        referenced.update(
+            file_path for (file_path,) in db.query(model.file_path).filter(model.file_path.in_(paths))
+        )
+    return referenced
+
+def reap_pending_deletions(limit=REAPER_BATCH_SIZE, paths=None):
+    """
+    Delete due artifacts in batches, only those of `paths` when given; returns
+    (resolved, failed) where resolved counts deletions done or dropped because
+    the path is in use again
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.datetime.utcnow()
+        query = db.query(PendingDeletion).filter(
+            PendingDeletion.next_attempt_at <= now,
+            PendingDeletion.attempts < REAPER_MAX_ATTEMPTS
+        )
+        if paths is not None:
+            query = query.filter(PendingDeletion.file_path.in_(paths))
+        rows = query.order_by(PendingDeletion.id).limit(limit).all()
+        if not rows:
+            return 0, 0
+
+        # Keys are deterministic, so a path may be live again (video re-added,
+        # set grown back from inline): those deletions are dropped, not performed
+        paths = list(dict.fromkeys(row.file_path for row in rows))
+        referenced = referenced_paths(db, paths)
+        skipped = [row for row in rows if row.file_path in referenced]
+        if skipped:
+            print(f"Reaper skipping {len(referenced)} artifacts that are in use again")
+            for row in skipped:
+                db.delete(row)
+            rows = [row for row in rows if row.file_path not in referenced]
+
+        # Each backend deletes its share in batches (S3: DeleteObjects)
+        failed = delete_paths([path for path in paths if path not in referenced])
+        errors = {row.id: failed[row.file_path] for row in rows if row.file_path in failed}
+
+        for row in rows:
+            if row.id not in errors:
+                db.delete(row)
+                continue
+            row.attempts = (row.attempts or 0) + 1
+            row.last_error = errors[row.id]
+            delay = min(REAPER_BACKOFF_MAX_SECONDS, REAPER_BACKOFF_BASE_SECONDS * 2 ** (row.attempts - 1))
+            row.next_attempt_at = now + datetime.timedelta(seconds=delay)
+            if row.attempts >= REAPER_MAX_ATTEMPTS:
+                print(f"Giving up deleting {row.file_path}: {row.last_error}")
+        db.commit()
+
+        deleted = len(rows) - len(errors)
+        print(f"Reaper deleted {deleted} artifacts ({len(errors)} failed)")
+        return deleted + len(skipped), len(errors)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def run_reaper():
+    """Reap forever: back to back while there is a backlog, otherwise every REAPER_INTERVAL_SECONDS"""
+    while True:
+        try:
+            deleted, failed = reap_pending_deletions()
+            if deleted + failed >= REAPER_BATCH_SIZE:
+                continue
+        except Exception as e:
+            print(f"Error in reaper loop: {e}")
+        time.sleep(REAPER_INTERVAL_SECONDS)
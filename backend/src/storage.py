@@ -0,0 +1,432 @@
+# Artifact storage behind one interface: S3, the local filesystem, or process memory.
+# Stored paths carry their backend: s3://bucket/key, memory://key, anything else is local.
+import os
+import json
+import asyncio
+import hashlib
+import threading
+import functools
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from utils import (
+    s3, S3_BUCKET_NAME, USE_S3, S3_MAX_POOL_CONNECTIONS, COMPRESSIBLE_CONTENT_TYPES,
+    compress_body, decompress_body, parse_s3_uri
+)
+
+# Backend new artifacts are written to: 's3', 'local' or 'memory' (single process, for tests)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3" if USE_S3 else "local").lower()
+# In Lambda, we must use /tmp
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "/tmp/downloads")
+# Read-through disk cache in front of S3 for long-running processes (empty disables it)
+STORAGE_DISK_CACHE_DIR = os.getenv("STORAGE_DISK_CACHE_DIR", "")
+STORAGE_DISK_CACHE_MAX_BYTES = int(os.getenv("STORAGE_DISK_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Codecs browsers decode from Content-Encoding; others (zstd) are recorded in metadata only
+BROWSER_CODECS = {"gzip"}
+# DeleteObjects accepts at most this many keys per call
+S3_DELETE_BATCH_SIZE = 1000
+# Threads for concurrent/offloaded storage calls (defaults to one per pooled S3 connection)
+STORAGE_IO_CONCURRENCY = int(os.getenv("STORAGE_IO_CONCURRENCY", str(S3_MAX_POOL_CONNECTIONS)))
+
+
+class DiskCache:
+    """
+    Size-bounded, content-addressed cache of decoded S3 objects on local disk.
+
+    Blobs are stored once per content hash (identical transcripts share one
+    file); a small index entry per path records the object's ETag so a read can
+    be revalidated with a conditional GET instead of downloading the object.
+    Least recently used blobs are evicted beyond max_bytes. Blob sizes and
+    recency are tracked in memory; the directory is only scanned at startup.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.blob_dir = os.path.join(directory, "blobs")
+        self.index_dir = os.path.join(directory, "index")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._blobs = OrderedDict()  # digest -> size, least recently used first
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._scan()
+
+    def _scan(self):
+        """Pick up blobs left by a previous run, least recently used (oldest mtime) first"""
+        blobs = []
+        for entry in os.scandir(self.blob_dir):
+            if entry.name.endswith(".tmp"):
+                continue
+            stat = entry.stat()
+            blobs.append((stat.st_mtime, entry.name, stat.st_size))
+        with self._lock:
+            for _, digest, size in sorted(blobs):
+                self._blobs[digest] = size
+                self._bytes += size
+            self._evict()
+
+    def _index_path(self, path):
+        return os.path.join(self.index_dir, hashlib.sha1(path.encode("utf-8")).hexdigest())
+
+    def lookup(self, path):
+        """(etag, blob path) cached for a path, or None"""
+        try:
+            with open(self._index_path(path), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        blob_path = os.path.join(self.blob_dir, entry["digest"])
+        return (entry["etag"], blob_path) if os.path.exists(blob_path) else None
+
+    def read(self, blob_path):
+        """Content of a blob, marking it recently used; None if it was evicted meanwhile"""
+        try:
+            # The mtime orders blobs by recency for the next startup scan
+            os.utime(blob_path)
+            with open(blob_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            digest = os.path.basename(blob_path)
+            if digest in self._blobs:
+                self._blobs.move_to_end(digest)
+            self.hits += 1
+        return data
+
+    def store(self, path, etag, data):
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = os.path.join(self.blob_dir, digest)
+        try:
+            if not os.path.exists(blob_path):
+                # Write then rename, so readers never see a partial blob
+                temp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, blob_path)
+            index_temp = f"{self._index_path(path)}.{threading.get_ident()}.tmp"
+            with open(index_temp, "w", encoding="utf-8") as f:
+                json.dump({"etag": etag, "digest": digest}, f)
+            os.replace(index_temp, self._index_path(path))
+        except OSError as e:
+            print(f"Disk cache write failed: {e}")
+            return
+
+        with self._lock:
+            self.misses += 1
+            if digest in self._blobs:
+                self._blobs.move_to_end(digest)
+            else:
+                self._blobs[digest] = len(data)
+                self._bytes += len(data)
+            self._evict()
+
+    def forget(self, path):
+        try:
+            os.remove(self._index_path(path))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Remove least recently used blobs beyond max_bytes (caller holds the lock)"""
+        # Index entries of evicted blobs are ignored by lookup() and overwritten later
+        while self._bytes > self.max_bytes and self._blobs:
+            digest, size = self._blobs.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(os.path.join(self.blob_dir, digest))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "blobs": len(self._blobs),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class S3Storage:
+    """S3 bucket; text artifacts are compressed (see utils.compress_body)"""
+
+    scheme = "s3"
+
+    def __init__(self, bucket, disk_cache=None):
+        self.bucket = bucket
+        self.disk_cache = disk_cache
+
+    def path_for(self, key):
+        return f"s3://{self.bucket}/{key}"
+
+    def write(self, key, data, content_type):
+        body, codec = compress_body(data)
+        params = {'Bucket': self.bucket, 'Key': key, 'Body': body, 'ContentType': content_type}
+        if codec:
+            params['Metadata'] = {'codec': codec}
+            if codec in BROWSER_CODECS:
+                # Lets browsers decode presigned downloads transparently
+                params['ContentEncoding'] = codec
+        try:
+            s3.put_object(**params)
+        except Exception as e:
+            print(f"Error uploading to S3: {e}")
+            raise
+        path = self.path_for(key)
+        if self.disk_cache:
+            self.disk_cache.forget(path)
+        return path, codec or 'identity'
+
+    def write_file(self, local_path, key):
+        content_type = COMPRESSIBLE_CONTENT_TYPES.get(os.path.splitext(local_path)[1].lower())
+        if content_type:
+            with open(local_path, 'rb') as f:
+                return self.write(key, f.read(), content_type)
+        # Other files (e.g. media) are uploaded as they are, multipart when large
+        try:
+            s3.upload_file(local_path, self.bucket, key)
+        except Exception as e:
+            print(f"Error uploading to S3: {e}")
+            raise
+        return self.path_for(key), 'identity'
+
+    def stat(self, path):
+        """(size in bytes, content type) of a stored object, from a HEAD request"""
+        bucket, key = parse_s3_uri(path)
+        response = s3.head_object(Bucket=bucket, Key=key)
+        return response['ContentLength'], response.get('ContentType')
+
+    def copy(self, path, key):
+        """Server-side copy of a stored object to key in this bucket; returns the new path"""
+        bucket, source_key = parse_s3_uri(path)
+        try:
+            s3.copy_object(Bucket=self.bucket, Key=key, CopySource={'Bucket': bucket, 'Key': source_key})
+        except Exception as e:
+            print(f"Error copying in S3: {e}")
+            raise
+        new_path = self.path_for(key)
+        if self.disk_cache:
+            self.disk_cache.forget(new_path)
+        return new_path
+
+    def codec(self, path):
+        """Compression codec an object was stored with, or None for plain content"""
+        bucket, key = parse_s3_uri(path)
+        response = s3.head_object(Bucket=bucket, Key=key)
+        return response.get('Metadata', {}).get('codec') or response.get('ContentEncoding')
+
+    def read(self, path):
+        if not USE_S3:
+            raise Exception("S3 not configured but file path is S3 URI")
+        bucket, key = parse_s3_uri(path)
+
+        cached = self.disk_cache.lookup(path) if self.disk_cache else None
+        params = {'Bucket': bucket, 'Key': key}
+        if cached:
+            params['IfNoneMatch'] = cached[0]
+        try:
+            response = s3.get_object(**params)
+        except ClientError as e:
+            if cached and e.response.get('Error', {}).get('Code') in ('304', 'NotModified'):
+                data = self.disk_cache.read(cached[1])
+                if data is not None:
+                    return data
+                response = s3.get_object(Bucket=bucket, Key=key)
+            else:
+                print(f"Error reading from S3: {e}")
+                raise
+
+        # Objects stored before compression have no codec and are plain UTF-8
+        codec = response.get('Metadata', {}).get('codec') or response.get('ContentEncoding')
+        data = decompress_body(response['Body'].read(), codec)
+        if self.disk_cache:
+            self.disk_cache.store(path, response['ETag'], data)
+        return data
+
+    def delete_many(self, paths):
+        """Batched DeleteObjects per bucket; returns {path: error} for failures"""
+        if not USE_S3:
+            return {path: "S3 not configured" for path in paths}
+        keys_by_bucket = defaultdict(dict)
+        failed = {}
+        for path in paths:
+            try:
+                bucket, key = parse_s3_uri(path)
+            except ValueError as e:
+                failed[path] = str(e)
+                continue
+            keys_by_bucket[bucket][key] = path
+            if self.disk_cache:
+                self.disk_cache.forget(path)
+
+        for bucket, paths_by_key in keys_by_bucket.items():
+            keys = list(paths_by_key)
+            for start in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+                batch = keys[start:start + S3_DELETE_BATCH_SIZE]
+                try:
+                    response = s3.delete_objects(
+                        Bucket=bucket,
+                        Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                    )
+                except Exception as e:
+                    print(f"Error deleting from S3: {e}")
+                    failed.update({paths_by_key[key]: str(e) for key in batch})
+                    continue
+                for error in response.get('Errors', []):
+                    failed[paths_by_key[error['Key']]] = f"{error.get('Code')}: {error.get('Message')}"
+        return failed
+
+
+class LocalStorage:
+    """Files under a root directory (local development, or no S3 configured)"""
+
+    scheme = "local"
+
+    def __init__(self, root):
+        self.root = root
+
+    def path_for(self, key):
+        return os.path.join(self.root, key)
+
+    def write(self, key, data, content_type):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path, 'identity'
+
+    def write_file(self, local_path, key):
+        path = self.path_for(key)
+        if os.path.abspath(local_path) != os.path.abspath(path):
+            with open(local_path, 'rb') as f:
+                self.write(key, f.read(), None)
+        return path, 'identity'
+
+    def read(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"File not found: {path}")
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def delete_many(self, paths):
+        failed = {}
+        for path in paths:
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except Exception as e:
+                failed[path] = str(e)
+        return failed
+
+
+class MemoryStorage:
+    """Objects in a dict of this process; lets the API run without S3 or a writable disk"""
+
+    scheme = "memory"
+
+    def __init__(self):
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, key):
+        return f"memory://{key}"
+
+    def write(self, key, data, content_type):
+        with self._lock:
+            self._objects[key] = data
+        return self.path_for(key), 'identity'
+
+    def write_file(self, local_path, key):
+        with open(local_path, 'rb') as f:
+            return self.write(key, f.read(), None)
+
+    def read(self, path):
+        with self._lock:
+            data = self._objects.get(path[len("memory://"):])
+        if data is None:
+            raise FileNotFoundError(f"File not found: {path}")
+        return data
+
+    def delete_many(self, paths):
+        with self._lock:
+            for path in paths:
+                self._objects.pop(path[len("memory://"):], None)
+        return {}
+
+
+_disk_cache = DiskCache(STORAGE_DISK_CACHE_DIR, STORAGE_DISK_CACHE_MAX_BYTES) if STORAGE_DISK_CACHE_DIR else None
+_backends = {
+    "s3": S3Storage(S3_BUCKET_NAME, _disk_cache),
+    "local": LocalStorage(STORAGE_LOCAL_ROOT),
+    "memory": MemoryStorage(),
+}
+if STORAGE_BACKEND not in _backends:
+    raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+
+def default_storage():
+    """Backend new artifacts are written to"""
+    return _backends[STORAGE_BACKEND]
+
+def storage_for(path):
+    """Backend holding a stored path"""
+    if path.startswith("s3://"):
+        return _backends["s3"]
+    if path.startswith("memory://"):
+        return _backends["memory"]
+    return _backends["local"]
+
+def write_content(content, key, content_type='text/plain; charset=utf-8'):
+    """
+    Store str or bytes under key in the default backend; returns (stored path, codec),
+    the codec ('identity' when stored as is) to be kept on the artifact's row
+    """
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    return default_storage().write(key, data, content_type)
+
+def write_file(local_path, key):
+    """Store a local file under key in the default backend; returns (stored path, codec)"""
+    return default_storage().write_file(local_path, key)
+
+def read_bytes(path):
+    return storage_for(path).read(path)
+
+def read_text(path):
+    return read_bytes(path).decode('utf-8')
+
+def delete_paths(paths):
+    """Delete stored paths from whichever backends hold them; returns {path: error} for failures"""
+    paths_by_backend = defaultdict(list)
+    for path in paths:
+        paths_by_backend[storage_for(path)].append(path)
+
+    failed = {}
+    for backend, backend_paths in paths_by_backend.items():
+        failed.update(backend.delete_many(backend_paths))
+    return failed
+
+# Storage calls block on the network; they run here so they overlap with each other and
+# never on the API event loop. Functions running in this pool must not call map_io (deadlock).
+_io_pool = ThreadPoolExecutor(max_workers=STORAGE_IO_CONCURRENCY, thread_name_prefix="storage-io")
+
+def submit_io(func, *args):
+    """Start a storage call in the background; returns its Future"""
+    return _io_pool.submit(func, *args)
+
+def map_io(func, items):
+    """func(item) for every item concurrently, results in order; the first error is raised"""
+    return list(_io_pool.map(func, items))
+
+async def run_io(func, *args):
+    """Await a blocking storage call (or a function doing one) without blocking the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(_io_pool, functools.partial(func, *args))
+
+def disk_cache_stats():
+    """Size and hit rate of the S3 disk cache, or None when it is disabled"""
+    return _disk_cache.stats() if _disk_cache else None
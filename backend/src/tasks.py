@@ -0,0 +1,413 @@
+# Study-material work shared by the API endpoints, the job runner and bulk generation
+import os
+import re
+import json
+import uuid
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from database import SessionLocal, User, Video, Transcript, Flashcard, Quiz, add_pending_deletion
+from storage import write_content, read_text, storage_for
+from utils import S3_BUCKET_NAME
+from cache import (
+    read_artifact, artifact_version, invalidate_artifact, encode_inline_payload, ARTIFACT_INLINE_MAX_BYTES
+)
+from translator.translator import Translator
+from generator.flashcard_generator import FlashcardGenerator
+from generator.quiz_generator import QuizGenerator
+from generator.generation_cache import get_or_generate, stream_or_generate
+
+
+class NotFoundError(Exception):
+    """A user, video or transcript needed by a task does not exist"""
+
+
+def find_user_video(db, user_email, video_id):
+    """Return (user, video), making sure the video belongs to the user"""
+    user = db.query(User).filter(User.email == user_email).first()
+    if not user:
+        raise NotFoundError("User not found")
+
+    video = db.query(Video).filter(Video.id == video_id, Video.user_id == user.id).first()
+    if not video:
+        raise NotFoundError("Video not found")
+
+    return user, video
+
+def find_original_transcript(db, video):
+    """Earliest transcript of a video, i.e. the one produced by the worker"""
+    return db.query(Transcript).filter(
+        Transcript.video_id == video.id
+    ).order_by(Transcript.created_at).first()
+
+def read_transcript_text(transcript):
+    """Read transcript content using helper that handles S3 or local"""
+    try:
+        return read_artifact(transcript.file_path, artifact_version(transcript))
+    except Exception as e:
+        raise NotFoundError(f"Could not read transcript file: {e}")
+
+# Largest flashcard set / quiz accepted through a presigned upload
+ARTIFACT_UPLOAD_MAX_BYTES = int(os.getenv("ARTIFACT_UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Saved study material kinds: DB model, S3 prefix and file name per language
+ARTIFACT_KINDS = {
+    "flashcards": (Flashcard, "flashcards", "flashcards_{language}.json"),
+    "quiz": (Quiz, "quizzes", "quiz_{language}.json"),
+}
+
+def artifact_s3_key(kind, user_id, video_id, language):
+    """Storage key of a saved flashcard set / quiz"""
+    _, prefix, filename = ARTIFACT_KINDS[kind]
+    return f"{prefix}/{user_id}/{video_id}/{filename.format(language=language)}"
+
+def artifact_upload_prefix(kind, user_id, video_id):
+    """Staging prefix for presigned uploads of a video's flashcard sets / quizzes"""
+    _, prefix, _ = ARTIFACT_KINDS[kind]
+    return f"{prefix}/{user_id}/{video_id}/uploads/"
+
+def artifact_upload_key(kind, user_id, video_id):
+    """
+    Fresh staging key for one presigned upload. Uploads never go to the live key:
+    they only replace what users see once confirmed and validated.
+    """
+    return f"{artifact_upload_prefix(kind, user_id, video_id)}{uuid.uuid4().hex}.json"
+
+def promote_artifact_upload(db, user, video, kind, language, upload_key):
+    """
+    Validate a staged presigned upload and make it the video's flashcard set /
+    quiz for the language. Checked with a HEAD request only: uploads that fit
+    inline are read and stored in the row like any other save, larger ones are
+    copied to the live key inside S3, so their bytes never pass through the API.
+    The staging object is handed to the deletion reaper.
+    Raises ValueError for a key or object that isn't acceptable, NotFoundError
+    if nothing was uploaded. Returns (record, stored_path).
+    """
+    prefix = artifact_upload_prefix(kind, user.email, video.id)
+    # Only the client's own staging keys, as handed out by artifact_upload_key
+    if not upload_key.startswith(prefix) or not re.fullmatch(r"[0-9a-f]{32}\.json", upload_key[len(prefix):]):
+        raise ValueError("Invalid upload key")
+
+    upload_path = f"s3://{S3_BUCKET_NAME}/{upload_key}"
+    backend = storage_for(upload_path)
+    try:
+        size, content_type = backend.stat(upload_path)
+    except Exception as e:
+        raise NotFoundError(f"Upload not found in storage: {e}")
+
+    if (content_type or "").split(";")[0].strip() != "application/json":
+        raise ValueError(f"Upload must be application/json, not {content_type}")
+    if size > ARTIFACT_UPLOAD_MAX_BYTES:
+        raise ValueError(f"Upload is larger than {ARTIFACT_UPLOAD_MAX_BYTES} bytes")
+
+    model = ARTIFACT_KINDS[kind][0]
+    if size <= ARTIFACT_INLINE_MAX_BYTES:
+        # Small enough to read: validate the body and store it like a regular save
+        try:
+            items = json.loads(read_text(upload_path))
+        except ValueError as e:
+            raise ValueError(f"Upload is not valid JSON: {e}")
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise ValueError("Upload must be a JSON list of objects")
+        stored_path, codec, payload = store_artifact_content(user, video, kind, language, items)
+    else:
+        # Uploaded through a presigned PUT, so stored as is
+        stored_path, codec, payload = backend.copy(upload_path, artifact_s3_key(kind, user.email, video.id, language)), 'identity', None
+    record = upsert_artifact_record(db, model, video, user, language, stored_path, payload=payload, codec=codec)
+
+    invalidate_artifact(upload_path)
+    add_pending_deletion(db, upload_path)
+    db.commit()
+    return record, stored_path
+
+def upsert_artifact_record(db, model, video, user, language, stored_path, payload=None, codec=None):
+    """
+    Point the video's Flashcard/Quiz row for a language at stored_path, written
+    with `codec` (or store `payload` inline when stored_path is None), creating
+    the row if needed.
+    """
+    existing = db.query(model).filter(
+        model.video_id == video.id,
+        model.language == language
+    ).first()
+
+    invalidate_artifact(stored_path)
+    if existing:
+        # Update existing
+        invalidate_artifact(existing.file_path)
+        if existing.file_path and existing.file_path != stored_path:
+            # e.g. a set that now fits inline: its old file is no longer referenced
+            add_pending_deletion(db, existing.file_path)
+        existing.file_path = stored_path
+        existing.codec = codec
+        existing.payload = payload
+        existing.created_at = datetime.datetime.utcnow() # Update timestamp
+        db.commit()
+        db.refresh(existing)
+        print(f"Updated existing {model.__tablename__} for video {video.id} lang {language}")
+        return existing
+
+    # Create new
+    record = model(
+        video_id=video.id,
+        user_id=user.id,
+        language=language,
+        file_path=stored_path,
+        codec=codec,
+        payload=payload
+    )
+    db.add(record)
+    db.commit()
+    db.refresh(record)
+    print(f"Created new {model.__tablename__} for video {video.id} lang {language}")
+    return record
+
+def store_artifact_content(user, video, kind, language, items):
+    """
+    Store a flashcard set / quiz without touching the database; returns
+    (stored_path, codec, payload). Small sets become a compressed payload for
+    the row itself; larger ones JSON files in the storage backend.
+    """
+    payload = encode_inline_payload(items)
+    if len(payload) <= ARTIFACT_INLINE_MAX_BYTES:
+        return None, None, payload
+
+    content = json.dumps(items, indent=2, ensure_ascii=False)
+    stored_path, codec = write_content(content, artifact_s3_key(kind, user.email, video.id, language), 'application/json')
+    return stored_path, codec, None
+
+def save_artifact(db, user, video, kind, language, items):
+    """
+    Save a flashcard set / quiz and point the video's row for the language at it.
+    Returns the stored path (None when stored inline).
+    """
+    model = ARTIFACT_KINDS[kind][0]
+    stored_path, codec, payload = store_artifact_content(user, video, kind, language, items)
+    upsert_artifact_record(db, model, video, user, language, stored_path, payload=payload, codec=codec)
+    return stored_path
+
+def translate_transcript_for_video_multi(db, user, video, target_languages):
+    """
+    Translate the original transcript of a video into several languages at once.
+
+    The source is read and segmented once, every language is translated
+    concurrently (chunks still share the translation pool and rate limit),
+    results are uploaded in parallel and all Transcript rows are upserted in a
+    single commit. Any failed language fails the whole call.
+    """
+    target_languages = list(dict.fromkeys(target_languages))
+    if not target_languages:
+        raise ValueError("No target languages given")
+
+    # Get original transcript from database (earliest transcript for this video)
+    original_transcript = find_original_transcript(db, video)
+    if not original_transcript:
+        raise NotFoundError("Original transcript not found in database")
+
+    transcript_path = original_transcript.file_path
+    content = read_transcript_text(original_transcript)
+
+    # Detected by the worker; lets engines be chosen per language pair
+    source_language = original_transcript.language or "auto"
+    translator = Translator()
+    header, segmented = translator.split_transcript(content)
+
+    name, ext = os.path.splitext(os.path.basename(transcript_path))
+
+    def translate_one(language):
+        print(f"Translating {transcript_path} to {language}...")
+        translated = translator.join_transcript(header, segmented, translator.translate_segmented(segmented, language, source_language))
+        return language, write_content(translated, f"transcripts/{user.email}/{name}_{language}{ext}")
+
+    with ThreadPoolExecutor(max_workers=len(target_languages), thread_name_prefix="translate-fanout") as pool:
+        translations = dict(pool.map(translate_one, target_languages))
+
+    upsert_translations(db, user, video, translations)
+
+    return {
+        "message": "Translation successful",
+        "original_transcript": transcript_path,
+        "translations": {language: translated_path for language, (translated_path, _) in translations.items()}
+    }
+
+def upsert_translations(db, user, video, translations):
+    """
+    Point the video's Transcript rows at translated files ({language: (path, codec)})
+    in one transaction
+    """
+    existing = {
+        transcript.language: transcript
+        for transcript in db.query(Transcript).filter(
+            Transcript.video_id == video.id,
+            Transcript.language.in_(list(translations))
+        ).all()
+    }
+    for language, (translated_path, codec) in translations.items():
+        existing_transcript = existing.get(language)
+        if not existing_transcript:
+            db.add(Transcript(
+                video_id=video.id,
+                user_id=user.id,
+                language=language,
+                file_path=translated_path,
+                codec=codec
+            ))
+        else:
+            # Update existing path. It is usually the same key, so no column would
+            # change: bump updated_at explicitly so the ETag moves with the content
+            invalidate_artifact(existing_transcript.file_path)
+            existing_transcript.file_path = translated_path
+            existing_transcript.codec = codec
+            existing_transcript.updated_at = datetime.datetime.utcnow()
+    db.commit()
+
+    for translated_path, _ in translations.values():
+        invalidate_artifact(translated_path)
+
+def translate_transcript_for_video(db, user, video, target_language):
+    """Translate the original transcript of a video and store it as a new Transcript"""
+    result = translate_transcript_for_video_multi(db, user, video, [target_language])
+    return {
+        "message": result["message"],
+        "original_transcript": result["original_transcript"],
+        "translated_transcript": result["translations"][target_language],
+        "language": target_language
+    }
+
+def stream_translation_for_video(db, user, video, target_language):
+    """
+    Iterator of the translated transcript, piece by piece as translation
+    progresses (see Translator.iter_translate_content). The source is read
+    with `db` up front; once the last piece is out the translation is stored
+    and its Transcript row upserted through a session of its own, so the
+    caller's can be closed while the iterator is consumed.
+    """
+    original_transcript = find_original_transcript(db, video)
+    if not original_transcript:
+        raise NotFoundError("Original transcript not found in database")
+
+    content = read_transcript_text(original_transcript)
+    source_language = original_transcript.language or "auto"
+    name, ext = os.path.splitext(os.path.basename(original_transcript.file_path))
+
+    def pieces():
+        translated = []
+        for piece in Translator().iter_translate_content(content, target_language, source_language):
+            translated.append(piece)
+            yield piece
+
+        stored = write_content("".join(translated), f"transcripts/{user.email}/{name}_{target_language}{ext}")
+        session = SessionLocal()
+        try:
+            upsert_translations(session, user, video, {target_language: stored})
+        finally:
+            session.close()
+
+    return pieces()
+
+def find_flashcard_transcript(db, video, language):
+    """Transcript text to generate flashcards from"""
+    # Get transcript (prefer requested language, fallback to original)
+    transcript = db.query(Transcript).filter(
+        Transcript.video_id == video.id,
+        Transcript.language == language
+    ).first()
+
+    if not transcript:
+        # Fallback to the original transcript if specific language not found
+        transcript = find_original_transcript(db, video)
+
+    if not transcript:
+        raise NotFoundError("No transcript found for this video")
+
+    return read_transcript_text(transcript)
+
+def find_quiz_transcript(db, video, language):
+    """Transcript text to generate a quiz from; it must exist in the quiz language"""
+    # Get transcript for the specified language
+    transcript = db.query(Transcript).filter(
+        Transcript.video_id == video.id,
+        Transcript.language == language
+    ).first()
+
+    if not transcript:
+        raise NotFoundError(f"No transcript found for language: {language}")
+
+    return read_transcript_text(transcript)
+
+def quiz_question_to_dict(question):
+    return {
+        "question": question.question,
+        "options": question.options,
+        "correct_answer": question.correct_answer
+    }
+
+def generate_flashcards_for_video(db, video, language, regenerate=False):
+    """
+    Generate flashcards for a video, reusing an earlier generation for the same
+    transcript, language, prompt and model unless regenerate is set.
+    """
+    transcript_text = find_flashcard_transcript(db, video, language)
+
+    generator = FlashcardGenerator()
+    flashcards, cached = get_or_generate(
+        "flashcards",
+        transcript_text,
+        language,
+        generator.generation_version,
+        generator.model,
+        lambda: [fc.dict() for fc in generator.generate_flashcards(transcript_text, language)],
+        regenerate
+    )
+
+    return {"flashcards": flashcards, "cached": cached}
+
+def generate_quiz_for_video(db, video, language, regenerate=False):
+    """
+    Generate a quiz for a video from its transcript in the given language, reusing
+    an earlier generation for the same transcript, language, prompt and model
+    unless regenerate is set.
+    """
+    transcript_text = find_quiz_transcript(db, video, language)
+
+    generator = QuizGenerator()
+    quiz_data, cached = get_or_generate(
+        "quiz",
+        transcript_text,
+        language,
+        generator.generation_version,
+        generator.model,
+        lambda: [quiz_question_to_dict(q) for q in generator.generate_quiz(transcript_text, language)],
+        regenerate
+    )
+
+    return {"quiz": quiz_data, "cached": cached}
+
+def stream_flashcards(transcript_text, language, regenerate=False):
+    """
+    Iterator of flashcard dicts, each yielded as soon as the model finishes it.
+    Goes through the generation cache like generate_flashcards_for_video.
+    """
+    generator = FlashcardGenerator()
+    return stream_or_generate(
+        "flashcards",
+        transcript_text,
+        language,
+        generator.generation_version,
+        generator.model,
+        lambda: (fc.dict() for fc in generator.stream_flashcards(transcript_text, language)),
+        regenerate
+    )
+
+def stream_quiz(transcript_text, language, regenerate=False):
+    """Iterator of quiz question dicts, each yielded as soon as the model finishes it"""
+    generator = QuizGenerator()
+    return stream_or_generate(
+        "quiz",
+        transcript_text,
+        language,
+        generator.generation_version,
+        generator.model,
+        lambda: (quiz_question_to_dict(q) for q in generator.stream_quiz(transcript_text, language)),
+        regenerate
+    )
@@ -0,0 +1,142 @@
+import os
+import threading
+
+from translator.segmenter import TRANSLATION_MAX_CHUNK_CHARS, SENTENCE_SEPARATOR
+
+# Engine used for language pairs not listed in TRANSLATION_ENGINE_PAIRS
+TRANSLATION_ENGINE = os.getenv("TRANSLATION_ENGINE", "google")
+# Per-pair overrides, e.g. "en:es=argos,en:de=argos,*:fr=google" ('*' matches any language)
+TRANSLATION_ENGINE_PAIRS = os.getenv("TRANSLATION_ENGINE_PAIRS", "")
+
+
+class GoogleEngine:
+    """Google Translate through deep-translator (public internet, rate limited)"""
+
+    name = "google"
+    max_chars = TRANSLATION_MAX_CHUNK_CHARS
+    rate_limited = True
+
+    def __init__(self):
+        # GoogleTranslator keeps per-request state on the instance, so each pool thread gets its own
+        self._local = threading.local()
+
+    def is_available(self, source_lang, target_lang):
+        return True
+
+    def translate(self, text, source_lang, target_lang):
+        from deep_translator import GoogleTranslator
+
+        # The detected source code isn't always one Google accepts; it detects the language itself
+        translators = self._local.__dict__.setdefault("translators", {})
+        if target_lang not in translators:
+            translators[target_lang] = GoogleTranslator(source='auto', target=target_lang)
+        return translators[target_lang].translate(text)
+
+
+class ArgosEngine:
+    """
+    Offline translation on local CPU cores with Argos Translate (OpenNMT models
+    run by CTranslate2). Needs the argostranslate package and the model for the
+    language pair installed; the source language must be known.
+    """
+
+    name = "argos"
+    max_chars = TRANSLATION_MAX_CHUNK_CHARS
+    rate_limited = False
+
+    def __init__(self):
+        self._translations = {}
+        self._lock = threading.Lock()
+
+    def _translation(self, source_lang, target_lang):
+        key = (source_lang, target_lang)
+        with self._lock:
+            if key not in self._translations:
+                try:
+                    import argostranslate.translate
+                except ImportError:
+                    self._translations[key] = None
+                else:
+                    # Models are installed per base language ("zh-cn" -> "zh")
+                    languages = {language.code: language for language in argostranslate.translate.get_installed_languages()}
+                    source = languages.get(source_lang.split("-")[0].lower())
+                    target = languages.get(target_lang.split("-")[0].lower())
+                    self._translations[key] = source.get_translation(target) if source and target else None
+            return self._translations[key]
+
+    def is_available(self, source_lang, target_lang):
+        return source_lang != "auto" and self._translation(source_lang, target_lang) is not None
+
+    def translate(self, text, source_lang, target_lang):
+        translation = self._translation(source_lang, target_lang)
+        if translation is None:
+            raise ValueError(f"No Argos model installed for {source_lang} -> {target_lang}")
+        # Line by line, so packed sentences come back on their own lines
+        return SENTENCE_SEPARATOR.join(
+            translation.translate(line) if line.strip() else line
+            for line in text.split(SENTENCE_SEPARATOR)
+        )
+
+
+class StubEngine:
+    """Deterministic placeholder translation for tests, benchmarks and offline development"""
+
+    name = "stub"
+    max_chars = TRANSLATION_MAX_CHUNK_CHARS
+    rate_limited = False
+
+    def is_available(self, source_lang, target_lang):
+        return True
+
+    def translate(self, text, source_lang, target_lang):
+        return SENTENCE_SEPARATOR.join(
+            f"[{target_lang}] {line}" if line.strip() else line
+            for line in text.split(SENTENCE_SEPARATOR)
+        )
+
+
+TRANSLATION_ENGINES = {
+    "google": GoogleEngine,
+    "argos": ArgosEngine,
+    "stub": StubEngine,
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def get_engine_by_name(name):
+    """Shared instance of an engine"""
+    if name not in TRANSLATION_ENGINES:
+        raise ValueError(f"Unknown translation engine: {name}")
+    with _engines_lock:
+        if name not in _engines:
+            _engines[name] = TRANSLATION_ENGINES[name]()
+        return _engines[name]
+
+def _parse_engine_pairs(value):
+    pairs = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        pair, name = entry.split("=")
+        source_lang, target_lang = pair.split(":")
+        pairs[(source_lang.strip().lower(), target_lang.strip().lower())] = name.strip()
+    return pairs
+
+ENGINE_PAIRS = _parse_engine_pairs(TRANSLATION_ENGINE_PAIRS)
+
+def get_engine(source_lang, target_lang):
+    """
+    Engine for a language pair: the most specific TRANSLATION_ENGINE_PAIRS match,
+    else TRANSLATION_ENGINE. Falls back to the default engine when the selected
+    one can't translate the pair (e.g. no local model installed).
+    """
+    source_lang, target_lang = source_lang.lower(), target_lang.lower()
+    for key in ((source_lang, target_lang), ("*", target_lang), (source_lang, "*")):
+        if key in ENGINE_PAIRS:
+            engine = get_engine_by_name(ENGINE_PAIRS[key])
+            if engine.is_available(source_lang, target_lang):
+                return engine
+            print(f"Translation engine {engine.name} can't translate {source_lang} -> {target_lang}, using {TRANSLATION_ENGINE}")
+            break
+    return get_engine_by_name(TRANSLATION_ENGINE)
@@ -0,0 +1,79 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limit import TokenBucket
+
+# Shared by every translation in this process
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "8"))
+# Requests per minute allowed per translation backend (0 = unlimited)
+TRANSLATION_REQUESTS_PER_MINUTE = int(os.getenv("TRANSLATION_REQUESTS_PER_MINUTE", "300"))
+TRANSLATION_MAX_RETRIES = int(os.getenv("TRANSLATION_MAX_RETRIES", "3"))
+# Most target languages accepted by one multi-language translation
+TRANSLATION_MAX_TARGET_LANGUAGES = int(os.getenv("TRANSLATION_MAX_TARGET_LANGUAGES", "10"))
+TRANSLATION_BACKOFF_BASE_SECONDS = 1.0
+TRANSLATION_BACKOFF_MAX_SECONDS = 20.0
+
+
+class TranslationError(Exception):
+    """A chunk could not be translated after all retries"""
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=TRANSLATION_CONCURRENCY, thread_name_prefix="translate")
+    return _pool
+
+def get_rate_limiter(backend):
+    """Token bucket shared by every translation going to `backend`"""
+    with _rate_limiters_lock:
+        if backend not in _rate_limiters:
+            _rate_limiters[backend] = TokenBucket(TRANSLATION_REQUESTS_PER_MINUTE)
+        return _rate_limiters[backend]
+
+def translate_all(texts, translate_one, backend, rate_limited=True):
+    """
+    Translate `texts` concurrently on the shared pool and return the results in
+    input order.
+
+    `translate_one(text)` is called from pool threads, once per request
+    (retries included), after taking a token from the backend's rate limiter
+    unless `rate_limited` is False (local engines).
+    A chunk that keeps failing raises TranslationError instead of silently
+    keeping the original text.
+    """
+    rate_limiter = get_rate_limiter(backend) if rate_limited else None
+
+    def run(index, text):
+        attempt = 0
+        while True:
+            if rate_limiter:
+                rate_limiter.acquire()
+            try:
+                return translate_one(text)
+            except Exception as e:
+                if attempt >= TRANSLATION_MAX_RETRIES:
+                    raise TranslationError(f"Chunk {index} failed after {attempt + 1} attempts: {e}") from e
+                delay = random.uniform(0, min(TRANSLATION_BACKOFF_MAX_SECONDS, TRANSLATION_BACKOFF_BASE_SECONDS * 2 ** attempt))
+                print(f"Error translating chunk {index} ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    futures = [_get_pool().submit(run, index, text) for index, text in enumerate(texts)]
+    try:
+        return [future.result() for future in futures]
+    except Exception:
+        # Don't spend requests on a translation that already failed
+        for future in futures:
+            future.cancel()
+        raise
@@ -0,0 +1,162 @@
+import os
+import re
+import hashlib
+import datetime
+import threading
+import unicodedata
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal, TranslationMemoryEntry
+
+TRANSLATION_MEMORY_ENABLED = os.getenv("TRANSLATION_MEMORY_ENABLED", "true").lower() == "true"
+# Least recently used segments beyond this many entries are evicted
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "200000"))
+# Keeps IN (...) lists and bulk inserts to a reasonable size
+QUERY_BATCH_SIZE = 500
+
+
+def normalize_segment(text):
+    """Whitespace- and Unicode-normalized form of a segment, so trivial differences still hit"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+def segment_hash(text):
+    return hashlib.sha256(normalize_segment(text).encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Segment-level translation cache in the database, keyed by
+    (normalized source segment hash, source language, target language, backend).
+    """
+
+    def __init__(self, max_entries=TRANSLATION_MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, segments, target_language, backend, source_language="auto"):
+        """Return {index: translation} for the segments found in memory"""
+        hashes = [segment_hash(segment) for segment in segments]
+        found = {}
+
+        db = SessionLocal()
+        try:
+            unique_hashes = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique_hashes), QUERY_BATCH_SIZE):
+                rows = db.query(TranslationMemoryEntry).filter(
+                    TranslationMemoryEntry.segment_hash.in_(unique_hashes[start:start + QUERY_BATCH_SIZE]),
+                    TranslationMemoryEntry.source_language == source_language,
+                    TranslationMemoryEntry.target_language == target_language,
+                    TranslationMemoryEntry.backend == backend
+                ).all()
+                for row in rows:
+                    found[row.segment_hash] = row
+
+            # Refresh recency so frequently reused segments survive eviction
+            if found:
+                ids = [row.id for row in found.values()]
+                for start in range(0, len(ids), QUERY_BATCH_SIZE):
+                    db.query(TranslationMemoryEntry).filter(
+                        TranslationMemoryEntry.id.in_(ids[start:start + QUERY_BATCH_SIZE])
+                    ).update({
+                        "hits": TranslationMemoryEntry.hits + 1,
+                        "last_used_at": datetime.datetime.utcnow()
+                    }, synchronize_session=False)
+                db.commit()
+
+            translations = {
+                index: found[digest].translation
+                for index, digest in enumerate(hashes)
+                if digest in found
+            }
+        except Exception as e:
+            # The memory is an optimization; translate everything on failure
+            print(f"Translation memory lookup failed: {e}")
+            db.rollback()
+            translations = {}
+        finally:
+            db.close()
+
+        with self._lock:
+            self.hits += len(translations)
+            self.misses += len(segments) - len(translations)
+        return translations
+
+    def store(self, segments, translations, target_language, backend, source_language="auto"):
+        """Remember translations of segments, then evict the least recently used entries over the limit"""
+        entries = {}
+        for segment, translation in zip(segments, translations):
+            entries.setdefault(segment_hash(segment), translation)
+        if not entries:
+            return
+
+        db = SessionLocal()
+        try:
+            rows = [
+                TranslationMemoryEntry(
+                    segment_hash=digest,
+                    source_language=source_language,
+                    target_language=target_language,
+                    backend=backend,
+                    translation=translation
+                )
+                for digest, translation in entries.items()
+            ]
+            for start in range(0, len(rows), QUERY_BATCH_SIZE):
+                batch = rows[start:start + QUERY_BATCH_SIZE]
+                try:
+                    db.add_all(batch)
+                    db.commit()
+                except IntegrityError:
+                    # Some segments were stored concurrently: insert the rest one by one
+                    db.rollback()
+                    for row in batch:
+                        try:
+                            db.add(row)
+                            db.commit()
+                        except IntegrityError:
+                            db.rollback()
+
+            self._evict(db)
+        except Exception as e:
+            print(f"Translation memory store failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def stats(self):
+        db = SessionLocal()
+        try:
+            entries = db.query(TranslationMemoryEntry).count()
+        finally:
+            db.close()
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _evict(self, db):
+        excess = db.query(TranslationMemoryEntry).count() - self.max_entries
+        if excess <= 0:
+            return
+
+        oldest = db.query(TranslationMemoryEntry.id).order_by(
+            TranslationMemoryEntry.last_used_at
+        ).limit(excess).all()
+        ids = [row.id for row in oldest]
+        for start in range(0, len(ids), QUERY_BATCH_SIZE):
+            db.query(TranslationMemoryEntry).filter(
+                TranslationMemoryEntry.id.in_(ids[start:start + QUERY_BATCH_SIZE])
+            ).delete(synchronize_session=False)
+        db.commit()
+        print(f"Evicted {len(ids)} translation memory entries")
+
+
+translation_memory = TranslationMemory()
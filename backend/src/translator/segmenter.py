@@ -0,0 +1,177 @@
+import os
+import re
+
+# Characters per translation request; deep-translator rejects Google requests of 5000 or more
+TRANSLATION_MAX_CHUNK_CHARS = int(os.getenv("TRANSLATION_MAX_CHUNK_CHARS", "4900"))
+
+# Sentences inside a chunk are sent one per line so the translation can be split back
+SENTENCE_SEPARATOR = "\n"
+
+# A period after these words does not end a sentence
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "approx",
+    "e.g", "i.e", "cf", "al", "fig", "vol", "inc", "ltd", "corp",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+}
+# Also common sentence-final words: abbreviations only before a number ("No. 5")
+# or a company suffix ("Smith Co. Ltd")
+NUMBER_ABBREVIATIONS = {"no", "nos"}
+COMPANY_ABBREVIATIONS = {"co"}
+COMPANY_SUFFIXES = {"ltd", "inc", "llc", "plc", "corp", "gmbh", "kg", "limited"}
+
+# End punctuation (plus closing quotes/brackets) followed by whitespace, or CJK end punctuation
+_BOUNDARY = re.compile(r"[.!?…]+[\"'”’)\]]*\s+|[。！？]+[」』）]*\s*")
+_LAST_WORD = re.compile(r"(\S+?)[.!?…]+[\"'”’)\]]*$")
+# Capitalized words that usually begin a new sentence; after an initial or a
+# dotted initialism any other capitalized word continues it ("the U.K. Prime Minister")
+SENTENCE_STARTERS = {
+    "a", "an", "the", "this", "that", "these", "those", "there", "then", "it", "its",
+    "i", "you", "he", "she", "we", "they", "my", "your", "his", "her", "our", "their",
+    "but", "and", "so", "or", "if", "when", "while", "what", "why", "how", "where", "who",
+    "in", "on", "at", "for", "after", "before", "as", "however", "now", "today", "yes", "no",
+}
+
+# "U.S", "U.K" (the final period is matched separately)
+_INITIALISM = re.compile(r"(?:[A-Z]\.)+[A-Z]")
+# Another initial: "J. R. R. Tolkien"
+_INITIAL = re.compile(r"[A-Za-z]\.")
+
+
+def split_sentences(text):
+    """
+    Split a paragraph into sentences. Abbreviations, initials and decimal
+    numbers don't end a sentence; CJK full stops do even without a space.
+    """
+    sentences = []
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        end = match.end()
+        candidate = text[start:end].rstrip()
+        word = _LAST_WORD.search(candidate)
+        if word and candidate.endswith(".") and _is_abbreviation(word.group(1), _next_word(text, end)):
+            continue
+        if candidate:
+            sentences.append(candidate)
+        start = end
+
+    rest = text[start:].strip()
+    if rest:
+        sentences.append(rest)
+    return sentences
+
+def _next_word(text, start):
+    words = text[start:].split(None, 1)
+    return words[0].lstrip("(\"'“‘") if words else ""
+
+def _is_abbreviation(word, next_word=""):
+    word = word.lstrip("(\"'“‘")
+    lower = word.lower()
+    if lower in ABBREVIATIONS:
+        return True
+    if lower in NUMBER_ABBREVIATIONS:
+        return next_word[:1].isdigit()
+    if lower in COMPANY_ABBREVIATIONS:
+        return next_word.lower().rstrip(".,") in COMPANY_SUFFIXES
+    # Single letters ("J. Smith", but "The answer is A. B is wrong.") and dotted
+    # initialisms ("the U.S. economy") end a sentence unless it visibly goes on
+    if len(lower.replace(".", "")) == 1 or _INITIALISM.fullmatch(word):
+        return _continues(next_word)
+    return False
+
+def _continues(next_word):
+    """Whether the word after an initial or initialism carries on the same sentence"""
+    if not next_word or _INITIAL.fullmatch(next_word):
+        return bool(next_word)
+    if not next_word[:1].isupper():
+        return True
+    bare = next_word.rstrip(".,;:!?\"'”’)")
+    # A lone capital ("B is wrong") or a usual first word starts a new sentence
+    return len(bare) > 1 and bare.lower() not in SENTENCE_STARTERS
+
+def split_oversized(sentence, max_chars):
+    """Cut a sentence longer than max_chars at clause breaks, then spaces, then anywhere"""
+    pieces = []
+    while len(sentence) > max_chars:
+        window = sentence[:max_chars]
+        cut = max(window.rfind(mark) for mark in (", ", "; ", ": "))
+        if cut <= 0:
+            cut = window.rfind(" ")
+        cut = cut + 1 if cut > 0 else max_chars
+        pieces.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+def pack_chunks(sentences, max_chars=TRANSLATION_MAX_CHUNK_CHARS):
+    """
+    Group consecutive sentences into as few chunks as possible, each at most
+    max_chars once joined with SENTENCE_SEPARATOR. Returns (start, end)
+    sentence index ranges.
+
+    Sentences stay in order (the backend translates each chunk with its
+    context) and, for an ordered sequence, filling each chunk greedily before
+    starting the next gives the minimum number of chunks.
+    """
+    chunks = []
+    start = 0
+    size = 0
+    for index, sentence in enumerate(sentences):
+        added = len(sentence) + (len(SENTENCE_SEPARATOR) if index > start else 0)
+        if index > start and size + added > max_chars:
+            chunks.append((start, index))
+            start = index
+            added = len(sentence)
+            size = 0
+        size += added
+    if start < len(sentences):
+        chunks.append((start, len(sentences)))
+    return chunks
+
+
+def chunk_text(sentences):
+    """The request text for a chunk of sentences"""
+    return SENTENCE_SEPARATOR.join(sentences)
+
+def realign_chunk(translated_chunk, sentence_count):
+    """
+    Per-sentence translations of a chunk, or None if the backend merged or
+    split lines so they no longer match the source sentences.
+    """
+    lines = [line.strip() for line in translated_chunk.split(SENTENCE_SEPARATOR)]
+    return lines if len(lines) == sentence_count else None
+
+
+class SegmentedText:
+    """
+    Text split into sentences (remembering where paragraphs start) and packed
+    into chunks. Translations are kept per sentence, so each translated
+    sentence can be matched back to its source (and its timestamps).
+    """
+
+    def __init__(self, text, max_chars=TRANSLATION_MAX_CHUNK_CHARS):
+        self.sentences = []
+        self.paragraph_starts = set()
+        for paragraph in text.split("\n"):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            self.paragraph_starts.add(len(self.sentences))
+            for sentence in split_sentences(paragraph):
+                self.sentences.extend(split_oversized(sentence, max_chars))
+        self.chunks = pack_chunks(self.sentences, max_chars)
+
+    def render(self, sentences, start=0):
+        """
+        Join sentences (source or translated, beginning at index `start`) back
+        into paragraphs. Rendering consecutive ranges and concatenating them
+        gives the same text as rendering everything at once.
+        """
+        parts = []
+        for index, sentence in enumerate(sentences, start):
+            if not sentence:
+                continue
+            if index > 0:
+                parts.append("\n" if index in self.paragraph_starts else " ")
+            parts.append(sentence)
+        return "".join(parts)
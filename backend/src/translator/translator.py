@@ -1,26 +1,125 @@
 import os
-from deep_translator import GoogleTranslator
+
+from translator.executor import translate_all, TRANSLATION_CONCURRENCY
+from translator.engines import get_engine, get_engine_by_name
+from translator.segmenter import SegmentedText, pack_chunks, chunk_text, realign_chunk
+from translator.memory import translation_memory, TRANSLATION_MEMORY_ENABLED
 
 class Translator:
-    def __init__(self):
-        pass
+    def __init__(self, engine=None):
+        # None picks the engine per language pair (see translator.engines)
+        self.engine_name = engine
+
+    def _engine(self, source_lang, target_lang):
+        if self.engine_name:
+            return get_engine_by_name(self.engine_name)
+        return get_engine(source_lang, target_lang)
 
-    def translate_text(self, text, target_lang):
+    def translate_text(self, text, target_lang, source_lang="auto"):
         """
         Translates a single string to the target language.
         """
         try:
-            # Use GoogleTranslator from deep-translator
-            # It handles chunking automatically for longer texts usually, 
-            # but for very large texts we might need to be careful.
-            # For now, we assume reasonable segment lengths.
-            translator = GoogleTranslator(source='auto', target=target_lang)
-            return translator.translate(text)
+            # Engines expect reasonable segment lengths (see translator.segmenter)
+            return self._engine(source_lang, target_lang).translate(text, source_lang, target_lang)
         except Exception as e:
             print(f"Error translating text: {e}")
             return text # Return original text on failure
 
-    def translate_transcript(self, transcript_path, target_lang):
+    def translate_segments(self, segments, target_lang, source_lang="auto"):
+        """
+        Translate a list of segments (sentences), returning translations in the
+        same order. Segments already in the translation memory are reused; the
+        rest are packed into as few requests as possible, translated
+        concurrently by the language pair's engine (bounded pool, rate limited
+        for remote engines) and remembered.
+        A request that keeps failing fails the whole call.
+        """
+        engine = self._engine(source_lang, target_lang)
+        known = translation_memory.lookup(segments, target_lang, engine.name, source_lang) if TRANSLATION_MEMORY_ENABLED else {}
+        missing = [index for index in range(len(segments)) if index not in known]
+        if known:
+            print(f"Translation memory: {len(known)}/{len(segments)} segments reused")
+
+        pending = [segments[index] for index in missing]
+        chunks = pack_chunks(pending, engine.max_chars)
+        translated_chunks = translate_all(
+            [chunk_text(pending[start:end]) for start, end in chunks],
+            lambda text: engine.translate(text, source_lang, target_lang),
+            backend=engine.name,
+            rate_limited=engine.rate_limited
+        )
+
+        translated = []
+        aligned = []
+        for (start, end), translated_chunk in zip(chunks, translated_chunks):
+            lines = realign_chunk(translated_chunk, end - start)
+            if lines is None:
+                # Keep the chunk's translation whole on its first segment rather than guessing
+                print(f"Translated chunk does not line up with its {end - start} segments, keeping it whole")
+                lines = [translated_chunk.strip()] + [""] * (end - start - 1)
+            else:
+                aligned.extend(range(start, end))
+            translated.extend(lines)
+
+        if TRANSLATION_MEMORY_ENABLED and aligned:
+            translation_memory.store([pending[i] for i in aligned], [translated[i] for i in aligned], target_lang, engine.name, source_lang)
+
+        results = dict(known)
+        results.update(zip(missing, translated))
+        return [results[index] for index in range(len(segments))]
+
+    def split_transcript(self, content):
+        """
+        Split transcript content into its header (everything up to the separator
+        line, or None when there is none) and the body, segmented into sentences
+        packed into translation chunks.
+        """
+        # Split by the header separator
+        parts = content.split("=" * 80)
+
+        if len(parts) >= 2:
+            # Extract header and main text
+            header = parts[0] + "=" * 80
+            main_text = parts[1].strip()
+        else:
+            header = None
+            main_text = content
+
+        return header, SegmentedText(main_text)
+
+    def translate_segmented(self, segmented, target_lang, source_lang="auto"):
+        """Translate a SegmentedText; returns one translation per source sentence"""
+        return self.translate_segments(segmented.sentences, target_lang, source_lang)
+
+    def join_transcript(self, header, segmented, translated_sentences):
+        """Rebuild transcript content from split_transcript's header and translated sentences"""
+        body = segmented.render(translated_sentences) + "\n"
+        return header + "\n\n" + body if header is not None else body
+
+    def translate_content(self, content, target_lang, source_lang="auto"):
+        """Translate transcript content held in memory and return the translated content"""
+        header, segmented = self.split_transcript(content)
+        return self.join_transcript(header, segmented, self.translate_segmented(segmented, target_lang, source_lang))
+
+    def iter_translate_content(self, content, target_lang, source_lang="auto", window=TRANSLATION_CONCURRENCY):
+        """
+        Streaming variant of translate_content: yields the translated content
+        piece by piece (header first, then the body chunk by chunk) so callers
+        can forward it before the whole transcript is done. `window` chunks are
+        translated concurrently at a time.
+        """
+        header, segmented = self.split_transcript(content)
+        if header is not None:
+            yield header + "\n\n"
+        for first in range(0, len(segmented.chunks), window):
+            start = segmented.chunks[first][0]
+            end = segmented.chunks[min(first + window, len(segmented.chunks)) - 1][1]
+            translated = self.translate_segments(segmented.sentences[start:end], target_lang, source_lang)
+            yield segmented.render(translated, start=start)
+        yield "\n"
+
+    def translate_transcript(self, transcript_path, target_lang, source_lang="auto"):
         """
         Reads a transcript file, translates it, and saves it to a new file.
         Returns the path to the translated transcript.
@@ -41,76 +140,8 @@ class Translator:
             
             with open(transcript_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-            
-            # Split by the header separator
-            parts = content.split("=" * 80)
-            
-            if len(parts) >= 2:
-                # Extract header and main text
-                header = parts[0] + "=" * 80
-                main_text = parts[1].strip()
-                
-                # Translate the main text content
-                translator = GoogleTranslator(source='auto', target=target_lang)
-                
-                # Split into paragraphs to handle better
-                raw_paragraphs = [p.strip() for p in main_text.split('\n') if p.strip()]
-                
-                # Further split long paragraphs if needed
-                paragraphs = []
-                MAX_CHUNK_SIZE = 4500
-                
-                for p in raw_paragraphs:
-                    if len(p) <= MAX_CHUNK_SIZE:
-                        paragraphs.append(p)
-                    else:
-                        # Split by sentences (simple approximation)
-                        sentences = p.replace('. ', '.|').replace('? ', '?|').replace('! ', '!|').split('|')
-                        current_chunk = ""
-                        
-                        for sentence in sentences:
-                            # If a single sentence is too long, force split it
-                            if len(sentence) > MAX_CHUNK_SIZE:
-                                # Split by character count
-                                for i in range(0, len(sentence), MAX_CHUNK_SIZE):
-                                    sub_chunk = sentence[i:i+MAX_CHUNK_SIZE]
-                                    if len(current_chunk) + len(sub_chunk) < MAX_CHUNK_SIZE:
-                                        current_chunk += sub_chunk
-                                    else:
-                                        if current_chunk:
-                                            paragraphs.append(current_chunk.strip())
-                                        current_chunk = sub_chunk
-                            else:
-                                if len(current_chunk) + len(sentence) < MAX_CHUNK_SIZE:
-                                    current_chunk += sentence + " "
-                                else:
-                                    if current_chunk:
-                                        paragraphs.append(current_chunk.strip())
-                                    current_chunk = sentence + " "
-                                
-                        if current_chunk:
-                            paragraphs.append(current_chunk.strip())
-                
-                translated_paragraphs = []
-                batch_size = 50
-                
-                # Process in batches
-                for i in range(0, len(paragraphs), batch_size):
-                    batch = paragraphs[i:i+batch_size]
-                    try:
-                        results = translator.translate_batch(batch)
-                        translated_paragraphs.extend(results)
-                    except Exception as e:
-                        print(f"Error translating batch {i}: {e}")
-                        # Fallback: keep original for this batch
-                        translated_paragraphs.extend(batch)
-                
-                # Reconstruct the file
-                translated_content = header + "\n\n" + "\n".join(translated_paragraphs) + "\n"
-            else:
-                # Fallback: translate entire content
-                translator = GoogleTranslator(source='auto', target=target_lang)
-                translated_content = translator.translate(content)
+
+            translated_content = self.translate_content(content, target_lang, source_lang)
 
             with open(new_path, 'w', encoding='utf-8') as f:
                 f.write(translated_content)
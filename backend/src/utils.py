@@ -1,19 +1,29 @@
 import os
+import gzip
 import boto3
 import json
-from botocore.exceptions import ClientError
+from botocore.config import Config
 
 # AWS Configuration
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 S3_BUCKET_NAME = os.getenv('S3_BUCKET_NAME')
 SQS_QUEUE_URL = os.getenv('SQS_TRANSCRIPTION_QUEUE_URL')
 
+# Artifact delivery: 'inline' proxies S3 bytes through the API, 'presigned' hands
+# out short-lived S3 URLs so the browser reads/writes the bucket directly
+ARTIFACT_DELIVERY = os.getenv('ARTIFACT_DELIVERY', 'inline')
+PRESIGNED_URL_EXPIRES = int(os.getenv('PRESIGNED_URL_EXPIRES', '300'))
+# Pooled HTTP connections of the S3 client; concurrent storage I/O (see storage.py) is sized to match
+S3_MAX_POOL_CONNECTIONS = int(os.getenv('S3_MAX_POOL_CONNECTIONS', '50'))
+S3_CLIENT_CONFIG = Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS, retries={'mode': 'standard'})
+
 # Initialize AWS Clients
 try:
     if os.getenv('AWS_ACCESS_KEY_ID') and os.getenv('AWS_SECRET_ACCESS_KEY'):
         s3 = boto3.client(
             's3',
             region_name=AWS_REGION,
+            config=S3_CLIENT_CONFIG,
             aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
             aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
             aws_session_token=os.getenv('AWS_SESSION_TOKEN')
@@ -26,7 +36,7 @@ try:
             aws_session_token=os.getenv('AWS_SESSION_TOKEN')
         )
     else:
-        s3 = boto3.client('s3', region_name=AWS_REGION)
+        s3 = boto3.client('s3', region_name=AWS_REGION, config=S3_CLIENT_CONFIG)
         sqs = boto3.client('sqs', region_name=AWS_REGION)
         
     USE_S3 = bool(S3_BUCKET_NAME)
@@ -36,68 +46,85 @@ except Exception as e:
     s3 = None
     sqs = None
 
-def upload_to_s3(local_path: str, s3_key: str) -> str:
-    """Upload file to S3 and return S3 URI"""
-    if not USE_S3:
-        return local_path
-    
-    try:
-        s3.upload_file(local_path, S3_BUCKET_NAME, s3_key)
-        return f"s3://{S3_BUCKET_NAME}/{s3_key}"
-    except Exception as e:
-        print(f"Error uploading to S3: {e}")
-        raise
+# Text artifacts (transcripts, translations, flashcards, quizzes) are stored compressed:
+# 'gzip', 'zstd' (needs the zstandard package) or 'none'. The codec is recorded in the
+# object's metadata (and Content-Encoding when browsers can decode it, see storage.py);
+# objects without one are read as plain text.
+ARTIFACT_COMPRESSION = os.getenv('ARTIFACT_COMPRESSION', 'gzip').lower()
+# Smaller payloads are not worth compressing
+ARTIFACT_COMPRESSION_MIN_BYTES = int(os.getenv('ARTIFACT_COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSIBLE_CONTENT_TYPES = {
+    '.txt': 'text/plain; charset=utf-8',
+    '.json': 'application/json',
+}
 
-def delete_from_s3(s3_uri: str):
-    """Delete file from S3 given its URI"""
-    if not USE_S3 or not s3_uri.startswith("s3://"):
-        return
-    
-    try:
-        parts = s3_uri.replace("s3://", "").split("/", 1)
-        if len(parts) < 2:
-            return
-        
-        bucket = parts[0]
-        key = parts[1]
-        
-        s3.delete_object(Bucket=bucket, Key=key)
-        print(f"Deleted from S3: {key}")
-    except Exception as e:
-        print(f"Error deleting from S3: {e}")
+def _zstd():
+    import zstandard
+    return zstandard
 
-def read_file_content(file_path: str) -> str:
-    """Read content from local file or S3"""
-    if file_path.startswith("s3://"):
-        if not USE_S3:
-            raise Exception("S3 not configured but file path is S3 URI")
-        
+def compress_body(body: bytes):
+    """Return (body, codec) compressed with ARTIFACT_COMPRESSION, or (body, None) when left as is"""
+    codec = ARTIFACT_COMPRESSION
+    if codec == 'none' or len(body) < ARTIFACT_COMPRESSION_MIN_BYTES:
+        return body, None
+    if codec == 'zstd':
         try:
-            parts = file_path.replace("s3://", "").split("/", 1)
-            bucket = parts[0]
-            key = parts[1]
-            
-            response = s3.get_object(Bucket=bucket, Key=key)
-            return response['Body'].read().decode('utf-8')
-        except Exception as e:
-            print(f"Error reading from S3: {e}")
-            raise
-    else:
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File not found: {file_path}")
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+            return _zstd().ZstdCompressor(level=10).compress(body), 'zstd'
+        except ImportError:
+            print("Warning: zstandard not installed, compressing artifacts with gzip")
+            codec = 'gzip'
+    if codec == 'gzip':
+        return gzip.compress(body, compresslevel=6), 'gzip'
+    raise ValueError(f"Unknown artifact compression: {ARTIFACT_COMPRESSION}")
+
+def decompress_body(body: bytes, codec: str) -> bytes:
+    if not codec or codec == 'identity':
+        return body
+    if codec == 'gzip':
+        return gzip.decompress(body)
+    if codec == 'zstd':
+        return _zstd().ZstdDecompressor().decompress(body)
+    raise ValueError(f"Unknown artifact codec: {codec}")
+
+def parse_s3_uri(s3_uri: str):
+    """Split an s3://bucket/key URI into (bucket, key)"""
+    parts = s3_uri.replace("s3://", "").split("/", 1)
+    if len(parts) < 2:
+        raise ValueError(f"Invalid S3 URI: {s3_uri}")
+    return parts[0], parts[1]
+
+def generate_presigned_get_url(s3_uri: str, content_type: str = None, expires_in: int = PRESIGNED_URL_EXPIRES) -> str:
+    """Return a short-lived URL that lets the client GET an S3 object directly"""
+    if not USE_S3 or not s3_uri.startswith("s3://"):
+        raise Exception("Presigned URLs require S3 storage")
+
+    bucket, key = parse_s3_uri(s3_uri)
+    params = {'Bucket': bucket, 'Key': key}
+    if content_type:
+        params['ResponseContentType'] = content_type
+    return s3.generate_presigned_url('get_object', Params=params, ExpiresIn=expires_in)
+
+def generate_presigned_put_url(s3_key: str, content_type: str = 'application/json', expires_in: int = PRESIGNED_URL_EXPIRES) -> str:
+    """Return a short-lived URL that lets the client PUT an object to S3 directly"""
+    if not USE_S3:
+        raise Exception("Presigned URLs require S3 storage")
+
+    return s3.generate_presigned_url(
+        'put_object',
+        Params={'Bucket': S3_BUCKET_NAME, 'Key': s3_key, 'ContentType': content_type},
+        ExpiresIn=expires_in
+    )
 
-def send_to_sqs(message_body: dict):
-    """Send message to SQS queue"""
-    if not SQS_QUEUE_URL:
+def send_to_sqs(message_body: dict, queue_url: str = None):
+    """Send message to SQS queue (the transcription queue unless queue_url is given)"""
+    queue_url = queue_url or SQS_QUEUE_URL
+    if not queue_url:
         print("Warning: SQS_QUEUE_URL not set, skipping SQS message")
         return
     
     try:
         sqs.send_message(
-            QueueUrl=SQS_QUEUE_URL,
+            QueueUrl=queue_url,
             MessageBody=json.dumps(message_body)
         )
         print(f"Sent message to SQS: {message_body}")
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+import datetime
+
+from cache import LRUCache, artifact_version, artifact_etag, etag_matches
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=10)
+    cache.set(("a", "v1"), "A", 4)
+    cache.set(("b", "v1"), "B", 4)
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get(("a", "v1")) == "A"
+    cache.set(("c", "v1"), "C", 4)
+    assert cache.get(("b", "v1")) is None
+    assert cache.get(("a", "v1")) == "A"
+    assert cache.get(("c", "v1")) == "C"
+    assert cache.stats()["bytes"] == 8
+
+def test_lru_skips_values_larger_than_the_cache():
+    cache = LRUCache(max_bytes=10)
+    cache.set(("a", "v1"), "A", 4)
+    cache.set(("big", "v1"), "X" * 11, 11)
+    assert cache.get(("big", "v1")) is None
+    assert cache.get(("a", "v1")) == "A"
+
+def test_lru_replacing_a_key_updates_the_size():
+    cache = LRUCache(max_bytes=10)
+    cache.set(("a", "v1"), "A", 4)
+    cache.set(("a", "v1"), "AA", 6)
+    assert cache.get(("a", "v1")) == "AA"
+    assert cache.stats()["bytes"] == 6
+
+def test_versioned_keys_and_invalidation():
+    cache = LRUCache(max_bytes=100)
+    cache.set(("path", "v1"), "old", 3)
+    cache.set(("path", "v2"), "new", 3)
+    cache.set(("other", "v1"), "keep", 4)
+    # A new version is a different key: the old one is never served for it
+    assert cache.get(("path", "v2")) == "new"
+    assert cache.get(("path", "v3")) is None
+
+    cache.invalidate("path")
+    assert cache.get(("path", "v1")) is None
+    assert cache.get(("path", "v2")) is None
+    assert cache.get(("other", "v1")) == "keep"
+    assert cache.stats()["entries"] == 1
+
+def test_artifact_version_follows_updated_at():
+    created = datetime.datetime(2026, 1, 1, 12, 0, 0)
+    row = SimpleNamespace(created_at=created, updated_at=None)
+    assert artifact_version(row) == created.isoformat()
+    row.updated_at = created + datetime.timedelta(microseconds=1)
+    assert artifact_version(row) != created.isoformat()
+
+def test_etag_changes_with_version():
+    assert artifact_etag("s3://b/k", "v1") == artifact_etag("s3://b/k", "v1")
+    assert artifact_etag("s3://b/k", "v1") != artifact_etag("s3://b/k", "v2")
+
+def test_etag_matches():
+    etag = artifact_etag("s3://b/k", "v1")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,54 @@
+import random
+from collections import Counter
+
+import pytest
+
+from generator import compression
+from generator.compression import compress_transcript, estimate_tokens
+
+
+def lecture(sentences=200):
+    random.seed(7)
+    topic = ["gradient", "descent", "learning", "rate", "weights", "loss", "model", "training"]
+    chatter = ["okay", "so", "anyway", "right", "well", "yeah", "cool", "alright"]
+    lines = []
+    for index in range(sentences):
+        pool = topic if index % 3 else chatter
+        lines.append(" ".join(random.choices(pool, k=8)).capitalize() + f" point {index}.")
+    return " ".join(lines)
+
+def test_short_transcripts_are_left_alone():
+    text = "A short transcript. Nothing to drop."
+    assert compress_transcript(text, ratio=0.5, min_tokens=1000)[0] == text
+
+def test_ratio_one_disables_compression():
+    text = lecture()
+    assert compress_transcript(text, ratio=1, min_tokens=0)[0] == text
+
+def test_keeps_budget_and_order():
+    text = lecture()
+    compressed, stats = compress_transcript(text, ratio=0.4, min_tokens=0)
+    assert estimate_tokens(compressed) <= int(estimate_tokens(text) * 0.4) + 1
+    assert stats["sentences_kept"] < stats["sentences_total"]
+    # Kept sentences appear in their original order
+    positions = [text.index(sentence) for sentence in compressed.split(". ") if sentence]
+    assert positions == sorted(positions)
+
+def test_prefers_on_topic_sentences():
+    compressed, _ = compress_transcript(lecture(), ratio=0.3, min_tokens=0)
+    words = compressed.lower().split()
+    assert sum(word in ("gradient", "descent", "learning") for word in words) > sum(word in ("okay", "anyway", "yeah") for word in words)
+
+def test_drops_filler_and_repeats():
+    text = " ".join(["Um, the loss goes down.", "The loss goes down.", "Uh training works."] * 50)
+    compressed, stats = compress_transcript(text, ratio=0.9, min_tokens=0)
+    assert "Um" not in compressed and "Uh" not in compressed
+    assert stats["sentences_total"] == 2
+
+def test_vectorized_scores_match_pure_python():
+    pytest.importorskip("numpy")
+    random.seed(3)
+    vocabulary = [f"w{index}" for index in range(300)]
+    sentences = [Counter(random.choices(vocabulary, k=random.randint(1, 20))) for _ in range(500)]
+    assert compression._centroid_scores(sentences) == pytest.approx(compression._centroid_scores_python(sentences))
+    assert compression._centroid_scores([]) == []
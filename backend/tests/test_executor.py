@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from translator import executor
+from translator.executor import translate_all, TranslationError
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(executor.time, "sleep", lambda seconds: None)
+
+def test_results_keep_input_order():
+    texts = [f"text {index}" for index in range(20)]
+    assert translate_all(texts, str.upper, backend="test", rate_limited=False) == [text.upper() for text in texts]
+
+def test_transient_failures_are_retried():
+    attempts = {}
+    lock = threading.Lock()
+
+    def flaky(text):
+        with lock:
+            attempts[text] = attempts.get(text, 0) + 1
+            if attempts[text] <= 2:
+                raise ConnectionError("try again")
+        return text.upper()
+
+    assert translate_all(["a", "b"], flaky, backend="test", rate_limited=False) == ["A", "B"]
+    assert attempts == {"a": 3, "b": 3}
+
+def test_persistent_failure_raises():
+    def broken(text):
+        if text == "bad":
+            raise ConnectionError("down")
+        return text
+
+    with pytest.raises(TranslationError, match=f"after {executor.TRANSLATION_MAX_RETRIES + 1} attempts"):
+        translate_all(["good", "bad"], broken, backend="test", rate_limited=False)
+
+def test_rate_limited_requests_take_tokens(monkeypatch):
+    taken = []
+
+    class Limiter:
+        def acquire(self, amount=1):
+            taken.append(amount)
+
+    monkeypatch.setattr(executor, "get_rate_limiter", lambda backend: Limiter())
+    translate_all(["a", "b", "c"], str.upper, backend="test")
+    assert taken == [1, 1, 1]
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+import database
+from generator import generation_cache
+from generator.generation_cache import get_or_generate, stream_or_generate, get_cached_generation
+
+
+@pytest.fixture(autouse=True)
+def db():
+    """The cache's sessions on an in-memory SQLite database"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    database.Base.metadata.create_all(bind=engine)
+    bind = database.SessionLocal.kw["bind"]
+    database.SessionLocal.configure(bind=engine)
+    yield
+    database.SessionLocal.configure(bind=bind)
+    engine.dispose()
+
+def generation(items, calls):
+    def generate():
+        calls.append(1)
+        return items
+    return generate
+
+def test_second_request_is_cached():
+    calls = []
+    assert get_or_generate("quiz", "text", "en", "v1", "m", generation([{"q": 1}], calls)) == ([{"q": 1}], False)
+    assert get_or_generate("quiz", "text", "en", "v1", "m", generation([{"q": 2}], calls)) == ([{"q": 1}], True)
+    assert len(calls) == 1
+    assert get_cached_generation("quiz", "text", "en", "v1", "m") == [{"q": 1}]
+
+def test_key_covers_transcript_language_prompt_and_model():
+    calls = []
+    get_or_generate("quiz", "text", "en", "v1", "m", generation([], calls))
+    get_or_generate("quiz", "other text", "en", "v1", "m", generation([], calls))
+    get_or_generate("quiz", "text", "de", "v1", "m", generation([], calls))
+    get_or_generate("quiz", "text", "en", "v2", "m", generation([], calls))
+    get_or_generate("quiz", "text", "en", "v1", "m2", generation([], calls))
+    get_or_generate("flashcards", "text", "en", "v1", "m", generation([], calls))
+    assert len(calls) == 6
+
+def test_concurrent_requests_coalesce():
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return [{"q": 1}]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(get_or_generate("quiz", "text", "en", "v1", "m", slow)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    # Followers share the leader's result, which was generated rather than cached
+    assert results == [([{"q": 1}], False)] * 5
+
+def test_regenerate_replaces_the_result():
+    calls = []
+    get_or_generate("quiz", "text", "en", "v1", "m", generation([{"q": 1}], calls))
+    assert get_or_generate("quiz", "text", "en", "v1", "m", generation([{"q": 2}], calls), regenerate=True) == ([{"q": 2}], False)
+    assert get_cached_generation("quiz", "text", "en", "v1", "m") == [{"q": 2}]
+
+def test_failed_regeneration_keeps_the_previous_result():
+    get_or_generate("quiz", "text", "en", "v1", "m", lambda: [{"q": 1}])
+
+    def fail():
+        # Still readable while the regeneration runs
+        assert get_cached_generation("quiz", "text", "en", "v1", "m") == [{"q": 1}]
+        raise RuntimeError("model unavailable")
+
+    with pytest.raises(RuntimeError):
+        get_or_generate("quiz", "text", "en", "v1", "m", fail, regenerate=True)
+    assert get_or_generate("quiz", "text", "en", "v1", "m", lambda: [{"q": 3}]) == ([{"q": 1}], True)
+
+def test_failed_generation_can_be_retried():
+    def fail():
+        raise RuntimeError("model unavailable")
+
+    with pytest.raises(RuntimeError):
+        get_or_generate("quiz", "text", "en", "v1", "m", fail)
+    assert get_or_generate("quiz", "text", "en", "v1", "m", lambda: [{"q": 1}]) == ([{"q": 1}], False)
+
+def test_stream_stores_and_replays():
+    streamed = list(stream_or_generate("flashcards", "text", "en", "v1", "m", lambda: iter([{"f": 1}, {"f": 2}])))
+    assert streamed == [{"f": 1}, {"f": 2}]
+    replayed = list(stream_or_generate("flashcards", "text", "en", "v1", "m", lambda: iter([{"f": 3}])))
+    assert replayed == [{"f": 1}, {"f": 2}]
+
+def test_abandoned_stream_releases_its_claim():
+    items = stream_or_generate("flashcards", "text", "en", "v1", "m", lambda: iter([{"f": 1}, {"f": 2}]))
+    assert next(items) == {"f": 1}
+    items.close()
+    assert get_cached_generation("flashcards", "text", "en", "v1", "m") is None
+    assert get_or_generate("flashcards", "text", "en", "v1", "m", lambda: [{"f": 9}]) == ([{"f": 9}], False)
@@ -0,0 +1,54 @@
+from generator.json_stream import JSONArrayStreamParser
+
+
+def feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+def test_whole_document():
+    parser = JSONArrayStreamParser("flashcards")
+    items = parser.feed('{"flashcards": [{"front": "a", "back": "b"}, {"front": "c", "back": "d"}]}')
+    assert items == [{"front": "a", "back": "b"}, {"front": "c", "back": "d"}]
+    assert parser.done
+
+def test_items_are_returned_as_soon_as_they_close():
+    parser = JSONArrayStreamParser("flashcards")
+    assert parser.feed('{"flashcards": [{"front": "a", ') == []
+    assert parser.feed('"back": "b"}, {"front"') == [{"front": "a", "back": "b"}]
+    assert parser.feed(': "c", "back": "d"}') == [{"front": "c", "back": "d"}]
+    assert not parser.done
+    assert parser.feed("]}") == []
+    assert parser.done
+
+def test_one_character_at_a_time():
+    document = '```json\n{"questions": [{"question": "Why?", "options": ["a", "b"], "correct_answer": "a"}]}\n```'
+    parser = JSONArrayStreamParser("questions")
+    assert feed_all(parser, document) == [{"question": "Why?", "options": ["a", "b"], "correct_answer": "a"}]
+    assert parser.done
+
+def test_array_key_split_across_chunks():
+    parser = JSONArrayStreamParser("flashcards")
+    items = feed_all(parser, ['Here you go: {"flash', 'cards"', ' :  [', '{"front": "x"}]}'])
+    assert items == [{"front": "x"}]
+
+def test_braces_and_escapes_inside_strings():
+    parser = JSONArrayStreamParser("flashcards")
+    chunks = ['{"flashcards": [{"front": "use {} and ]", ', '"back": "a \\"quoted\\', '" word \\\\"}]}']
+    assert feed_all(parser, chunks) == [{"front": "use {} and ]", "back": 'a "quoted" word \\'}]
+
+def test_nested_objects():
+    parser = JSONArrayStreamParser("questions")
+    items = feed_all(parser, ['{"questions": [{"meta": {"level": [1, ', '2]}, "q": "x"}]}'])
+    assert items == [{"meta": {"level": [1, 2]}, "q": "x"}]
+
+def test_text_after_the_array_is_ignored():
+    parser = JSONArrayStreamParser("flashcards")
+    assert parser.feed('{"flashcards": [{"front": "a"}]} trailing {"front": "b"}') == [{"front": "a"}]
+    assert parser.feed('{"front": "c"}') == []
+
+def test_other_keys_are_ignored():
+    parser = JSONArrayStreamParser("flashcards")
+    items = feed_all(parser, ['{"notes": [{"x": 1}], ', '"flashcards": [{"front": "a"}]}'])
+    assert items == [{"front": "a"}]
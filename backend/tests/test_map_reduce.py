@@ -0,0 +1,41 @@
+from generator.map_reduce import estimate_tokens, split_into_chunks, reduce_candidates
+
+
+def question(text):
+    return {"question": text}
+
+def key(item):
+    return item["question"]
+
+def test_near_duplicates_across_chunks_are_dropped():
+    candidates = [
+        [question("What is gradient descent?"), question("Why does the learning rate matter?")],
+        [question("What is gradient descent exactly?"), question("How does backpropagation work?")],
+    ]
+    selected = reduce_candidates(candidates, key, max_items=10)
+    assert [key(item) for item in selected] == [
+        "What is gradient descent?",
+        "Why does the learning rate matter?",
+        "How does backpropagation work?",
+    ]
+
+def test_selection_covers_every_chunk_first():
+    candidates = [
+        [question(f"{word} alpha") for word in ("one", "two", "three", "four", "five")],
+        [question("beta unique")],
+        [question("gamma unique")],
+    ]
+    selected = reduce_candidates(candidates, key, max_items=4)
+    # One per chunk, then the first chunk's second item; kept in transcript order
+    assert [key(item) for item in selected] == ["one alpha", "two alpha", "beta unique", "gamma unique"]
+
+def test_empty_candidates():
+    assert reduce_candidates([], key, max_items=5) == []
+    assert reduce_candidates([[], []], key, max_items=5) == []
+
+def test_chunks_respect_the_token_budget():
+    text = "\n".join(f"Line {index} of the transcript with some words." for index in range(200))
+    chunks = split_into_chunks(text, max_tokens=100)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
@@ -0,0 +1,56 @@
+import pytest
+
+import rate_limit
+from rate_limit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+def test_starts_full(clock):
+    bucket = TokenBucket(rate_per_minute=60)
+    assert bucket.available() == 60
+    assert bucket.reserve(60) == 0.0
+
+def test_waits_when_empty(clock):
+    bucket = TokenBucket(rate_per_minute=60)
+    bucket.reserve(60)
+    # One token per second
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(2) == pytest.approx(3.0)
+
+def test_refills_over_time(clock):
+    bucket = TokenBucket(rate_per_minute=60)
+    bucket.reserve(60)
+    clock.now += 10
+    assert bucket.available() == pytest.approx(10)
+    assert bucket.reserve(10) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=5)
+    clock.now += 3600
+    assert bucket.available() == 5
+    assert bucket.reserve(5) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+def test_requests_larger_than_the_bucket_are_capped(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=10)
+    assert bucket.reserve(100) == 0.0
+    assert bucket.available() == 0
+
+def test_zero_rate_disables_limiting(clock):
+    bucket = TokenBucket(rate_per_minute=0)
+    assert bucket.reserve(1000) == 0.0
+    assert bucket.available() == float("inf")
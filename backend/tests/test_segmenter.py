@@ -0,0 +1,79 @@
+import pytest
+
+from translator.segmenter import (
+    SENTENCE_SEPARATOR, SegmentedText, chunk_text, pack_chunks, realign_chunk, split_oversized, split_sentences
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("First sentence. Second one! A third?", ["First sentence.", "Second one!", "A third?"]),
+    ("Dr. Smith arrived. He sat down.", ["Dr. Smith arrived.", "He sat down."]),
+    ("Pi is roughly 3.14 in most cases. Yes.", ["Pi is roughly 3.14 in most cases.", "Yes."]),
+    ("We use tools, e.g. hammers. They help.", ["We use tools, e.g. hammers.", "They help."]),
+    ("这是第一句。这是第二句。", ["这是第一句。", "这是第二句。"]),
+    ('He said "stop." Then he left.', ['He said "stop."', "Then he left."]),
+])
+def test_split_sentences(text, expected):
+    assert split_sentences(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("The U.K. Prime Minister resigned. It was sudden.", ["The U.K. Prime Minister resigned.", "It was sudden."]),
+    ("the U.S. economy grew. Then it shrank.", ["the U.S. economy grew.", "Then it shrank."]),
+    ("He moved to the U.S. He liked it.", ["He moved to the U.S.", "He liked it."]),
+    ("The answer is A. B is wrong.", ["The answer is A.", "B is wrong."]),
+    ("We chose plan B. Then we left.", ["We chose plan B.", "Then we left."]),
+    ("Ask J. Smith about it. She knows.", ["Ask J. Smith about it.", "She knows."]),
+    ("J. R. R. Tolkien wrote it. He was English.", ["J. R. R. Tolkien wrote it.", "He was English."]),
+])
+def test_split_sentences_initials(text, expected):
+    assert split_sentences(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("See No. 5 on the list. Done.", ["See No. 5 on the list.", "Done."]),
+    ("Is it true? No. It is not.", ["Is it true?", "No.", "It is not."]),
+    ("Smith Co. Ltd sells cars. We bought one.", ["Smith Co. Ltd sells cars.", "We bought one."]),
+    ("He runs the co. Everyone knows.", ["He runs the co.", "Everyone knows."]),
+])
+def test_split_sentences_contextual_abbreviations(text, expected):
+    assert split_sentences(text) == expected
+
+def test_split_oversized_prefers_clause_breaks():
+    pieces = split_oversized("alpha beta, gamma delta, epsilon zeta", 20)
+    assert pieces == ["alpha beta,", "gamma delta,", "epsilon zeta"]
+    assert all(len(piece) <= 20 for piece in pieces)
+
+def test_split_oversized_without_spaces():
+    assert split_oversized("x" * 25, 10) == ["x" * 10, "x" * 10, "x" * 5]
+
+def test_pack_chunks_fills_greedily():
+    sentences = ["a" * 4, "b" * 4, "c" * 4, "d" * 4]
+    # Two sentences plus the separator fit in 9 characters, three don't
+    assert pack_chunks(sentences, 9) == [(0, 2), (2, 4)]
+    for start, end in pack_chunks(sentences, 9):
+        assert len(chunk_text(sentences[start:end])) <= 9
+
+def test_pack_chunks_keeps_oversized_sentence_alone():
+    assert pack_chunks(["short", "x" * 50, "tail"], 10) == [(0, 1), (1, 2), (2, 3)]
+
+def test_pack_chunks_empty():
+    assert pack_chunks([], 10) == []
+
+def test_realign_chunk():
+    translated = SENTENCE_SEPARATOR.join([" Hola. ", "Adiós."])
+    assert realign_chunk(translated, 2) == ["Hola.", "Adiós."]
+    # Lines merged or split by the backend no longer match their sources
+    assert realign_chunk("Hola. Adiós.", 2) is None
+    assert realign_chunk(SENTENCE_SEPARATOR.join(["a", "b", "c"]), 2) is None
+
+def test_segmented_text_round_trip():
+    text = "First one. Second one.\n\nNew paragraph here. Last."
+    segmented = SegmentedText(text, max_chars=25)
+    assert segmented.sentences == ["First one.", "Second one.", "New paragraph here.", "Last."]
+    assert segmented.render(segmented.sentences) == "First one. Second one.\nNew paragraph here. Last."
+    assert segmented.chunks == pack_chunks(segmented.sentences, 25)
+
+def test_segmented_text_renders_ranges():
+    segmented = SegmentedText("One. Two.\nThree. Four. Five.")
+    whole = segmented.render(segmented.sentences)
+    parts = segmented.render(segmented.sentences[:2]) + segmented.render(segmented.sentences[2:], start=2)
+    assert parts == whole
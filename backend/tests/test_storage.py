@@ -0,0 +1,32 @@
+import os
+
+from storage import DiskCache
+
+
+def test_disk_cache_evicts_least_recently_used_blobs(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+    cache.store("a", '"1"', b"aaaa")
+    cache.store("b", '"1"', b"bbbb")
+    # Reading "a" makes "b" the least recently used blob
+    assert cache.read(cache.lookup("a")[1]) == b"aaaa"
+    cache.store("c", '"1"', b"cccc")
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") is not None
+    assert cache.stats()["bytes"] == 8
+    assert len(os.listdir(cache.blob_dir)) == 2
+
+def test_disk_cache_counts_shared_blobs_once(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+    cache.store("a", '"1"', b"same")
+    cache.store("b", '"2"', b"same")
+    assert cache.stats()["blobs"] == 1
+    assert cache.stats()["bytes"] == 4
+    assert cache.read(cache.lookup("b")[1]) == b"same"
+
+def test_disk_cache_picks_up_existing_blobs_at_startup(tmp_path):
+    DiskCache(str(tmp_path), max_bytes=100).store("a", '"1"', b"aaaa")
+    cache = DiskCache(str(tmp_path), max_bytes=100)
+    assert cache.stats()["bytes"] == 4
+    assert cache.lookup("a")[0] == '"1"'
+    # A smaller budget evicts on startup
+    assert DiskCache(str(tmp_path), max_bytes=2).lookup("a") is None
@@ -1,19 +1,26 @@
 import os
+import sys
 import json
 import time
 import boto3
 import traceback
+import threading
 # Load environment variables via config module (supports .env and AWS SSM)
 import src.config
 
-from src.downloader.video_downloader import VideoDownloader
-from src.database import SessionLocal, Video, Transcript, User, init_db
-from src.utils import upload_to_s3, read_file_content
+# Add the src directory to the python path (same module names as main.py)
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from downloader.video_downloader import VideoDownloader
+from database import SessionLocal, Video, Transcript, User, init_db
+from storage import write_file, submit_io
+from notifications import publish_video_status
+from jobs import run_job, submit_pregeneration, SQS_JOBS_QUEUE_URL, JOB_CONCURRENCY
+from reaper import run_reaper
 
 # AWS Configuration
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 SQS_QUEUE_URL = os.getenv('SQS_TRANSCRIPTION_QUEUE_URL')
-USE_S3 = bool(os.getenv('S3_BUCKET_NAME'))
 
 # Initialize AWS Clients
 try:
@@ -32,6 +39,12 @@ def process_message(message):
     """Process a single SQS message"""
     try:
         body = json.loads(message['Body'])
+
+        # Generic jobs (translation, generation) may share the transcription queue
+        if body.get('job_id'):
+            run_job(body['job_id'])
+            return
+
         video_id = body.get('video_id')
         url = body.get('url')
         user_id = body.get('user_id')
@@ -45,6 +58,7 @@ def process_message(message):
             if video:
                 video.status = 'processing'
                 db.commit()
+            publish_video_status(video_id, 'processing', 'downloading')
             
             # Initialize downloader
             downloader = VideoDownloader(user_id=user_id)
@@ -62,40 +76,33 @@ def process_message(message):
             
             # 2. Extract Audio
             print("Extracting audio...")
+            publish_video_status(video_id, 'processing', 'extracting_audio')
             audio_path = downloader.extract_audio(video_path)
             
             # 3. Transcribe
             print("Transcribing...")
+            publish_video_status(video_id, 'processing', 'transcribing')
             transcript_path = downloader.generate_transcript(audio_path, video_title)
             
-            # 4. Upload to S3
-            stored_transcript_path = transcript_path
-            if USE_S3:
-                print("Uploading to S3...")
-                transcript_filename = os.path.basename(transcript_path)
-                transcript_s3_key = f"transcripts/{user_id}/{transcript_filename}"
-                stored_transcript_path = upload_to_s3(transcript_path, transcript_s3_key)
-                
-                # Cleanup local files
-                if os.path.exists(video_path): os.remove(video_path)
-                if os.path.exists(audio_path): os.remove(audio_path)
-                if os.path.exists(transcript_path): os.remove(transcript_path)
-            else:
-                # Cleanup video/audio only
-                if os.path.exists(video_path): os.remove(video_path)
-                if os.path.exists(audio_path): os.remove(audio_path)
+            # 4. Store the transcript (S3, local storage root or memory per STORAGE_BACKEND)
+            # in the background while the local copy is still used for language detection
+            publish_video_status(video_id, 'processing', 'uploading')
+            print("Storing transcript...")
+            transcript_filename = os.path.basename(transcript_path)
+            transcript_key = f"transcripts/{user_id}/{transcript_filename}"
+            transcript_upload = submit_io(write_file, transcript_path, transcript_key)
+            
+            # Cleanup local files
+            if os.path.exists(video_path): os.remove(video_path)
+            if os.path.exists(audio_path): os.remove(audio_path)
             
             # 5. Save Transcript to DB
             # Detect language
             detected_language = 'en'
             try:
                 from langdetect import detect
-                if stored_transcript_path.startswith("s3://"):
-                    full_text = read_file_content(stored_transcript_path)
-                    sample_text = full_text[:1000]
-                else:
-                    with open(stored_transcript_path, 'r', encoding='utf-8') as f:
-                        sample_text = f.read(1000)
+                with open(transcript_path, 'r', encoding='utf-8') as f:
+                    sample_text = f.read(1000)
                 
                 lines = [line.split(']')[-1].strip() if ']' in line else line.strip() 
                         for line in sample_text.split('\n') if line.strip()]
@@ -105,6 +112,10 @@ def process_message(message):
             except Exception as e:
                 print(f"Language detection failed: {e}")
 
+            stored_transcript_path, transcript_codec = transcript_upload.result()
+            if stored_transcript_path != transcript_path and os.path.exists(transcript_path):
+                os.remove(transcript_path)
+
             # Find user
             user = db.query(User).filter(User.email == user_id).first()
             
@@ -120,7 +131,8 @@ def process_message(message):
                 video_id=video_id,
                 user_id=user.id,
                 language=detected_language,
-                file_path=stored_transcript_path
+                file_path=stored_transcript_path,
+                codec=transcript_codec
             )
             db.add(db_transcript)
             
@@ -129,7 +141,15 @@ def process_message(message):
                 video.status = 'completed'
             
             db.commit()
+            publish_video_status(video_id, 'completed')
             print(f"Successfully processed video {video_id}")
+
+            # 6. Optionally pre-generate flashcards and a quiz (low priority)
+            try:
+                if video and submit_pregeneration(db, user, video, detected_language):
+                    print(f"Queued pre-generation for video {video_id} ({detected_language})")
+            except Exception as e:
+                print(f"Could not queue pre-generation: {e}")
             
         except Exception as e:
             print(f"Error processing video: {e}")
@@ -137,6 +157,7 @@ def process_message(message):
             if video:
                 video.status = 'failed'
                 db.commit()
+            publish_video_status(video_id, 'failed', detail=str(e))
             # IMPORTANT: Delete message even on failure to prevent infinite loop
             # In production, you might want to move to a Dead Letter Queue (DLQ)
             print(f"Deleting message {video_id} to prevent loop.")
@@ -153,12 +174,58 @@ def process_message(message):
         # But for now, let's just log it.
         raise e
 
+def process_jobs_queue():
+    """
+    Run generic jobs from the dedicated jobs queue, several at a time.
+    Per-type concurrency limits are enforced inside run_job.
+    """
+    slots = threading.BoundedSemaphore(sum(JOB_CONCURRENCY.values()))
+
+    def handle(message):
+        try:
+            body = json.loads(message['Body'])
+            run_job(body['job_id'])
+        except Exception as e:
+            print(f"Failed to run job message: {e}")
+        finally:
+            sqs.delete_message(
+                QueueUrl=SQS_JOBS_QUEUE_URL,
+                ReceiptHandle=message['ReceiptHandle']
+            )
+            slots.release()
+
+    while True:
+        slots.acquire()
+        try:
+            response = sqs.receive_message(
+                QueueUrl=SQS_JOBS_QUEUE_URL,
+                MaxNumberOfMessages=1,
+                WaitTimeSeconds=20
+            )
+            messages = response.get('Messages', [])
+        except Exception as e:
+            print(f"Error in jobs loop: {e}")
+            messages = []
+            time.sleep(5)
+
+        if not messages:
+            slots.release()
+            continue
+        threading.Thread(target=handle, args=(messages[0],), daemon=True).start()
+
 def main():
     print("Starting Worker...")
     if not SQS_QUEUE_URL:
         print("Error: SQS_TRANSCRIPTION_QUEUE_URL not set")
         return
 
+    if SQS_JOBS_QUEUE_URL and SQS_JOBS_QUEUE_URL != SQS_QUEUE_URL:
+        print("Starting jobs queue consumer...")
+        threading.Thread(target=process_jobs_queue, daemon=True).start()
+
+    # Removes stored files of deleted videos, flashcards and quizzes, retrying failures
+    threading.Thread(target=run_reaper, daemon=True).start()
+
     while True:
         try:
             response = sqs.receive_message(